@@ -0,0 +1,29 @@
+"""Cold parse versus warm load from the binary parse cache.
+
+    python benchmarks/bench_cache.py [n_objects ...]
+"""
+import os
+import tempfile
+
+from common import make_scene, sizes_from_argv, timed
+from config_editor.parse_cache import parse_g_file_cached
+
+
+def main():
+    print(f"{'objects':>10} {'MB':>8} {'cache MB':>9} {'mode':>6} {'cold s':>8} {'warm s':>8} {'speedup':>8}  same")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes_from_argv([100_000]):
+            path = os.path.join(tmp, f"scene{n}.g")
+            with open(path, "w") as f:
+                f.write(make_scene(n))
+            for mode in ("mtime", "hash"):
+                cache_dir = os.path.join(tmp, f"cache_{mode}")
+                cold, t_cold = timed(parse_g_file_cached, path, cache_dir, mode == "hash")
+                warm, t_warm = timed(parse_g_file_cached, path, cache_dir, mode == "hash")
+                cache_mb = sum(e.stat().st_size for e in os.scandir(cache_dir)) / 1e6
+                print(f"{n:>10} {os.path.getsize(path) / 1e6:>8.1f} {cache_mb:>9.1f} {mode:>6} "
+                      f"{t_cold:>8.3f} {t_warm:>8.3f} {t_cold / t_warm:>7.1f}x  {cold == warm}")
+
+
+if __name__ == "__main__":
+    main()
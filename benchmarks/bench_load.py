@@ -0,0 +1,41 @@
+"""Time loading a parsed level into the editor canvas. Needs a display.
+
+    python benchmarks/bench_load.py [n_objects ...]
+"""
+import tkinter as tk
+
+from common import make_scene, sizes_from_argv, timed
+from config_editor.editor import EditorApp
+from config_editor.io_utils import parse_g_file
+
+
+def load_one_by_one(app, objs):
+    # The pre-bulk path: add_obj (draw + select) per object
+    for data in objs:
+        app.add_obj(data['name'], data['w'], data['h'], data['type'], data['color'], data['x'], data['y'],
+                    name_override=data['full_name'])
+
+
+def load_bulk(app, objs):
+    loaded = app.add_parsed_objects(objs)
+    if loaded: app.select_object(loaded[-1])
+
+
+def main():
+    root = tk.Tk()
+    app = EditorApp(root)
+    root.update()
+    print(f"{'objects':>10} {'per-object s':>13} {'bulk s':>9} {'canvas items':>13}")
+    for n in sizes_from_argv([1_000, 5_000, 20_000]):
+        objs, _ = parse_g_file(make_scene(n))
+        app.new_file()
+        _, t_old = timed(load_one_by_one, app, objs)
+        app.new_file()
+        _, t_new = timed(load_bulk, app, objs)
+        root.update()
+        print(f"{n:>10} {t_old:>13.3f} {t_new:>9.3f} {len(app.canvas.find_all()):>13}")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
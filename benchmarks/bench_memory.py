@@ -0,0 +1,68 @@
+"""Per-object Python memory of LevelObject, measured with tracemalloc.
+
+    python benchmarks/bench_memory.py [n_objects ...]
+
+Objects are built without drawing, so this covers the model side only; the
+Tk side went from ten canvas items and ~20 bindings per object to two items.
+The new figure includes the object's share of the SceneModel columns.
+"""
+import tracemalloc
+from types import SimpleNamespace
+
+from common import make_objects, sizes_from_argv
+from config_editor.models import LevelObject
+from config_editor.scene import SceneModel
+
+
+class LegacyLevelObject:
+    # Attribute layout of LevelObject before __slots__ and the shared handle set
+    def __init__(self, canvas, name, x, y, width, height, obj_type, color, app, linked_obj=None):
+        self.canvas = canvas
+        self.name = name
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.obj_type = obj_type
+        self.color = color
+        self.app = app
+        self.linked_obj = linked_obj
+        self.handles = {loc: 1000 + i for i, loc in enumerate(["nw", "n", "ne", "w", "e", "sw", "s", "se"])}
+        self.rect_id = 1
+        self.text_id = 2
+        self._drag_data = {"x": 0, "y": 0}
+
+
+def build_legacy(specs, app):
+    return [LegacyLevelObject(None, s.name, s.x, s.y, s.width, s.height, s.obj_type, s.color, app) for s in specs]
+
+
+def build_slotted(specs, app):
+    objs = [LevelObject(s.name, s.x, s.y, s.width, s.height, s.obj_type, s.color, app, draw=False) for s in specs]
+    for obj in objs:
+        obj.rect_id, obj.text_id = 1, 2
+    return objs
+
+
+def measure(build, specs):
+    tracemalloc.start()
+    app = SimpleNamespace(scene=SceneModel())
+    before = tracemalloc.get_traced_memory()[0]
+    objs = build(specs, app)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del objs
+    return used / len(specs)
+
+
+def main():
+    print(f"{'objects':>10} {'legacy B/obj':>13} {'slots B/obj':>12} {'saved':>7}")
+    for n in sizes_from_argv([100_000]):
+        specs = make_objects(n)
+        old = measure(build_legacy, specs)
+        new = measure(build_slotted, specs)
+        print(f"{n:>10} {old:>13.0f} {new:>12.0f} {1 - new / old:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Cost of allocating names for N added objects: NameRegistry vs the old scans.
+
+    python benchmarks/bench_names.py [n_objects ...]
+
+The old scans grow roughly cubically (each pair id probe is a full scan), so
+they are only timed up to LEGACY_MAX objects.
+"""
+from common import sizes_from_argv, timed
+from config_editor.names import NameRegistry
+
+LEGACY_MAX = 1_000
+BASES = ["wall", "obs", "wall", "pair"]
+
+
+def legacy_next_name(names, base_name):
+    existing_nums = []
+    for name in names:
+        if name.startswith(base_name):
+            suffix = name[len(base_name):]
+            if suffix.isdigit():
+                existing_nums.append(int(suffix))
+            elif suffix.startswith("_") and suffix[1:].isdigit():
+                existing_nums.append(int(suffix[1:]))
+    return f"{base_name}{max(existing_nums) + 1 if existing_nums else 1}"
+
+
+def legacy_pair_id(names):
+    base_id = 1
+    while any(n == f"obj{base_id}" or n == f"goal{base_id}" for n in names):
+        base_id += 1
+    return base_id
+
+
+def add_legacy(n):
+    names = []
+    while len(names) < n:
+        base = BASES[len(names) % len(BASES)]
+        if base == "pair":
+            i = legacy_pair_id(names)
+            names += [f"obj{i}", f"goal{i}"]
+        else:
+            names.append(legacy_next_name(names, base))
+    return names
+
+
+def add_registry(n):
+    registry = NameRegistry()
+    names = []
+    while len(names) < n:
+        base = BASES[len(names) % len(BASES)]
+        if base == "pair":
+            i = registry.next_pair_id()
+            new = [f"obj{i}", f"goal{i}"]
+        else:
+            new = [registry.next_name(base)]
+        for name in new:
+            registry.add(name)
+        names += new
+    return names
+
+
+def main():
+    print(f"{'objects':>10} {'legacy s':>10} {'registry s':>11} {'speedup':>8}")
+    for n in sizes_from_argv([250, 500, 1_000, 50_000]):
+        new, t_new = timed(add_registry, n)
+        if n <= LEGACY_MAX:
+            old, t_old = timed(add_legacy, n)
+            assert old == new
+            print(f"{n:>10} {t_old:>10.3f} {t_new:>11.4f} {t_old / t_new:>7.0f}x")
+        else:
+            print(f"{n:>10} {'-':>10} {t_new:>11.4f} {'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Compare the single-pass parse_g_file against the old brace-scanning parser.
+
+    python benchmarks/bench_parse.py [n_objects ...]
+"""
+import re
+
+from common import make_scene, sizes_from_argv, timed
+from config_editor.constants import DEFAULT_BASE_FILE
+from config_editor.io_utils import parse_color, parse_g_file
+
+
+def legacy_extract_floats(text_block, key):
+    match = re.search(key + r'\s*[:=]\s*\[(.*?)\]', text_block, re.DOTALL)
+    if match:
+        return [float(n) for n in re.findall(r'-?\d*\.?\d+', match.group(1))]
+    if key == "Q":
+        match = re.search(r'Q\s*[:=]\s*"?t\((.*?)\)', text_block, re.DOTALL)
+        if match:
+            return [float(n) for n in re.findall(r'-?\d*\.?\d+', match.group(1))]
+    return []
+
+
+def legacy_parse_g_file(content):
+    pos = 0
+    length = len(content)
+    header_regex = re.compile(r'([\w\d_]+)\s*\([^\)]+\)\s*\{')
+    parsed_objects = []
+    inc_match = re.search(r'Include:\s*(<[^>]+>)', content)
+    base_file = inc_match.group(1) if inc_match else DEFAULT_BASE_FILE
+
+    while pos < length:
+        match = header_regex.search(content, pos)
+        if not match: break
+        name = match.group(1)
+        start_idx = match.end()
+        brace_count = 1
+        curr = start_idx
+        while curr < length and brace_count > 0:
+            if content[curr] == '{':
+                brace_count += 1
+            elif content[curr] == '}':
+                brace_count -= 1
+            curr += 1
+        props = content[start_idx: curr - 1]
+        pos = curr
+
+        if name in ["floor", "wall_north", "wall_south", "wall_east", "wall_west"]: continue
+        if not ("shape" in props or "type" in props): continue
+        if "camera" in props or "_vis" in name: continue
+
+        x, y = 0.0, 0.0
+        w, h = 0.1, 0.1
+        q_nums = legacy_extract_floats(props, "Q")
+        if len(q_nums) >= 2: x, y = q_nums[0], q_nums[1]
+        s_nums = legacy_extract_floats(props, "size")
+        if len(s_nums) >= 2: w, h = s_nums[0], s_nums[1]
+
+        otype, color = "wall", "brown"
+        c_match = re.search(r'color\s*[:=]\s*(\[[^\]]+\])', props)
+        if "agent" in props:
+            otype, color = "agent", "yellow"
+            w, h = w * 2, h * 2
+        elif "movable_go" in props:
+            otype = "goal_object"
+            color = parse_color(c_match.group(1)) if c_match else "blue"
+        elif "movable_o" in props:
+            otype = "movable"
+            color = parse_color(c_match.group(1)) if c_match else "#ffffff"
+        elif "goal" in props and "contact:0" in props:
+            otype = "goal_location"
+            color = parse_color(c_match.group(1)) if c_match else "red"
+
+        parsed_objects.append({
+            'name': name.split('_')[0], 'full_name': name,
+            'w': w, 'h': h, 'x': x, 'y': y,
+            'type': otype, 'color': color
+        })
+    return parsed_objects, base_file
+
+
+def main():
+    print(f"{'objects':>10} {'MB':>8} {'legacy s':>10} {'new s':>10} {'speedup':>8}  same")
+    for n in sizes_from_argv():
+        content = make_scene(n)
+        old, t_old = timed(legacy_parse_g_file, content)
+        new, t_new = timed(parse_g_file, content)
+        print(f"{n:>10} {len(content) / 1e6:>8.1f} {t_old:>10.3f} {t_new:>10.3f} {t_old / t_new:>7.1f}x  {old == new}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Trajectory playback: opening a memory-mapped log, sampling one frame, decimating traces.
+
+    python benchmarks/bench_playback.py [samples_per_body ...]
+"""
+import math
+import os
+import tempfile
+
+from common import sizes_from_argv, timed
+from config_editor.scene import np
+from config_editor.trajectory import TrajectoryLog, write_log
+
+BODIES = ["ego", "obj1", "obj2", "obj3"]
+FRAMES = 1000
+
+
+def make_tracks(n):
+    # Each body circles at its own rate, sampled at 1 kHz
+    t = [i / 1000 for i in range(n)]
+    return {name: (t, [math.cos(v * (k + 1)) * 2 for v in t], [math.sin(v * (k + 1)) * 2 for v in t])
+            for k, name in enumerate(BODIES)}
+
+
+def play_frames(log):
+    t0, t1 = log.time_range()
+    for f in range(FRAMES):
+        t = t0 + (t1 - t0) * f / FRAMES
+        for track in log.tracks:
+            track.pose_at(t)
+
+
+def trace_all(log):
+    return sum(len(track.trace(200, 450, 450)) // 2 for track in log.tracks)
+
+
+def main():
+    print(f"columns: {'numpy' if np is not None else 'array (no numpy)'}")
+    print(f"{'samples':>10} {'MB':>7} {'open ms':>8} {'frame ms':>9} {'trace ms':>9} {'points':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes_from_argv([100_000, 1_000_000]):
+            path = os.path.join(tmp, f"run{n}.traj")
+            write_log(path, make_tracks(n))
+            log, t_open = timed(TrajectoryLog, path)
+            _, t_frames = timed(play_frames, log)
+            points, t_trace = timed(trace_all, log)
+            print(f"{n * len(BODIES):>10} {os.path.getsize(path) / 1e6:>7.1f} {t_open * 1000:>8.2f} "
+                  f"{t_frames * 1000 / FRAMES:>9.3f} {t_trace * 1000:>9.1f} {points:>8}")
+            del log
+
+
+if __name__ == "__main__":
+    main()
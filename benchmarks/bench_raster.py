@@ -0,0 +1,40 @@
+"""Vectorized occupancy-grid rasterization against drawing one box at a time.
+
+    python benchmarks/bench_raster.py [n_objects ...]
+"""
+from common import make_scene, sizes_from_argv, timed
+from config_editor.io_utils import parse_g_file
+from config_editor.raster import CHANNEL_OF_TYPE, EPS, grid_shape, rasterize
+from config_editor.scene import SceneModel, np
+
+RESOLUTION = 100
+WORLD = 6
+
+
+def rasterize_loop(scene):
+    # Reference: slice-assign every box into the grid
+    grid = np.zeros(grid_shape(RESOLUTION, WORLD, WORLD), dtype=np.uint8)
+    for i in range(len(scene)):
+        x, y, hw, hh = scene.x[i], scene.y[i], scene.w[i] / 2, scene.h[i] / 2
+        c1 = int(np.floor((x - hw + WORLD / 2) * RESOLUTION + EPS))
+        c2 = int(np.ceil((x + hw + WORLD / 2) * RESOLUTION - EPS))
+        r1 = int(np.floor((WORLD / 2 - y - hh) * RESOLUTION + EPS))
+        r2 = int(np.ceil((WORLD / 2 - y + hh) * RESOLUTION - EPS))
+        grid[CHANNEL_OF_TYPE[scene.types[i]], max(r1, 0):r2, max(c1, 0):c2] = 1
+    return grid
+
+
+def main():
+    if np is None:
+        raise SystemExit("bench_raster needs NumPy")
+    print(f"grid: {grid_shape(RESOLUTION, WORLD, WORLD)}")
+    print(f"{'objects':>10} {'loop s':>8} {'vector s':>9} {'speedup':>8}  same")
+    for n in sizes_from_argv([10_000, 100_000]):
+        scene = SceneModel.from_parsed(parse_g_file(make_scene(n))[0])
+        ref, t_loop = timed(rasterize_loop, scene)
+        grid, t_vec = timed(rasterize, scene, RESOLUTION, WORLD, WORLD)
+        print(f"{n:>10} {t_loop:>8.3f} {t_vec:>9.3f} {t_loop / t_vec:>7.1f}x  {bool((ref == grid).all())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""Sweep-and-prune validation of tiled levels with a few percent overlapping objects.
+
+    python benchmarks/bench_validate.py [n_objects ...]
+"""
+from common import sizes_from_argv, timed
+from config_editor.scene import SceneModel, np
+from config_editor.validation import validate_scene
+
+
+def make_level(n, cell=0.5):
+    # Objects on a grid, every 37th one wide enough to reach into its neighbour
+    side = int(n ** 0.5) + 1
+    world = side * cell
+    parsed = [{'full_name': f"obj{i}", 'x': (i % side + 0.5) * cell - world / 2,
+               'y': (i // side + 0.5) * cell - world / 2, 'w': cell * (1.5 if i % 37 == 0 else 0.8),
+               'h': cell * 0.8, 'type': "wall" if i % 3 == 0 else "movable", 'color': "#ffffff"}
+              for i in range(n)]
+    return SceneModel.from_parsed(parsed), world
+
+
+def main():
+    print(f"columns: {'numpy' if np is not None else 'array (no numpy)'}")
+    print(f"{'objects':>10} {'issues':>8} {'full pass s':>12}")
+    for n in sizes_from_argv([10_000, 100_000]):
+        scene, world = make_level(n)
+        issues, t = timed(validate_scene, scene, world, world)
+        print(f"{n:>10} {len(issues):>8} {t:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
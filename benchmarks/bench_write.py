@@ -0,0 +1,49 @@
+"""Export time and peak memory of write_g_file / generate_g_string.
+
+    python benchmarks/bench_write.py [n_objects ...]
+"""
+import os
+import tempfile
+import tracemalloc
+
+from common import make_objects, sizes_from_argv, timed
+from config_editor.io_utils import format_g_object, generate_g_string, write_g_file
+
+
+def legacy_generate_g_string(objects, base_file):
+    output = f"Include: {base_file}\n\n"
+    for obj in objects:
+        output += format_g_object(obj)
+    return output
+
+
+def write_to_file(objects, path):
+    with open(path, "w") as f:
+        write_g_file(f, objects)
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    _, elapsed = timed(fn, *args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1e6
+
+
+def main():
+    fd, path = tempfile.mkstemp(suffix=".g")
+    os.close(fd)
+    print(f"{'objects':>10} {'legacy s':>9} {'legacy MB':>10} {'string s':>9} {'string MB':>10} {'stream s':>9} {'stream MB':>10} {'us/obj':>7}")
+    try:
+        for n in sizes_from_argv():
+            objects = make_objects(n)
+            t_old, m_old = measure(legacy_generate_g_string, objects, "<base.g>")
+            t_str, m_str = measure(generate_g_string, objects)
+            t_file, m_file = measure(write_to_file, objects, path)
+            print(f"{n:>10} {t_old:>9.3f} {m_old:>10.1f} {t_str:>9.3f} {m_str:>10.1f} {t_file:>9.3f} {m_file:>10.2f} {t_file / n * 1e6:>7.2f}")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
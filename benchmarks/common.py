@@ -0,0 +1,41 @@
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+OBJECT_TYPES = ["wall", "movable", "goal_object", "goal_location", "agent"]  # one agent per scene
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+def make_objects(n, seed=0):
+    rng = random.Random(seed)
+    objects = []
+    for i in range(n):
+        otype = "agent" if i == 0 else OBJECT_TYPES[i % (len(OBJECT_TYPES) - 1)]
+        objects.append(SimpleNamespace(
+            name=f"{otype[:3]}{i}", obj_type=otype,
+            x=rng.uniform(-2, 2), y=rng.uniform(-2, 2),
+            width=rng.uniform(0.05, 1), height=rng.uniform(0.05, 1),
+            color="#%02x%02x%02x" % (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255)),
+        ))
+    return objects
+
+
+def make_scene(n, seed=0):
+    from config_editor.io_utils import generate_g_string
+    return generate_g_string(make_objects(n, seed))
+
+
+def sizes_from_argv(default=SIZES):
+    if len(sys.argv) > 1:
+        return [int(a) for a in sys.argv[1:]]
+    return default
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - t0
@@ -0,0 +1,6 @@
+# EditorApp is imported lazily so the headless tools work without tkinter
+def __getattr__(name):
+    if name == "EditorApp":
+        from .editor import EditorApp
+        return EditorApp
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,10 +1,18 @@
-from .editor import EditorApp
-import tkinter as tk
+import sys
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        from .cli import main as cli_main
+        return cli_main(argv)
+
+    import tkinter as tk
+    from .editor import EditorApp
 
-def main():
     root = tk.Tk()
     app = EditorApp(root)
     root.mainloop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
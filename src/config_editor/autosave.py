@@ -0,0 +1,186 @@
+import json
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+
+from .constants import (AUTOSAVE_INTERVAL_MS, AUTOSAVE_DEBOUNCE_MS, AUTOSAVE_DIR, AUTOSAVE_FILE,
+                        AUTOSAVE_POLL_MS)
+from .io_utils import format_g_object, write_atomic
+
+# Plain values of one object, in the attribute shape format_g_object expects
+FragmentRecord = namedtuple("FragmentRecord", "name x y width height obj_type color")
+
+
+def snapshot(obj):
+    s, r = obj.scene, obj.row
+    return FragmentRecord(s.names[r], float(s.x[r]), float(s.y[r]), float(s.w[r]), float(s.h[r]),
+                          s.types[r], s.colors[r])
+
+
+class Autosaver:
+    # Writes the open level to a recovery file from a worker thread.
+    #
+    # The Tk thread only snapshots objects touched since the last job (and ones
+    # the worker has never seen); the worker turns those into fragments, keeps
+    # every fragment cached per object, and joins the cache in scene order.
+    # Files are written to a temp file and swapped in with os.replace.
+    #
+    # A save runs once edits have been quiet for debounce_ms, or at the latest
+    # interval_ms after the first unsaved edit. interval_ms=0 turns autosave off.
+
+    def __init__(self, app, interval_ms=AUTOSAVE_INTERVAL_MS, debounce_ms=AUTOSAVE_DEBOUNCE_MS,
+                 directory=AUTOSAVE_DIR):
+        self.app = app
+        self.interval_ms = interval_ms
+        self.debounce_ms = debounce_ms
+        self.recovery_path = os.path.join(directory, AUTOSAVE_FILE)
+        self.meta_path = self.recovery_path + ".json"
+
+        self.dirty = set()  # objects edited since their last snapshot
+        self.sent = set()  # objects whose current fragment the worker has
+        self.first_change = None
+        self._after_id = None
+        self._poll_id = None
+        self.outstanding = 0
+
+        self.fragments = {}  # worker thread only: obj -> fragment
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.thread = threading.Thread(target=self._work, daemon=True)
+        self.thread.start()
+
+    # --- TK THREAD ---
+
+    def touch(self, obj=None):
+        # obj=None records a structural change (objects removed) with nothing to re-serialize
+        if obj is not None: self.dirty.add(obj)
+        if self.interval_ms <= 0: return
+        now = time.monotonic()
+        if self.first_change is None: self.first_change = now
+        if self._after_id is not None: self.app.root.after_cancel(self._after_id)
+        left_ms = self.interval_ms - (now - self.first_change) * 1000
+        self._after_id = self.app.root.after(int(max(0, min(self.debounce_ms, left_ms))), self.autosave)
+
+    def autosave(self):
+        self._after_id = None
+        # A half-loaded level is not worth recovering, and playback poses are borrowed
+        if self.app.loader or self.app.playback:
+            self._after_id = self.app.root.after(self.debounce_ms, self.autosave)
+            return
+        self.first_change = None
+        meta = {"path": self.app.file_path, "base_file": self.app.base_file, "saved_at": time.time()}
+        self._submit(("write", self.recovery_path, meta))
+
+    def save(self, path, on_done):
+        # Explicit save; on_done(error) runs on the Tk thread. A loaded file is
+        # spliced through its GDocument, anything else goes through the cache.
+        self.cancel()
+        document = self.app.document
+        if document is not None:
+            self._submit(("splice", path, document.pieces()), on_done)
+        else:
+            self._submit(("write", path, None), on_done, discard=True)
+
+    def reset(self):
+        # New document: nothing to recover, nothing pending
+        self.cancel()
+        self.dirty.clear()
+        self.sent.clear()
+        self._submit(("discard",))
+
+    def discard(self):
+        self._submit(("discard",))
+
+    def cancel(self):
+        if self._after_id is not None:
+            self.app.root.after_cancel(self._after_id)
+            self._after_id = None
+        self.first_change = None
+
+    def close(self, timeout=5.0):
+        self.cancel()
+        self.jobs.put(None)
+        self.thread.join(timeout)
+
+    def recovery_info(self):
+        # Metadata of a recovery file left behind by a session that did not exit cleanly
+        if not os.path.exists(self.recovery_path): return None
+        try:
+            with open(self.meta_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"path": None, "base_file": None, "saved_at": os.path.getmtime(self.recovery_path)}
+
+    def _submit(self, job, on_done=None, discard=False):
+        if job[0] == "write":
+            objs = list(self.app.objects)
+            self.sent.intersection_update(objs)
+            dirty, sent = self.dirty, self.sent
+            changed = {o: snapshot(o) for o in objs if o in dirty or o not in sent}
+            sent.update(changed)
+            dirty.clear()
+            job = job + (self.app.base_file, objs, changed, discard)
+        self.jobs.put((job, on_done))
+        self.outstanding += 1
+        if self._poll_id is None:
+            self._poll_id = self.app.root.after(AUTOSAVE_POLL_MS, self._poll)
+
+    def _poll(self):
+        self._poll_id = None
+        while True:
+            try:
+                on_done, error = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.outstanding -= 1
+            if on_done: on_done(error)
+        if self.outstanding:
+            self._poll_id = self.app.root.after(AUTOSAVE_POLL_MS, self._poll)
+
+    # --- WORKER THREAD ---
+
+    def _work(self):
+        while True:
+            item = self.jobs.get()
+            if item is None: return
+            job, on_done = item
+            error = None
+            try:
+                if job[0] == "write":
+                    self._write(*job[1:])
+                elif job[0] == "splice":
+                    write_atomic(job[1], lambda f: f.writelines(job[2]), mode="wb")
+                    self._discard()
+                else:
+                    self._discard()
+            except Exception as e:
+                error = e
+            self.results.put((on_done, error))
+
+    def _write(self, path, meta, base_file, objs, changed, discard):
+        fragments = self.fragments
+        for obj, record in changed.items():
+            fragments[obj] = format_g_object(record)
+        # Re-keying drops fragments of deleted objects
+        self.fragments = fragments = {obj: fragments[obj] for obj in objs}
+
+        def write(f):
+            f.write(f"Include: {base_file}\n\n")
+            f.writelines(fragments.values())
+
+        if meta is not None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, write)
+        if meta is not None:
+            write_atomic(self.meta_path, lambda f: json.dump(meta, f))
+        if discard:
+            self._discard()
+
+    def _discard(self):
+        for path in (self.recovery_path, self.meta_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
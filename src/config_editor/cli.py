@@ -0,0 +1,229 @@
+import argparse
+import fnmatch
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from .constants import DEFAULT_WORLD_SIZE, PARSE_CACHE_DIR, RASTER_RESOLUTION
+from .io_utils import parse_g_file, write_g_file, write_atomic, as_records
+from .parse_cache import parse_g_file_cached
+from .raster import rasterize_to_npy
+from .trajectory import pack_csv
+from .scene import SceneModel
+from .validation import describe, validate_scene
+from .variants import generate_variants, load_spec
+
+PROGRESS_INTERVAL = 0.1
+MAX_REPORTED_ISSUES = 5
+
+
+def find_g_files(root, pattern="*.g"):
+    if os.path.isfile(root):
+        return [root]
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for fname in sorted(fnmatch.filter(filenames, pattern)):
+            paths.append(os.path.join(dirpath, fname))
+    return paths
+
+
+def read_g_file(path, args=None):
+    if args is not None and args.cache:
+        return parse_g_file_cached(path, args.cache_dir, by_hash=args.cache == "hash")
+    with open(path, "r") as f:
+        return parse_g_file(f.read())
+
+
+def save_g_file(path, objs, base_file):
+    # Write next to the target and swap in, so a failed run never truncates a level
+    write_atomic(path, lambda f: write_g_file(f, as_records(objs), base_file))
+
+
+# --- COMMANDS ---
+# Each returns the number of objects handled and raises on a bad file.
+
+def validate_file(path, args):
+    objs, _ = read_g_file(path, args)
+    seen = set()
+    for data in objs:
+        if data['full_name'] in seen:
+            raise ValueError(f"duplicate object name '{data['full_name']}'")
+        seen.add(data['full_name'])
+    if not args.no_rules:
+        scene = SceneModel.from_parsed(objs)
+        issues = validate_scene(scene, *args.world)
+        if issues:
+            shown = "; ".join(describe(i, scene.names) for i in issues[:MAX_REPORTED_ISSUES])
+            more = f" (+{len(issues) - MAX_REPORTED_ISSUES} more)" if len(issues) > MAX_REPORTED_ISSUES else ""
+            raise ValueError(f"{len(issues)} problems: {shown}{more}")
+    return len(objs)
+
+
+def normalize_file(path, args):
+    objs, base_file = read_g_file(path, args)
+    save_g_file(path, objs, base_file)
+    return len(objs)
+
+
+def output_path(path, args, ext=None):
+    # Mirror path's place under args.root inside args.output
+    rel = os.path.relpath(path, args.root) if os.path.isdir(args.root) else os.path.basename(path)
+    if ext: rel = os.path.splitext(rel)[0] + ext
+    out_path = os.path.join(args.output, rel)
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    return out_path
+
+
+def convert_file(path, args):
+    objs, base_file = read_g_file(path, args)
+    save_g_file(output_path(path, args), objs, base_file)
+    return len(objs)
+
+
+def rasterize_file(path, args):
+    objs, _ = read_g_file(path, args)
+    rasterize_to_npy(output_path(path, args, ".npy"), SceneModel.from_parsed(objs), args.resolution, *args.world)
+    return len(objs)
+
+
+COMMANDS = {
+    "validate": validate_file,
+    "normalize": normalize_file,
+    "convert": convert_file,
+    "rasterize": rasterize_file,
+}
+
+
+def process_file(command, args, path):
+    try:
+        return path, COMMANDS[command](path, args), None
+    except Exception as e:
+        return path, 0, f"{type(e).__name__}: {e}"
+
+
+def run_batch(command, paths, args):
+    worker = partial(process_file, command, args)
+    if args.jobs == 1:
+        yield from map(worker, paths)
+        return
+    chunksize = max(1, len(paths) // ((args.jobs or os.cpu_count() or 1) * 8))
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        yield from pool.map(worker, paths, chunksize=chunksize)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="rai-editor",
+                                     description="Batch tools for RAI .g files. Run without arguments to open the editor.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    descriptions = {
+        "validate": "parse every file and report problems",
+        "normalize": "rewrite every file in place in the editor's canonical format",
+        "convert": "write the canonical form of every file into an output directory",
+        "rasterize": "write an occupancy grid (.npy: walls, movables, goals, agent) per file into an output directory",
+    }
+    for name, help_text in descriptions.items():
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("root", help="a .g file or a directory searched recursively")
+        p.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+        p.add_argument("--pattern", default="*.g", help="file name pattern (default: *.g)")
+        p.add_argument("--cache", nargs="?", const="mtime", choices=["mtime", "hash"],
+                       help="reuse parses from the binary parse cache, keyed by mtime (default) or content hash")
+        p.add_argument("--cache-dir", default=PARSE_CACHE_DIR, help=f"parse cache location (default: {PARSE_CACHE_DIR})")
+        p.add_argument("-q", "--quiet", action="store_true", help="no progress line")
+        if name in ("validate", "rasterize"):
+            p.add_argument("--world", type=float, nargs=2, metavar=("W", "H"),
+                           default=(DEFAULT_WORLD_SIZE, DEFAULT_WORLD_SIZE), help="world size (centered on 0)")
+        if name == "validate":
+            p.add_argument("--no-rules", action="store_true", help="only check that files parse")
+        if name == "rasterize":
+            p.add_argument("--resolution", type=float, default=RASTER_RESOLUTION,
+                           help=f"cells per world unit (default: {RASTER_RESOLUTION})")
+        if name in ("convert", "rasterize"):
+            p.add_argument("-o", "--output", required=True, help="output directory")
+
+    p = sub.add_parser("generate", help="write randomized variants of a template level")
+    p.add_argument("template", help="the hand-made .g file to vary")
+    p.add_argument("-n", "--count", type=int, required=True, help="number of variants")
+    p.add_argument("-o", "--output", required=True, help="output directory")
+    p.add_argument("--spec", help="JSON variation spec (default: jitter movables, goals and agent by 0.2)")
+    p.add_argument("--seed", type=int, default=0, help="base seed; variant i always comes out the same for a seed")
+    p.add_argument("--start", type=int, default=0, help="index of the first variant")
+    p.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    p.add_argument("-q", "--quiet", action="store_true", help="no progress line")
+
+    p = sub.add_parser("pack-log", help="convert a CSV trajectory log into the editor's playback format")
+    p.add_argument("csv", help="rows of body,t,x,y (a header row is skipped)")
+    p.add_argument("-o", "--output", required=True, help="trajectory file to write (.traj)")
+    return parser
+
+
+def run_generate(args):
+    spec = load_spec(args.spec)
+    errors = 0
+    show_progress = not args.quiet and sys.stderr.isatty()
+    clear = "\r\033[K" if show_progress else ""
+    start = last_report = time.perf_counter()
+
+    variants = generate_variants(args.template, args.count, args.output, spec, args.seed, args.jobs, args.start)
+    for done, (index, path, error) in enumerate(variants, 1):
+        if error:
+            errors += 1
+            print(f"{clear}variant {index}: {error}", file=sys.stderr)
+        now = time.perf_counter()
+        if show_progress and (now - last_report >= PROGRESS_INTERVAL or done == args.count):
+            print(f"{clear}[{done}/{args.count}] {errors} errors", end="", file=sys.stderr, flush=True)
+            last_report = now
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    if show_progress:
+        print(file=sys.stderr)
+    print(f"generate: {args.count - errors} variants, {errors} errors in {elapsed:.2f}s "
+          f"({(args.count - errors) / elapsed:.1f} variants/s)")
+    return 1 if errors else 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "generate":
+        return run_generate(args)
+    if args.command == "pack-log":
+        start = time.perf_counter()
+        try:
+            bodies, samples = pack_csv(args.csv, args.output)
+        except (OSError, ValueError) as e:
+            print(f"{type(e).__name__}: {e}", file=sys.stderr)
+            return 1
+        print(f"pack-log: {bodies} bodies, {samples} samples in {time.perf_counter() - start:.2f}s")
+        return 0
+    paths = find_g_files(args.root, args.pattern)
+    if not paths:
+        print(f"No files matching {args.pattern} under {args.root}", file=sys.stderr)
+        return 1
+
+    total = len(paths)
+    n_objects = 0
+    errors = 0
+    show_progress = not args.quiet and sys.stderr.isatty()
+    clear = "\r\033[K" if show_progress else ""
+    start = last_report = time.perf_counter()
+
+    for done, (path, count, error) in enumerate(run_batch(args.command, paths, args), 1):
+        n_objects += count
+        if error:
+            errors += 1
+            print(f"{clear}{path}: {error}", file=sys.stderr)
+        now = time.perf_counter()
+        if show_progress and (now - last_report >= PROGRESS_INTERVAL or done == total):
+            print(f"{clear}[{done}/{total}] {errors} errors", end="", file=sys.stderr, flush=True)
+            last_report = now
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    if show_progress:
+        print(file=sys.stderr)
+    print(f"{args.command}: {total} files, {n_objects} objects, {errors} errors in {elapsed:.2f}s "
+          f"({total / elapsed:.1f} files/s, {n_objects / elapsed:.0f} objects/s)")
+    return 1 if errors else 0
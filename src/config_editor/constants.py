@@ -1,7 +1,14 @@
+import os
+
 # Window Settings
 DEFAULT_WINDOW_SIZE = 900
 DEFAULT_WORLD_SIZE = 4.0
 HANDLE_SIZE = 8
+SELECTION_TAG = "selected" # canvas tag on every item of the current selection
+SHIFT_MASK = 0x0001 # event.state bit for Shift
+
+# Agent
+AGENT_LIMITS = (-4, 4, -4, 4) # transXY joint limits written for ego: x min, x max, y min, y max
 
 # Default Strings
 DEFAULT_BASE_FILE = "<../base-walls-min.g>" # hard coded for now
@@ -11,6 +18,67 @@ COLOR_FLOOR = "#C4AFA5"
 COLOR_VOID = "white"
 COLOR_WALL_BASE = "#B18373"
 COLOR_GRID = "#A0A0A0"
+COLOR_INCLUDE_OUTLINE = "#6E5A52" # locked geometry from Include files
+COLOR_ISSUE = "red" # labels of objects that fail validation
+COLOR_TRACE = "#404040" # trajectory traces of bodies that are not in the level
+
+# Goals
+GOAL_COLORS = ["#0000ff", "#4169E1", "#008080", "#8A2BE2", "#4B0082"]
+GOAL_TYPES = ("goal_object", "goal_location") # the two halves of a goal pair
+
+# Spatial Index
+SPATIAL_CELL_SIZE = 0.5 # world units per grid cell
+PICK_TOLERANCE_PX = 3
+
+# Background Loading
+LOAD_BATCH_SIZE = 2000 # objects per hand-off from the reader thread
+LOAD_DRAW_CHUNK = 250 # objects drawn between time checks
+LOAD_FRAME_BUDGET = 0.012 # seconds of drawing per Tk tick
+LOAD_POLL_MS = 15
+
+# Rendering
+FRAME_MS = 16 # at most one interactive redraw per frame
+RESIZE_DEBOUNCE_MS = 80 # wait for the window to settle before rescaling
+
+# Viewport
+ZOOM_STEP = 1.2 # scale change per wheel notch
+ZOOM_MIN = 0.2
+ZOOM_MAX = 50.0
+GRID_MIN_PX = 40 # grid spacing is doubled or halved to stay within these bounds
+GRID_MAX_PX = 320
+VIEW_SYNC_MS = 120 # exact resync once zooming or panning pauses
+
+# History
+HISTORY_LIMIT = 1_000_000 # object records kept across all undo entries
+HISTORY_DEPTH = 1000 # undo entries
+
+# Autosave
+AUTOSAVE_INTERVAL_MS = 30000 # longest an edit waits to be saved; 0 disables autosave
+AUTOSAVE_DEBOUNCE_MS = 2000 # quiet time after the last edit before saving
+AUTOSAVE_POLL_MS = 100
+AUTOSAVE_DIR = os.path.join(os.path.expanduser("~"), ".rai_config_editor")
+AUTOSAVE_FILE = "autosave.g"
+
+# Includes
+INCLUDE_CACHE_SIZE = 32 # parsed include files kept, keyed by (path, mtime, size)
+
+# Parse Cache
+PARSE_CACHE_DIR = os.path.join(AUTOSAVE_DIR, "parse_cache")
+PARSE_CACHE_IN_EDITOR = False # opt-in: serve reopened files from the parse cache
+
+# Validation
+VALIDATE_MS = 100 # live checks run at most this often while editing
+VALIDATE_PAIR_CHUNK = 1_000_000 # sweep-and-prune candidate pairs tested per vectorized batch
+
+# Watch Mode
+WATCH_FILE = True # live-reload the open file when another program rewrites it
+WATCH_POLL_MS = 250 # how often the open file's mtime and size are checked
+WATCH_TOLERANCE = 5e-4 # geometry differences below this are rounding from the 3-decimal file format
+
+# Trajectory Playback
+PLAYBACK_FRAME_MS = 16 # fixed playback timer, about 60 fps
+PLAYBACK_SPEEDS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0)
+TRACE_MAX_POINTS = 20000 # polyline points per trace after screen-resolution decimation
 
-# Goal Colors
-GOAL_COLORS = ["#0000ff", "#4169E1", "#008080", "#8A2BE2", "#4B0082"]
\ No newline at end of file
+# Rasterizer
+RASTER_RESOLUTION = 50 # occupancy grid cells per world unit
@@ -0,0 +1,248 @@
+import re
+
+from .io_utils import (NUMBER_RE, BRACE_RE_BYTES, GFileReader, build_object, decode_name, find_block_end,
+                       format_g_object, rgb_to_str)
+
+# NODE_RE_BYTES with the parent reference captured, so a node's joint can be found
+NODE_SPAN_RE = re.compile(rb'''
+    (?P<name>[\w\x80-\xff]+)\s*\((?P<parent>[^)]+)\)\s*\{(?P<body>[^{}]*(?:\{[^{}]*\}[^{}]*)*)\}
+  | (?P<deep>[\w\x80-\xff]+)\s*\((?P<dparent>[^)]+)\)\s*\{
+''', re.VERBOSE)
+VALUE_SPAN_RE = re.compile(rb'(Q|size|color)\s*[:=]\s*(?:\[([^\]]*)\]|"?t\(([^)]*)\))')
+NUMBER_RE_BYTES = re.compile(NUMBER_RE.pattern.encode())
+# What a removed node takes with it: the rest of its line and following blank lines
+TRAILING_BLANK_RE = re.compile(rb'[ \t]*(?:\r?\n[ \t]*(?=\r?\n))*\r?\n?')
+
+
+class DocNode:
+    # Byte spans of one node in the original file. For object nodes, values
+    # maps "Q"/"size"/"color" to the span of the numbers inside the brackets,
+    # and record is what build_object read from it.
+    __slots__ = ("name", "start", "end", "name_span", "parent", "parent_span", "values", "record", "joint")
+
+    def __init__(self, name, start, end, name_span, parent, parent_span):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.name_span = name_span
+        self.parent = parent
+        self.parent_span = parent_span
+        self.values = {}
+        self.record = None
+        self.joint = None
+
+
+def iter_document(data, objects, others):
+    # One pass over the bytes: fills objects (object nodes, file order) and
+    # others (other nodes by name), yielding each object node as it is found
+    pos = 0
+    while True:
+        match = NODE_SPAN_RE.search(data, pos)
+        if not match: return
+        if match.group("name"):
+            group, parent_group = "name", "parent"
+            body_start, body_end = match.span("body")
+            pos = match.end()
+        else:
+            group, parent_group = "deep", "dparent"
+            body_start = match.end()
+            body_end = find_block_end(data, body_start, BRACE_RE_BYTES)
+            pos = body_end + 1
+
+        name = decode_name(match.group(group))
+        if name is None: continue
+        # decode_name may drop a non-word prefix: the node starts where the name does
+        name_end = match.end(group)
+        name_start = name_end - len(name.encode())
+        node = DocNode(name, name_start, pos, (name_start, name_end),
+                       match.group(parent_group).decode("utf-8", "replace").strip(), match.span(parent_group))
+        record = build_object(name, data[body_start:body_end].decode("utf-8", "replace"))
+        if record is None:
+            others[name] = node
+            continue
+
+        # Same first-wins choice as build_object: Q:[..] over Q:"t(..)", list form only for size/color
+        q_t = None
+        for m in VALUE_SPAN_RE.finditer(data, body_start, body_end):
+            key = m.group(1).decode()
+            if m.group(3) is not None:
+                if key == "Q" and q_t is None: q_t = m.span(3)
+            elif key not in node.values:
+                node.values[key] = m.span(2)
+        if "Q" not in node.values and q_t is not None:
+            node.values["Q"] = q_t
+        node.record = record
+        # Only an own "<name>Joint" parent goes with the object; a shared
+        # parent such as floor or world is someone else's node
+        if node.parent == name + "Joint": node.joint = others.get(node.parent)
+        objects.append(node)
+        yield node
+
+
+def scan_document(data):
+    # (object nodes, other nodes by name)
+    objects, others = [], {}
+    for _ in iter_document(data, objects, others): pass
+    return objects, others
+
+
+def replace_numbers(text, numbers):
+    # Swap the first len(numbers) numbers in text, leaving the rest as written
+    out, pos = [], 0
+    for value, m in zip(numbers, NUMBER_RE_BYTES.finditer(text)):
+        out.append(text[pos:m.start()])
+        out.append(value.encode())
+        pos = m.end()
+    if len(out) < 2 * len(numbers): return None
+    out.append(text[pos:])
+    return b"".join(out)
+
+
+class GDocument:
+    # Lossless view of a loaded .g file: the original bytes plus the span of
+    # every node. Objects are bound to their node after loading; saving emits
+    # the original bytes with only edited nodes spliced (values rewritten in
+    # place, everything else in the node kept), removed nodes cut out and new
+    # objects appended. Untouched content round-trips byte for byte.
+    #
+    # Patches are kept against the original bytes (start -> (end, replacement)),
+    # so each save only re-renders the objects touched since the previous one.
+
+    def __init__(self, data, scanned=None):
+        # scanned: scan_document(data) when the caller already has it
+        self.data = data
+        self.stat = None  # (mtime_ns, size) of the file data was read from, when known
+        self.nodes, self.others = scanned if scanned is not None else scan_document(data)
+        # Unbound nodes per name, last in file first; built here so that bind,
+        # which runs on the Tk thread, is a single pass over the objects
+        self.by_name = {}
+        for node in reversed(self.nodes):
+            self.by_name.setdefault(node.name, []).append(node)
+        self.bound = {}  # obj -> DocNode
+        self.patches = {}
+        self.edited = {}  # touched since the last save, in touch order
+        self.added = {}  # objects with no node, in creation order
+
+    def bind(self, objs, names=None):
+        # Match loaded objects to their nodes by name, in file order. names,
+        # parallel to objs, spares reading each object's name.
+        by_name, bound = self.by_name, self.bound
+        for obj, name in zip(objs, names if names is not None else (o.name for o in objs)):
+            queue = by_name.get(name)
+            if queue: bound[obj] = queue.pop()
+        # Nodes left over belong to objects deleted while the file was loading
+        for queue in by_name.values():
+            for node in queue:
+                self._remove(node)
+        self.by_name = {}
+
+    def touch(self, obj):
+        if obj in self.bound:
+            self.edited[obj] = None
+        else:
+            self.added[obj] = None
+
+    def pieces(self):
+        # Chunks of the file as it should be saved now
+        for obj in self.edited:
+            node = self.bound[obj]
+            if obj.row is None:
+                self._remove(node)
+            else:
+                self._patch(node, obj)
+        self.edited = {}
+
+        out, pos = [], 0
+        view = memoryview(self.data)
+        for start in sorted(self.patches):
+            end, replacement = self.patches[start]
+            out.append(view[pos:start])
+            out.append(replacement)
+            pos = end
+        out.append(view[pos:])
+
+        tail = [format_g_object(o).encode() for o in self.added if o.row is not None]
+        if tail:
+            if self.data and not self.data.endswith(b"\n"): out.append(b"\n")
+            out.extend(tail)
+        return out
+
+    def _remove(self, node):
+        end = TRAILING_BLANK_RE.match(self.data, node.end).end()
+        self.patches[node.start] = (end, b"")
+        if node.joint is not None: self._remove_joint(node.joint)
+
+    def _patch(self, node, obj):
+        rec = node.record
+        self.patches.pop(node.start, None)
+        if node.joint is not None: self.patches.pop(node.joint.start, None)
+
+        edits = []  # (value key, new leading numbers)
+        x, y, w, h = round(obj.x, 3), round(obj.y, 3), round(obj.width, 3), round(obj.height, 3)
+        if (x, y) != (round(rec['x'], 3), round(rec['y'], 3)):
+            edits.append(("Q", [str(x), str(y)]))
+        if (w, h) != (round(rec['w'], 3), round(rec['h'], 3)):
+            # Agents store a radius, see build_object
+            size = [str(round(w / 2, 3)), str(round(h / 2, 3))] if rec['type'] == "agent" else [str(w), str(h)]
+            edits.append(("size", size))
+        if obj.color != rec['color'] and rec['type'] != "agent":
+            edits.append(("color", rgb_to_str(obj.color).split()))
+
+        spliced = []
+        for key, numbers in edits:
+            span = node.values.get(key)
+            text = replace_numbers(self.data[span[0]:span[1]], numbers) if span else None
+            if text is None:
+                return self._regenerate(node, obj)
+            spliced.append((span[0], span[1], text))
+
+        if obj.name != node.name:
+            spliced.append((node.name_span[0], node.name_span[1], obj.name.encode()))
+            if node.joint is not None:
+                new_joint = (obj.name + "Joint").encode()
+                spliced.append((node.parent_span[0], node.parent_span[1], new_joint))
+                j = node.joint
+                self.patches[j.start] = (j.end, new_joint + self.data[j.name_span[1]:j.end])
+
+        if not spliced: return  # back to how it was loaded
+        out, pos = [], node.start
+        for start, end, text in sorted(spliced):
+            out.append(self.data[pos:start])
+            out.append(text)
+            pos = end
+        out.append(self.data[pos:node.end])
+        self.patches[node.start] = (node.end, b"".join(out))
+
+    def _regenerate(self, node, obj):
+        # The node lacks a value we need to change: write it from the template
+        fragment = format_g_object(obj).rstrip("\n").encode()
+        self.patches[node.start] = (node.end, fragment)
+        if node.joint is not None and b"Joint(" in fragment:
+            self._remove_joint(node.joint)
+
+    def _remove_joint(self, joint):
+        self.patches[joint.start] = (TRAILING_BLANK_RE.match(self.data, joint.end).end(), b"")
+
+
+class DocumentReader(GFileReader):
+    # GFileReader that records node spans while it streams the records, so the
+    # GDocument for lossless saving comes out of the same pass over the map
+    # (and the same version of the file) as the objects
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.scanned = None  # (objects, others) once a pass has run to the end
+
+    def __iter__(self):
+        if self._map is None: return
+        objects, others = [], {}
+        for node in iter_document(self._map, objects, others):
+            self.position = node.end
+            yield node.record
+        self.scanned = objects, others
+
+    def document(self):
+        # Before close. Scans now if the records came from elsewhere (parse cache hit).
+        document = GDocument(bytes(self._map) if self._map is not None else b"", self.scanned)
+        document.stat = self.stat
+        return document
@@ -1,12 +1,24 @@
 import tkinter as tk
-from tkinter import filedialog, colorchooser, messagebox, simpledialog
+from tkinter import filedialog, colorchooser, messagebox, simpledialog, ttk
 import math
 import os
-import random
+import time
+from collections import deque
 
 from .constants import *
-from .models import LevelObject
-from .io_utils import parse_g_file, generate_g_string
+from .models import LevelObject, HandleSet
+from .scene import SceneModel
+from .spatial import SpatialIndex
+from .names import NameRegistry
+from .loader import BackgroundLoader
+from .render import RenderScheduler, DIRTY_STYLE
+from .autosave import Autosaver
+from .validation import LiveValidator
+from .watch import FileWatcher
+from .playback import Playback
+from .trajectory import TrajectoryLog
+from .history import History, GeometryOp, AddOp, DeleteOp, RenameOp, RecolorOp, dangling_links, geometry
+from .io_utils import random_color
 
 
 class EditorApp:
@@ -21,6 +33,10 @@ class EditorApp:
         self.world_w = DEFAULT_WORLD_SIZE
         self.world_h = DEFAULT_WORLD_SIZE
         self.base_file = DEFAULT_BASE_FILE
+        self.file_path = None
+        self.recovered_path = None
+        self.document = None  # GDocument of the loaded file, for lossless saving
+        self.load_touched = {}
 
         # Viewport State
         self.canvas_w = DEFAULT_WINDOW_SIZE
@@ -28,6 +44,11 @@ class EditorApp:
         self.ppm = 100
         self.offset_x = 0
         self.offset_y = 0
+        self.zoom = 1.0
+        self.view_cx = 0.0
+        self.view_cy = 0.0
+        self.pan_data = None
+        self.view_job = None
 
         self.goal_index = 0
         self.clipboard = None
@@ -45,10 +66,17 @@ class EditorApp:
 
         self.canvas.bind("<Configure>", self.on_resize)
 
-        self.canvas.bind("<Button-1>", self.on_bg_click)
-        self.canvas.bind("<Button-2>", self.on_canvas_right_click)
+        self.canvas.bind("<Button-1>", self.on_canvas_click)
+        self.canvas.bind("<B1-Motion>", self.on_canvas_drag)
+        self.canvas.bind("<ButtonRelease-1>", self.on_canvas_release)
+        self.canvas.bind("<Button-2>", self.on_pan_start)
+        self.canvas.bind("<B2-Motion>", self.on_pan_drag)
+        self.canvas.bind("<ButtonRelease-2>", self.on_pan_release)
         self.canvas.bind("<Button-3>", self.on_canvas_right_click)
         self.canvas.bind("<Motion>", self.track_mouse)
+        self.canvas.bind("<MouseWheel>", self.on_wheel)
+        self.canvas.bind("<Button-4>", self.on_wheel)
+        self.canvas.bind("<Button-5>", self.on_wheel)
 
         prop_panel = tk.Frame(main_frame, width=200, bg="#cccccc", padx=10, pady=10)
         prop_panel.pack(side=tk.RIGHT, fill=tk.Y)
@@ -66,6 +94,21 @@ class EditorApp:
 
         tk.Button(toolbar, text="Save .g", command=self.save_file).pack(side=tk.RIGHT, padx=pad)
         tk.Button(toolbar, text="Load .g", command=self.load_file).pack(side=tk.RIGHT, padx=pad)
+        tk.Button(toolbar, text="Play Log", command=self.load_trajectory).pack(side=tk.RIGHT, padx=pad)
+        self.watch_var = tk.BooleanVar(value=WATCH_FILE)
+        tk.Checkbutton(toolbar, text="Watch", variable=self.watch_var, command=self.watch_open_file).pack(
+            side=tk.RIGHT, padx=pad)
+        self.watcher = None
+
+        # Load progress, only packed while a background load runs
+        self.load_frame = tk.Frame(toolbar)
+        self.btn_cancel_load = tk.Button(self.load_frame, text="Cancel", command=self.cancel_load)
+        self.btn_cancel_load.pack(side=tk.RIGHT, padx=pad)
+        self.load_bar = ttk.Progressbar(self.load_frame, length=150, maximum=1.0)
+        self.load_bar.pack(side=tk.RIGHT, padx=pad)
+        self.lbl_load = tk.Label(self.load_frame, text="")
+        self.lbl_load.pack(side=tk.RIGHT, padx=pad)
+        self.loader = None
 
         # Properties
         tk.Label(prop_panel, text="Selection", font=("Arial", 11, "bold"), bg="#cccccc").pack(pady=10)
@@ -75,9 +118,31 @@ class EditorApp:
         self.lbl_dims.pack(pady=(10, 0))
         self.lbl_pos = tk.Label(prop_panel, text="-", bg="#cccccc")
         self.lbl_pos.pack(pady=(10, 0))
+        self.lbl_issues = tk.Label(prop_panel, text="", bg="#cccccc", fg=COLOR_ISSUE, justify=tk.LEFT, wraplength=180)
+        self.lbl_issues.pack(pady=(10, 0))
+
+        # Trajectory playback, only packed while a log is open
+        self.playback = None
+        self.playback_frame = tk.Frame(prop_panel, bg="#cccccc")
+        tk.Label(self.playback_frame, text="Playback", font=("Arial", 11, "bold"), bg="#cccccc").pack(pady=(20, 5))
+        self.lbl_playback = tk.Label(self.playback_frame, text="", bg="#cccccc")
+        self.lbl_playback.pack()
+        self.playback_scale = tk.Scale(self.playback_frame, orient=tk.HORIZONTAL, showvalue=False, length=180,
+                                       command=self.on_scrub)
+        self.playback_scale.pack()
+        playback_buttons = tk.Frame(self.playback_frame, bg="#cccccc")
+        playback_buttons.pack(pady=5)
+        tk.Button(playback_buttons, text="Slower", command=lambda: self.change_playback_speed(-1)).pack(side=tk.LEFT)
+        self.btn_play = tk.Button(playback_buttons, text="Play", width=6, command=self.toggle_playback)
+        self.btn_play.pack(side=tk.LEFT, padx=pad)
+        tk.Button(playback_buttons, text="Faster", command=lambda: self.change_playback_speed(1)).pack(side=tk.LEFT)
+        tk.Button(self.playback_frame, text="Close Log", command=self.close_playback).pack()
 
         # Context Menu
         self.context_menu = tk.Menu(root, tearoff=0)
+        self.context_menu.add_command(label="Undo", command=self.undo)
+        self.context_menu.add_command(label="Redo", command=self.redo)
+        self.context_menu.add_separator()
         self.context_menu.add_command(label="Rename", command=self.rename_selection)
         self.context_menu.add_separator()
         self.context_menu.add_command(label="Cut", command=self.cut_selection)
@@ -85,6 +150,14 @@ class EditorApp:
         self.context_menu.add_command(label="Paste", command=self.paste_selection)
         self.context_menu.add_separator()
         self.context_menu.add_command(label="Change Color", command=self.change_color)
+        align_menu = tk.Menu(self.context_menu, tearoff=0)
+        for label, edge in [("Left", "left"), ("Center", "center"), ("Right", "right"),
+                            ("Top", "top"), ("Middle", "middle"), ("Bottom", "bottom")]:
+            align_menu.add_command(label=label, command=lambda e=edge: self.align_selection(e))
+        align_menu.add_separator()
+        align_menu.add_command(label="Distribute Horizontally", command=lambda: self.distribute_selection("x"))
+        align_menu.add_command(label="Distribute Vertically", command=lambda: self.distribute_selection("y"))
+        self.context_menu.add_cascade(label="Align", menu=align_menu)
         self.context_menu.add_command(label="Delete", command=self.delete_selected)
 
         # Shortcuts
@@ -93,6 +166,9 @@ class EditorApp:
         for k in ["<Control-x>", "<Command-x>"]: root.bind(k, lambda e: self.cut_selection())
         for k in ["<Delete>", "<BackSpace>"]: root.bind(k, lambda e: self.delete_selected())
         root.bind("<F2>", lambda e: self.rename_selection())
+        for k in ["<Control-z>", "<Command-z>"]: root.bind(k, lambda e: self.undo())
+        for k in ["<Control-y>", "<Control-Z>", "<Command-Z>"]: root.bind(k, lambda e: self.redo())
+        root.bind("<Home>", lambda e: self.reset_view())
 
         root.bind("<Left>", lambda e: self.nudge(-0.01, 0))
         root.bind("<Right>", lambda e: self.nudge(0.01, 0))
@@ -103,37 +179,196 @@ class EditorApp:
         self.objects = []
         self.obj_counter = 0
         self.selected_obj = None
-        self.link_lines = []
+        self.selection = []
+        self.link_line_id = None
+
+        self.scene = SceneModel()
+        self.include_scene = SceneModel()  # locked geometry from Include files
+        self.include_items = []
+        self.spatial = SpatialIndex()
+        self.handles = HandleSet(self.canvas)
+        self.renderer = RenderScheduler(self)
+        self.names = NameRegistry()
+        self.drag_target = None
+        self.drag_data = None
+        self.box_start = None
+        self.history = History(self)
+        self.autosave = Autosaver(self)
+        self.validator = LiveValidator(self)
+        self.gesture = None
+        self.bg_items = []
+        self.culled = set()
+        self.resize_job = None
 
         self.update_scaling_constants()
 
+        root.protocol("WM_DELETE_WINDOW", self.on_close)
+        root.after_idle(self.offer_recovery)
+
     def on_resize(self, event):
         self.canvas_w = event.width
         self.canvas_h = event.height
+        if self.resize_job:
+            self.root.after_cancel(self.resize_job)
+        self.resize_job = self.root.after(RESIZE_DEBOUNCE_MS, self.apply_resize)
+
+    def apply_resize(self):
+        self.resize_job = None
+        old_view = (self.ppm, self.offset_x, self.offset_y)
         self.update_scaling_constants()
-        self.redraw_all()
+        if self.bg_items:
+            self.transform_view(*old_view)
+            self.update_culling()
+        else:
+            self.redraw_all()
 
     def update_scaling_constants(self):
+        # Fit the world to the window, then apply zoom around the view center
         margin_world = 0.25
         ppm_w = self.canvas_w / (self.world_w + margin_world)
         ppm_h = self.canvas_h / (self.world_h + margin_world)
 
-        self.ppm = min(ppm_w, ppm_h)
-        self.offset_x = self.canvas_w / 2
-        self.offset_y = self.canvas_h / 2
+        self.ppm = min(ppm_w, ppm_h) * self.zoom
+        self.offset_x = self.canvas_w / 2 - self.view_cx * self.ppm
+        self.offset_y = self.canvas_h / 2 + self.view_cy * self.ppm
+
+    def transform_view(self, old_ppm, old_offset_x, old_offset_y):
+        # Every item is an affine image of the world, so one scale and one move
+        # carry the whole canvas from the old view to the current one.
+        s = self.ppm / old_ppm
+        if s != 1:
+            self.canvas.scale("all", old_offset_x, old_offset_y, s, s)
+        self.canvas.move("all", self.offset_x - old_offset_x, self.offset_y - old_offset_y)
+        self.draw_environment()
+        self.handles.update()
+
+    def set_view(self, zoom, center_x, center_y):
+        old_view = (self.ppm, self.offset_x, self.offset_y)
+        self.zoom = zoom
+        self.view_cx = center_x
+        self.view_cy = center_y
+        self.update_scaling_constants()
+        self.transform_view(*old_view)
+
+        # Culling and the exact per-object resync wait until the gesture pauses
+        if self.view_job:
+            self.root.after_cancel(self.view_job)
+        self.view_job = self.root.after(VIEW_SYNC_MS, self.sync_view)
+
+    def sync_view(self):
+        self.view_job = None
+        self.redraw_all()
+
+    def reset_view(self):
+        self.set_view(1.0, 0.0, 0.0)
+
+    def zoom_at(self, px, py, factor):
+        # Keep the world point under the pointer fixed
+        zoom = min(max(self.zoom * factor, ZOOM_MIN), ZOOM_MAX)
+        if zoom == self.zoom: return
+        wx, wy = self.pixel_to_world(px, py)
+        ppm = self.ppm * zoom / self.zoom
+        center_x = wx - (px - self.canvas_w / 2) / ppm
+        center_y = wy + (py - self.canvas_h / 2) / ppm
+        self.set_view(zoom, center_x, center_y)
+
+    def on_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.zoom_at(event.x, event.y, ZOOM_STEP)
+        elif event.num == 5 or event.delta < 0:
+            self.zoom_at(event.x, event.y, 1 / ZOOM_STEP)
+
+    def on_pan_start(self, event):
+        self.hide_context_menu()
+        self.pan_data = {"x": event.x, "y": event.y, "moved": False}
+
+    def on_pan_drag(self, event):
+        if not self.pan_data: return
+        dx = event.x - self.pan_data["x"]
+        dy = event.y - self.pan_data["y"]
+        self.pan_data.update(x=event.x, y=event.y, moved=True)
+        self.set_view(self.zoom, self.view_cx - dx / self.ppm, self.view_cy + dy / self.ppm)
+
+    def on_pan_release(self, event):
+        # A middle click without a drag still opens the menu (Button-2 is the right button on macOS)
+        pan_data, self.pan_data = self.pan_data, None
+        if pan_data and not pan_data["moved"]:
+            self.on_canvas_right_click(event)
+
+    def visible_world_rect(self):
+        x1, y1 = self.pixel_to_world(0, self.canvas_h)
+        x2, y2 = self.pixel_to_world(self.canvas_w, 0)
+        return x1, y1, x2, y2
+
+    def update_culling(self, objs=None):
+        # Hide objects that left the window; resync and show the ones that came
+        # back. objs limits the pass to objects that moved under a still view.
+        x1, y1, x2, y2 = self.visible_world_rect()
+        if objs is None:
+            objs = self.objects
+            visible = set(self.spatial.query_rect(x1, y1, x2, y2))
+        else:
+            entries = self.spatial.entries
+            visible = set()
+            for obj in objs:
+                ox1, oy1, ox2, oy2 = entries[obj][0]
+                if ox1 <= x2 and ox2 >= x1 and oy1 <= y2 and oy2 >= y1: visible.add(obj)
+        for obj in objs:
+            if obj in visible:
+                if obj in self.culled:
+                    self.culled.discard(obj)
+                    obj.update_coords()
+                    obj.set_hidden(False)
+            elif obj not in self.culled:
+                self.culled.add(obj)
+                obj.set_hidden(True)
 
     def redraw_all(self):
         self.draw_environment()
-        for obj in self.objects:
-            obj.update_visuals()
-            self.canvas.tag_raise(obj.rect_id)
-            self.canvas.tag_raise(obj.text_id)
-            self.canvas.tag_raise(f"{obj.name}_handle")
+        self.update_culling()
+        self.sync_include_layer()
+        self.sync_coords([obj for obj in self.objects if obj not in self.culled])
         self.draw_links()
+        if self.playback: self.playback.draw_traces()
 
-    def draw_environment(self):
-        self.canvas.delete("background")
+    def sync_coords(self, objs):
+        # One vectorized world->pixel pass over the scene columns, then coords per item
+        if objs:
+            x1, y1, x2, y2 = self.scene.pixel_bounds(self.ppm, self.offset_x, self.offset_y, [o.row for o in objs])
+            coords = self.canvas.coords
+            for obj, a, b, c, d in zip(objs, x1, y1, x2, y2):
+                coords(obj.rect_id, a, b, c, d)
+                coords(obj.text_id, (a + c) / 2, (b + d) / 2)
+        self.handles.update()
 
+    def set_include_layer(self, parsed_objects, problems=()):
+        # Included geometry is drawn but never enters the scene or the spatial
+        # index, so it cannot be picked, edited or saved. It replaces the
+        # placeholder walls of draw_environment.
+        self.canvas.delete("include")
+        self.include_scene = SceneModel.from_parsed(parsed_objects)
+        self.include_items = []
+        x1, y1, x2, y2 = self.include_scene.pixel_bounds(self.ppm, self.offset_x, self.offset_y)
+        for row, a, b, c, d in zip(range(len(self.include_scene)), x1, y1, x2, y2):
+            name, color = self.include_scene.names[row], self.include_scene.colors[row]
+            if name == "floor":
+                fill = COLOR_FLOOR
+            else:
+                fill = color if color.startswith("#") else COLOR_WALL_BASE
+            self.include_items.append(self.canvas.create_rectangle(
+                a, b, c, d, fill=fill, outline=COLOR_INCLUDE_OUTLINE, tags="include"))
+        self.canvas.tag_lower("include")
+        self.draw_environment()
+        if problems:
+            messagebox.showwarning("Include", "\n".join(problems))
+
+    def sync_include_layer(self):
+        if not self.include_items: return
+        x1, y1, x2, y2 = self.include_scene.pixel_bounds(self.ppm, self.offset_x, self.offset_y)
+        for item, a, b, c, d in zip(self.include_items, x1, y1, x2, y2):
+            self.canvas.coords(item, a, b, c, d)
+
+    def environment_shapes(self):
         fw_px = self.world_w * self.ppm
         fh_px = self.world_h * self.ppm
 
@@ -142,83 +377,138 @@ class EditorApp:
         fx2 = fx1 + fw_px
         fy2 = fy1 + fh_px
 
-        self.canvas.create_rectangle(fx1, fy1, fx2, fy2, fill=COLOR_FLOOR, outline="black", tags="background")
+        wall = dict(fill=COLOR_WALL_BASE, outline="black")
+        grid = dict(fill="#888", width=1, dash=(2, 4))
+        shapes = [("rectangle", (fx1, fy1, fx2, fy2), dict(fill=COLOR_FLOOR, outline="black"))]
 
-        steps = int(self.world_w)
-        for i in range(steps + 1):
-            ratio = i / steps
-            x = fx1 + (ratio * fw_px)
-            self.canvas.create_line(x, fy1, x, fy2, fill="#888", width=1, dash=(2, 4), tags="background")
-        for i in range(steps + 1):
-            ratio = i / steps
-            y = fy1 + (ratio * fh_px)
-            self.canvas.create_line(fx1, y, fx2, y, fill="#888", width=1, dash=(2, 4), tags="background")
+        # Level of detail: halve or double the base spacing so lines stay GRID_MIN_PX..GRID_MAX_PX
+        # apart, and only emit the lines that cross the window.
+        step = self.world_w / max(1, int(self.world_w))
+        while step * self.ppm < GRID_MIN_PX: step *= 2
+        while step * self.ppm > GRID_MAX_PX: step /= 2
+        step_px = step * self.ppm
+        vx1, vy1 = max(fx1, 0), max(fy1, 0)
+        vx2, vy2 = min(fx2, self.canvas_w), min(fy2, self.canvas_h)
 
-        self.canvas.create_line(self.offset_x, fy1, self.offset_x, fy2, fill="#444", width=2, tags="background")
-        self.canvas.create_line(fx1, self.offset_y, fx2, self.offset_y, fill="#444", width=2, tags="background")
+        for i in range(max(0, math.ceil((vx1 - fx1) / step_px)), math.floor((vx2 - fx1) / step_px + 1e-9) + 1):
+            x = fx1 + i * step_px
+            shapes.append(("line", (x, vy1, x, vy2), grid))
+        for i in range(max(0, math.ceil((vy1 - fy1) / step_px)), math.floor((vy2 - fy1) / step_px + 1e-9) + 1):
+            y = fy1 + i * step_px
+            shapes.append(("line", (vx1, y, vx2, y), grid))
 
+        shapes.append(("line", (self.offset_x, fy1, self.offset_x, fy2), dict(fill="#444", width=2)))
+        shapes.append(("line", (fx1, self.offset_y, fx2, self.offset_y), dict(fill="#444", width=2)))
+
+        if self.include_items: return shapes
         wall_thick_px = 0.1 * self.ppm
-        self.canvas.create_rectangle(fx1 - wall_thick_px, fy1 - wall_thick_px, fx2 + wall_thick_px, fy1,
-                                     fill=COLOR_WALL_BASE, outline="black", tags="background")
-        self.canvas.create_rectangle(fx1 - wall_thick_px, fy2, fx2 + wall_thick_px, fy2 + wall_thick_px,
-                                     fill=COLOR_WALL_BASE, outline="black", tags="background")
-        self.canvas.create_rectangle(fx1 - wall_thick_px, fy1, fx1, fy2, fill=COLOR_WALL_BASE, outline="black",
-                                     tags="background")
-        self.canvas.create_rectangle(fx2, fy1, fx2 + wall_thick_px, fy2, fill=COLOR_WALL_BASE, outline="black",
-                                     tags="background")
+        shapes.append(("rectangle", (fx1 - wall_thick_px, fy1 - wall_thick_px, fx2 + wall_thick_px, fy1), wall))
+        shapes.append(("rectangle", (fx1 - wall_thick_px, fy2, fx2 + wall_thick_px, fy2 + wall_thick_px), wall))
+        shapes.append(("rectangle", (fx1 - wall_thick_px, fy1, fx1, fy2), wall))
+        shapes.append(("rectangle", (fx2, fy1, fx2 + wall_thick_px, fy2), wall))
+        return shapes
+
+    def draw_environment(self):
+        # The background is created once and afterwards only moved with coords
+        shapes = self.environment_shapes()
+        if len(shapes) == len(self.bg_items):
+            for item, (_, coords, _) in zip(self.bg_items, shapes):
+                self.canvas.coords(item, *coords)
+            return
+
+        self.canvas.delete("background")
+        self.bg_items = [getattr(self.canvas, "create_" + kind)(*coords, tags="background", **options)
+                         for kind, coords, options in shapes]
+        self.canvas.tag_lower("background")
+
+    def world_to_pixel(self, wx, wy):
+        return (wx * self.ppm) + self.offset_x, (-wy * self.ppm) + self.offset_y
+
+    def pixel_to_world(self, px, py):
+        return (px - self.offset_x) / self.ppm, -(py - self.offset_y) / self.ppm
 
     def track_mouse(self, event):
         self.mouse_x_px = event.x
         self.mouse_y_px = event.y
 
     def get_next_name(self, base_name):
-        existing_nums = []
-        for obj in self.objects:
-            if obj.name.startswith(base_name):
-                suffix = obj.name[len(base_name):]
-                if suffix.isdigit():
-                    existing_nums.append(int(suffix))
-                elif suffix.startswith("_") and suffix[1:].isdigit():
-                    existing_nums.append(int(suffix[1:]))
-        next_num = 1
-        if existing_nums: next_num = max(existing_nums) + 1
-        return f"{base_name}{next_num}"
+        return self.names.next_name(base_name)
 
     def get_random_color(self):
-        r = lambda: random.randint(50, 200)
-        return '#%02X%02X%02X' % (r(), r(), r())
+        return random_color()
 
-    def add_obj(self, base_name, w, h, otype, color, x=0, y=0, name_override=None, linked=None):
+    def add_obj(self, base_name, w, h, otype, color, x=0, y=0, name_override=None, linked=None, record=True):
         name = name_override if name_override else self.get_next_name(base_name)
-        obj = LevelObject(self.canvas, name, x, y, w, h, otype, color, self, linked_obj=linked)
+        obj = LevelObject(name, x, y, w, h, otype, color, self, linked_obj=linked)
         self.objects.append(obj)
+        self.spatial.insert(obj)
+        self.names.add(name)
         self.select_object(obj)
+        if record: self.history.record(AddOp([obj]))
+        self.note_change(obj)
         return obj
 
+    def add_parsed_objects(self, parsed_objects, link=True):
+        # Bulk import: build every model first, then draw them in one pass,
+        # with no per-object selection, link redraw or name allocation
+        rows = self.scene.extend(parsed_objects)
+        new_objs = [LevelObject.from_row(self, row) for row in rows]
+        self.objects.extend(new_objs)
+        for obj in new_objs:
+            self.spatial.insert(obj)
+            self.names.add(obj.name)
+        if link: self.link_goal_pairs(new_objs)
+        return new_objs
+
+    def link_goal_pairs(self, objs):
+        # Each goal takes the first free goal object of the same color, else the
+        # free obj<N> matching its goal<N> name
+        by_color = {}
+        by_name = {}
+        for o in objs:
+            if o.obj_type == "goal_object" and not o.linked_obj:
+                by_color.setdefault(o.color, deque()).append(o)
+                by_name[o.name] = o
+
+        for g in objs:
+            if g.obj_type != "goal_location" or g.linked_obj: continue
+            queue = by_color.get(g.color)
+            while queue and queue[0].linked_obj:
+                queue.popleft()
+            if queue:
+                o = queue.popleft()
+            else:
+                o = by_name.get("obj" + g.name[len("goal"):]) if g.name.startswith("goal") else None
+                if not o or o.linked_obj: continue
+            g.linked_obj = o
+            o.linked_obj = g
+
     def add_goal_pair(self):
-        base_id = 1
-        while True:
-            n1 = f"obj{base_id}"
-            n2 = f"goal{base_id}"
-            exists = any(o.name == n1 or o.name == n2 for o in self.objects)
-            if not exists: break
-            base_id += 1
+        base_id = self.names.next_pair_id()
 
         c = self.get_random_color()
-        obj = self.add_obj(f"obj{base_id}", 0.3, 0.3, "goal_object", c, x=-0.5, y=0, name_override=f"obj{base_id}")
+        obj = self.add_obj(f"obj{base_id}", 0.3, 0.3, "goal_object", c, x=-0.5, y=0, name_override=f"obj{base_id}",
+                           record=False)
         goal = self.add_obj(f"goal{base_id}", 0.3, 0.3, "goal_location", c, x=0.5, y=0, name_override=f"goal{base_id}",
-                            linked=obj)
+                            linked=obj, record=False)
         obj.linked_obj = goal
         self.select_object(obj)
+        self.history.record(AddOp([obj, goal]))
 
     def draw_links(self):
-        self.canvas.delete("link_line")
+        # One persistent line, moved with coords rather than deleted and recreated
         if self.selected_obj and self.selected_obj.linked_obj:
             o1 = self.selected_obj
             o2 = self.selected_obj.linked_obj
             x1, y1 = o1.world_to_pixel(o1.x, o1.y)
             x2, y2 = o2.world_to_pixel(o2.x, o2.y)
-            self.canvas.create_line(x1, y1, x2, y2, fill="black", dash=(4, 4), tags="link_line")
+            if self.link_line_id is None:
+                self.link_line_id = self.canvas.create_line(x1, y1, x2, y2, fill="black", dash=(4, 4), tags="link_line")
+            else:
+                self.canvas.coords(self.link_line_id, x1, y1, x2, y2)
+        elif self.link_line_id is not None:
+            self.canvas.delete(self.link_line_id)
+            self.link_line_id = None
 
     # --- MENU HELPERS ---
     def hide_context_menu(self):
@@ -228,66 +518,166 @@ class EditorApp:
             pass
 
     def select_object(self, obj):
+        self.select_objects([obj])
+
+    def select_objects(self, objs):
+        # The last object is the primary selection: it gets handles, links and the panel.
+        # Only objects entering or leaving the selection are restyled.
         self.hide_context_menu()  # FIX: Hide menu when selecting new obj
-        if self.selected_obj and self.selected_obj != obj:
-            self.selected_obj.deselect()
-        self.selected_obj = obj
-        self.selected_obj.select()
+        keep = set(objs)
+        old = set(self.selection)
+        for o in self.selection:
+            if o not in keep: o.deselect()
+        self.selection = list(objs)
+        self.selected_obj = self.selection[-1] if self.selection else None
+        for o in self.selection:
+            if o not in old: o.select(show_handles=False)
+        if self.selected_obj:
+            self.selected_obj.select(show_handles=True)
         self.draw_links()
         self.update_properties_panel()
 
+    def toggle_selected(self, obj):
+        if obj in self.selection:
+            remaining = [o for o in self.selection if o is not obj]
+            if remaining:
+                self.select_objects(remaining)
+            else:
+                self.clear_selection()
+        else:
+            self.select_objects(self.selection + [obj])
+
+    def clear_selection(self):
+        for o in self.selection: o.deselect()
+        self.selection = []
+        self.selected_obj = None
+        self.draw_links()
+        self.lbl_name.config(text="None")
+        self.lbl_dims.config(text="-")
+        self.lbl_pos.config(text="-")
+
     def show_context_menu(self, event):
         self.last_click_pos = (event.x, event.y)
         state_paste = "normal" if self.clipboard else "disabled"
         self.context_menu.entryconfig("Paste", state=state_paste)
         self.context_menu.post(event.x_root, event.y_root)
 
+    def pick_object(self, px, py):
+        # Topmost object under the pointer, else the nearest one within a few pixels
+        wx, wy = self.pixel_to_world(px, py)
+        hits = self.spatial.query_point(wx, wy)
+        if hits: return hits[-1]
+        return self.spatial.nearest(wx, wy, max_dist=PICK_TOLERANCE_PX / self.ppm)
+
     def on_canvas_right_click(self, event):
-        self.on_bg_click(event)
+        self.hide_context_menu()
+        obj = self.pick_object(event.x, event.y)
+        if obj:
+            if obj not in self.selection: self.select_object(obj)
+        else:
+            self.clear_selection()
         self.show_context_menu(event)
 
-    def on_bg_click(self, event):
+    def on_canvas_click(self, event):
         self.hide_context_menu()  # FIX: Hide menu when clicking bg
-        items = self.canvas.find_overlapping(event.x, event.y, event.x + 1, event.y + 1)
-        if items:
-            top_item = items[-1]
-            tags = self.canvas.gettags(top_item)
-            if "background" in tags:
-                if self.selected_obj:
-                    self.selected_obj.deselect()
-                    self.selected_obj = None
-                    self.canvas.delete("link_line")
-                    self.lbl_name.config(text="None")
-                    self.lbl_dims.config(text="-")
-                    self.lbl_pos.config(text="-")
+        if self.handles.loc_at(event.x, event.y):
+            self.begin_gesture([self.handles.target])
+            return  # resize handles carry their own bindings
+        obj = self.pick_object(event.x, event.y)
+        extend = event.state & SHIFT_MASK
+        if obj and extend:
+            self.toggle_selected(obj)
+        elif obj:
+            # Pressing on a member of the selection drags all of it
+            if obj not in self.selection:
+                self.select_object(obj)
+            elif obj is not self.selected_obj:
+                self.select_objects([o for o in self.selection if o is not obj] + [obj])
+            self.drag_target = obj
+            self.begin_gesture(list(self.selection))
+            obj.on_body_click(event)
+        else:
+            if not extend: self.clear_selection()
+            self.box_start = (event.x, event.y, extend)
+            self.canvas.create_rectangle(event.x, event.y, event.x, event.y, outline="black", dash=(3, 3),
+                                         tags="select_box")
+
+    def on_canvas_drag(self, event):
+        if self.drag_target:
+            self.drag_target.on_body_drag(event)
+        elif self.box_start:
+            self.canvas.coords("select_box", self.box_start[0], self.box_start[1], event.x, event.y)
+
+    def on_canvas_release(self, event):
+        target, self.drag_target = self.drag_target, None
+        if target:
+            if self.drag_data and self.drag_data["moved"]:
+                self.finish_group_move()
+            elif len(self.selection) > 1:
+                self.select_object(target)  # a click without a drag picks one
+        self.end_gesture()
+        if not self.box_start: return
+        x1, y1 = self.pixel_to_world(*self.box_start[:2])
+        x2, y2 = self.pixel_to_world(event.x, event.y)
+        extend = self.box_start[2]
+        self.box_start = None
+        self.canvas.delete("select_box")
+        hits = self.spatial.query_rect(x1, y1, x2, y2)
+        if extend:
+            chosen = set(self.selection)
+            hits = self.selection + [o for o in hits if o not in chosen]
+        if hits: self.select_objects(hits)
+
+    def move_selection_px(self, dx, dy):
+        # One bulk model update and one canvas.move for the whole selection
+        if not self.selection: return
+        self.scene.move([o.row for o in self.selection], dx / self.ppm, -dy / self.ppm)
+        self.canvas.move(SELECTION_TAG, dx, dy)
+        self.handles.update()
+
+    def finish_group_move(self):
+        # Indexes and change tracking catch up once, when the drag ends
+        self.renderer.flush_group()
+        for obj in self.selection:
+            self.spatial.update(obj)
+            self.renderer.mark(obj)  # re-culled at the next flush
+        self.renderer.mark_links()
+        self.renderer.mark_panel()
 
     def change_color(self):
         if not self.selected_obj: return
         color = colorchooser.askcolor(title="Choose color")[1]
         if color:
-            self.selected_obj.color = color
-            self.selected_obj.update_visuals()
-            if self.selected_obj.linked_obj:
-                self.selected_obj.linked_obj.color = color
-                self.selected_obj.linked_obj.update_visuals()
+            # Goal pairs keep sharing a color
+            objs = dict.fromkeys(self.selection)
+            for o in self.selection:
+                if o.linked_obj: objs[o.linked_obj] = None
+            objs = list(objs)
+            self.history.record(RecolorOp(objs, [o.color for o in objs], color))
+            self.set_colors(objs, [color] * len(objs))
 
     def rename_selection(self):
         if not self.selected_obj: return
         new_name = simpledialog.askstring("Rename", "Enter new name:", initialvalue=self.selected_obj.name)
         if new_name:
-            self.selected_obj.name = new_name
-            self.selected_obj.update_visuals()
-            self.update_properties_panel()
+            self.history.record(RenameOp(self.selected_obj, self.selected_obj.name, new_name))
+            self.set_name(self.selected_obj, new_name)
 
     def copy_selection(self):
+        # Offsets are kept relative to the primary selection, links by clipboard index
         if self.selected_obj:
-            self.clipboard = {
-                'w': self.selected_obj.width,
-                'h': self.selected_obj.height,
-                'type': self.selected_obj.obj_type,
-                'color': self.selected_obj.color,
-                'base_name': self.selected_obj.name.rstrip('0123456789').rstrip('_')
-            }
+            anchor = self.selected_obj
+            index = {o: i for i, o in enumerate(self.selection)}
+            self.clipboard = [{
+                'w': o.width,
+                'h': o.height,
+                'dx': o.x - anchor.x,
+                'dy': o.y - anchor.y,
+                'type': o.obj_type,
+                'color': o.color,
+                'base_name': o.name.rstrip('0123456789').rstrip('_'),
+                'link': index.get(o.linked_obj)
+            } for o in self.selection]
 
     def cut_selection(self):
         if self.selected_obj:
@@ -300,96 +690,464 @@ class EditorApp:
                 new_x = self.selected_obj.x + 0.2
                 new_y = self.selected_obj.y - 0.2
             elif self.mouse_x_px != 0:
-                wx = (self.mouse_x_px - self.offset_x) / self.ppm
-                wy = -(self.mouse_y_px - self.offset_y) / self.ppm
-                new_x, new_y = wx, wy
+                new_x, new_y = self.pixel_to_world(self.mouse_x_px, self.mouse_y_px)
             else:
                 new_x, new_y = 0.2, 0.2
 
-            self.add_obj(
-                self.clipboard['base_name'],
-                self.clipboard['w'],
-                self.clipboard['h'],
-                self.clipboard['type'],
-                self.clipboard['color'],
-                new_x, new_y
-            )
+            # Copied goal pairs get a fresh pair id and stay linked to each other
+            pair_ids = {}
+            new_objs = []
+            for i, item in enumerate(self.clipboard):
+                name = None
+                partner = item['link']
+                partner_type = self.clipboard[partner]['type'] if partner is not None else None
+                if {item['type'], partner_type} == {"goal_object", "goal_location"}:
+                    key = min(i, partner)
+                    if key not in pair_ids: pair_ids[key] = self.names.next_pair_id()
+                    name = f"{'obj' if item['type'] == 'goal_object' else 'goal'}{pair_ids[key]}"
+                new_objs.append(self.add_obj(
+                    item['base_name'],
+                    item['w'],
+                    item['h'],
+                    item['type'],
+                    item['color'],
+                    new_x + item['dx'], new_y + item['dy'],
+                    name_override=name, record=False
+                ))
+            for obj, item in zip(new_objs, self.clipboard):
+                if item['link'] is not None: obj.linked_obj = new_objs[item['link']]
+            self.select_objects(new_objs)
+            self.history.record(AddOp(new_objs))
 
     def nudge(self, dx, dy):
-        if self.selected_obj:
-            self.selected_obj.x += dx
-            self.selected_obj.y += dy
-            self.selected_obj.update_visuals()
-            self.update_properties_panel()
-            self.draw_links()
+        if self.selection:
+            objs = list(self.selection)
+            before = [geometry(o) for o in objs]
+            self.scene.move([obj.row for obj in objs], dx, dy)
+            for obj in objs:
+                self.spatial.update(obj)
+                self.renderer.mark(obj)
+            self.renderer.mark_panel()
+            self.renderer.mark_links()
+            # Arrow-key runs on the same selection fold into one undo step
+            self.history.record(GeometryOp(objs, before, [geometry(o) for o in objs]), merge_key="nudge")
 
-    def delete_selected(self):
-        if not self.selected_obj: return
-        target = self.selected_obj
-        partner = target.linked_obj
+    def align_selection(self, edge):
+        # Line the selection up on one edge or center line of its bounding box
+        objs = list(self.selection)
+        if len(objs) < 2: return
+        x1, y1, x2, y2 = self.scene.world_bounds([o.row for o in objs])
+        values = []
+        for o in objs:
+            x, y, w, h = geometry(o)
+            if edge == "left": x = x1 + w / 2
+            elif edge == "right": x = x2 - w / 2
+            elif edge == "center": x = (x1 + x2) / 2
+            elif edge == "top": y = y2 - h / 2
+            elif edge == "bottom": y = y1 + h / 2
+            elif edge == "middle": y = (y1 + y2) / 2
+            values.append((x, y, w, h))
+        self.set_selection_geometry(objs, values)
 
-        if target.obj_type == "goal_object":
-            if partner: self.delete_specific_object(partner)
-        elif target.obj_type == "goal_location":
-            if partner: partner.linked_obj = None
+    def distribute_selection(self, axis):
+        # Equal gaps between neighbours, the outermost objects stay in place
+        objs = list(self.selection)
+        if len(objs) < 3: return
+        i, size = (0, 2) if axis == "x" else (1, 3)
+        ordered = sorted(objs, key=lambda o: geometry(o)[i])
+        geos = {o: geometry(o) for o in objs}
+        first, last = geos[ordered[0]], geos[ordered[-1]]
+        start = first[i] - first[size] / 2
+        end = last[i] + last[size] / 2
+        gap = (end - start - sum(geos[o][size] for o in ordered)) / (len(ordered) - 1)
+        pos = start
+        for o in ordered:
+            g = list(geos[o])
+            g[i] = pos + g[size] / 2
+            pos += g[size] + gap
+            geos[o] = tuple(g)
+        self.set_selection_geometry(objs, [geos[o] for o in objs])
 
-        self.delete_specific_object(target)
-        self.selected_obj = None
-        self.canvas.delete("link_line")
-        self.lbl_name.config(text="None")
+    def set_selection_geometry(self, objs, values):
+        before = [geometry(o) for o in objs]
+        self.set_geometry(objs, values)
+        self.history.record(GeometryOp(objs, before, values))
+
+    def delete_selected(self):
+        if not self.selection: return
+        doomed = {}
+        for target in self.selection:
+            partner = target.linked_obj
+            if target.obj_type == "goal_object" and partner: doomed[partner] = None
+            doomed[target] = None
+        doomed = list(doomed)
+
+        unlinks = dangling_links(doomed)
+        self.clear_selection()
+        snapshots = self.delete_objects(doomed)
+        self.history.record(unlinks, DeleteOp(doomed, snapshots))
 
     def delete_specific_object(self, obj):
-        self.canvas.delete(obj.rect_id)
-        self.canvas.delete(obj.text_id)
-        for hid in obj.handles.values(): self.canvas.delete(hid)
-        if obj in self.objects: self.objects.remove(obj)
+        self.delete_objects([obj])
+
+    def delete_objects(self, objs):
+        # Drops the objects from scene, canvas and indexes in one batch and returns
+        # the snapshots restore_objects needs; the LevelObjects themselves are kept.
+        doomed = set(objs)
+        snapshots = [(o.name, o.x, o.y, o.width, o.height, o.obj_type, o.color, o.linked_obj) for o in objs]
+        if any(o in doomed for o in self.selection):
+            self.clear_selection()
+        items = []
+        for obj in doomed:
+            items.append(obj.rect_id)
+            items.append(obj.text_id)
+            obj.rect_id = obj.text_id = None
+            if self.handles.target is obj: self.handles.detach()
+            self.spatial.remove(obj)
+            self.names.remove(obj.name)
+            self.renderer.discard(obj)
+            self.culled.discard(obj)
+            self.track_document(obj)
+        if items: self.canvas.delete(*items)
+        self.validator.discard(doomed)
+        self.scene.remove([obj.row for obj in doomed])
+        self.objects = [o for o in self.objects if o not in doomed]
+        self.renderer.mark_links()
+        self.autosave.touch()
+        return snapshots
+
+    def restore_objects(self, objs, snapshots):
+        # Inverse of delete_objects: the same LevelObjects get fresh rows and items
+        rows = self.scene.extend({'full_name': s[0], 'x': s[1], 'y': s[2], 'w': s[3], 'h': s[4],
+                                  'type': s[5], 'color': s[6]} for s in snapshots)
+        for obj, row in zip(objs, rows):
+            obj.row = row
+            self.scene.owners[row] = obj
+            obj.draw()
+        for obj, s in zip(objs, snapshots):
+            partner = s[7]
+            obj.linked_obj = partner if partner is not None and partner.row is not None else None
+        self.objects.extend(objs)
+        for obj in objs:
+            self.spatial.insert(obj)
+            self.names.add(obj.name)
+            self.note_change(obj)
+        self.renderer.mark_links()
+
+    def note_change(self, obj=None):
+        # obj=None: objects were removed, which track_document has already seen
+        self.autosave.touch(obj)
+        if obj is not None:
+            self.track_document(obj)
+            self.validator.touch(obj)
+
+    def track_document(self, obj):
+        if self.document:
+            self.document.touch(obj)
+        elif self.loader:  # the document arrives when loading ends
+            self.load_touched[obj] = None
+
+    def set_geometry(self, objs, values):
+        for obj, (x, y, w, h) in zip(objs, values):
+            obj.x, obj.y, obj.width, obj.height = x, y, w, h
+            self.spatial.update(obj)
+            self.renderer.mark(obj)
+        self.renderer.mark_panel()
+        self.renderer.mark_links()
+
+    def set_name(self, obj, name):
+        self.names.rename(obj.name, name)
+        obj.name = name
+        self.renderer.mark(obj, DIRTY_STYLE)
+        self.renderer.mark_panel()
+
+    def set_colors(self, objs, colors):
+        for obj, color in zip(objs, colors):
+            obj.color = color
+            self.renderer.mark(obj, DIRTY_STYLE)
+
+    # --- HISTORY ---
+    def begin_gesture(self, objs):
+        self.gesture = (objs, [geometry(o) for o in objs])
+
+    def end_gesture(self):
+        # A whole drag or handle resize becomes one undo step
+        if not self.gesture: return
+        objs, before = self.gesture
+        self.gesture = None
+        if any(o.row is None for o in objs): return
+        after = [geometry(o) for o in objs]
+        if after != before:
+            self.history.record(GeometryOp(objs, before, after))
+
+    def undo(self):
+        self.end_gesture()
+        if self.history.undo(): self.after_history_change()
+
+    def redo(self):
+        self.end_gesture()
+        if self.history.redo(): self.after_history_change()
+
+    def after_history_change(self):
+        # delete_objects already dropped removed objects from the selection
+        self.history.break_merge()
+        self.renderer.mark_panel()
 
     def update_properties_panel(self):
         if self.selected_obj:
             o = self.selected_obj
-            self.lbl_name.config(text=o.name)
+            extra = len(self.selection) - 1
+            self.lbl_name.config(text=f"{o.name} (+{extra})" if extra > 0 else o.name)
             self.lbl_dims.config(text=f"W: {round(o.width, 2)}\nH: {round(o.height, 2)}")
             self.lbl_pos.config(text=f"X: {round(o.x, 2)}\nY: {round(o.y, 2)}")
+        problems = self.validator.issues_for(self.selected_obj) if self.selected_obj else []
+        total = len(self.validator.flagged)
+        lines = [f"{total} objects with problems"] if total else []
+        self.lbl_issues.config(text="\n".join(lines + problems))
 
     def new_file(self):
+        self.cancel_load()
+        self.stop_watching()
+        self.close_playback()
+        self.renderer.cancel()
         self.canvas.delete("all")
+        self.handles.reset()
+        self.link_line_id = None
+        self.bg_items = []
+        self.include_scene.clear()
+        self.include_items = []
+        self.culled.clear()
         self.objects = []
         self.selected_obj = None
+        self.selection = []
+        self.scene.clear()
+        self.spatial.clear()
+        self.names.clear()
+        self.history.clear()
+        self.gesture = None
+        self.autosave.reset()
+        self.validator.reset()
+        self.file_path = None
+        self.document = None
+        self.load_touched = {}
         self.draw_environment()
         self.lbl_name.config(text="None")
         self.root.title("RAI Config Editor - Untitled")
 
     def save_file(self):
-        content = generate_g_string(self.objects, self.base_file)
+        self.close_playback()  # never save borrowed poses
         file_path = filedialog.asksaveasfilename(defaultextension=".g", filetypes=[("RAI Config", "*.g")])
         if file_path:
-            with open(file_path, "w") as f:
-                f.write(content)
-            self.root.title(f"RAI Config Editor - {os.path.basename(file_path)}")
+            self.autosave.save(file_path, lambda error: self.on_saved(file_path, error))
+
+    def on_saved(self, file_path, error):
+        if error:
+            messagebox.showerror("Save failed", f"{os.path.basename(file_path)}: {error}")
+            return
+        self.file_path = file_path
+        self.root.title(f"RAI Config Editor - {os.path.basename(file_path)}")
+        if self.watcher and self.watcher.path == file_path:
+            self.watcher.resync()
+        else:
+            self.watch_open_file()
 
     def load_file(self):
         file_path = filedialog.askopenfilename(filetypes=[("RAI Config", "*.g")])
-        if not file_path: return
+        if file_path: self.open_path(file_path)
+
+    def open_path(self, file_path, title=None, include_root=None):
         self.new_file()
-        self.root.title(f"RAI Config Editor - {os.path.basename(file_path)}")
+        self.root.title(f"RAI Config Editor - {title or os.path.basename(file_path)}")
+        self.file_path = file_path
+
+        # Includes are relative to the file they were written in
+        self.loader = BackgroundLoader(self, file_path, self.on_load_finished,
+                                       file_path if include_root is None else include_root)
+        self.show_load_progress(0, 0.0)
+        self.loader.start()
+
+    def offer_recovery(self):
+        # A recovery file only survives a session that did not exit cleanly
+        info = self.autosave.recovery_info()
+        if not info: return
+        name = os.path.basename(info.get("path") or "") or "Untitled"
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(info["saved_at"]))
+        if not messagebox.askyesno("Recover", f"Recover unsaved changes to {name} from {when}?"):
+            self.autosave.discard()
+            return
+        # Move it aside: opening resets the autosave, which deletes the recovery file.
+        # Once loaded, the recovered objects are autosaved again.
+        recovered = self.autosave.recovery_path + ".open"
+        os.replace(self.autosave.recovery_path, recovered)
+        self.open_path(recovered, title=f"{name} (recovered)", include_root=info.get("path") or "")
+        self.file_path = info.get("path")
+        self.recovered_path = recovered
+
+    def on_close(self):
+        self.cancel_load()
+        self.stop_watching()
+        self.autosave.discard()
+        self.autosave.close()
+        self.root.destroy()
+
+    def cancel_load(self):
+        if self.loader: self.loader.cancel()
+
+    def show_load_progress(self, count, fraction):
+        if not self.load_frame.winfo_ismapped():
+            self.load_frame.pack(side=tk.RIGHT, padx=5)
+        self.load_bar["value"] = fraction
+        self.lbl_load.config(text=f"Loading... {count} objects")
+
+    def on_load_finished(self, loaded, cancelled, error):
+        path = self.loader.path
+        self.loader = None
+        self.load_frame.pack_forget()
+        if error:
+            messagebox.showerror("Load failed", f"{os.path.basename(path)}: {error}")
+        if cancelled or error:
+            # Only part of the file is in the scene, so saving writes it from scratch
+            self.document = None
+            self.root.title(f"RAI Config Editor - {os.path.basename(path)} (partial)")
+        else:
+            if self.document:
+                self.document.bind(loaded)
+                for obj in self.load_touched:
+                    self.document.touch(obj)
+            if loaded and not self.selection:
+                self.select_object(loaded[-1])
+            # A recovered file was loaded from its copy, not from file_path
+            self.watch_open_file(self.document if path == self.file_path else None)
+        self.load_touched = {}
+        self.validator.revalidate()
+        if self.recovered_path:
+            recovered, self.recovered_path = self.recovered_path, None
+            if cancelled or error:
+                # Only part of the crash copy got in: it stays the one complete copy
+                messagebox.showwarning("Recover", f"The recovered file was not fully loaded. It is kept at\n{recovered}")
+            else:
+                os.remove(recovered)
+                self.autosave.touch()
+
+    # --- WATCH MODE ---
+    def watch_open_file(self, document=None):
+        # document: the GDocument just loaded from file_path, the watcher's baseline
+        self.stop_watching()
+        if self.watch_var.get() and self.file_path and os.path.isfile(self.file_path):
+            self.watcher = FileWatcher(self, self.file_path, self.on_file_changed, document=document)
+            self.watcher.start()
+
+    def stop_watching(self):
+        if self.watcher:
+            self.watcher.stop()
+            self.watcher = None
+
+    def on_file_changed(self, document, added, removed, changed):
+        # Another program rewrote the open file. Its delta is matched to the
+        # scene by name and patched in: only those objects are touched, the
+        # selection and view stay, and local edits to other objects survive.
+        # The whole reload is one undo step.
+        self.end_gesture()
+        by_name = dict(zip(self.scene.names, self.scene.owners))
+        doomed = {by_name[name]: None for name in removed if name in by_name}
+        fresh, moved, before, after, recolored = [], [], [], [], {}
+        for rec in added + changed:
+            obj = by_name.get(rec['full_name'])
+            if obj is None or obj.obj_type != rec['type']:
+                if obj is not None: doomed[obj] = None
+                fresh.append(rec)
+                continue
+            old, new = geometry(obj), (rec['x'], rec['y'], rec['w'], rec['h'])
+            if any(abs(a - b) > WATCH_TOLERANCE for a, b in zip(old, new)):
+                moved.append(obj)
+                before.append(old)
+                after.append(new)
+            if obj.color != rec['color']:
+                recolored.setdefault(rec['color'], []).append(obj)
+
+        doomed = list(doomed)
+        gone = set(doomed)
+        unlinks = dangling_links(doomed)
+        keep = [o for o in self.selection if o not in gone]
+        snapshots = self.delete_objects(doomed) if doomed else []
+        if keep != self.selection: self.select_objects(keep)
+
+        new_objs = self.add_parsed_objects(fresh, link=False)
+        if any(rec['type'] in GOAL_TYPES for rec in fresh):
+            self.link_goal_pairs([o for o, t in zip(self.scene.owners, self.scene.types) if t in GOAL_TYPES])
+        self.set_geometry(moved, after)
+        recolor_ops = []
+        for color, objs in recolored.items():
+            recolor_ops.append(RecolorOp(objs, [o.color for o in objs], color))
+            self.set_colors(objs, [color] * len(objs))
+        for obj in new_objs + moved + [o for objs in recolored.values() for o in objs]:
+            self.note_change(obj)
+
+        self.history.record(unlinks, DeleteOp(doomed, snapshots), AddOp(new_objs),
+                            GeometryOp(moved, before, after), *recolor_ops)
+        self.history.break_merge()
+
+        # Later saves splice into the new bytes; objects edited here and not
+        # yet saved are re-applied on top, ones deleted here drop their node
+        if self.document is not None:
+            local = list(self.document.edited) + list(self.document.added)
+            document.bind(self.scene.owners, self.scene.names)
+            for obj in local:
+                if obj.row is not None: document.touch(obj)
+            self.document = document
+        self.renderer.mark_links()
+        self.renderer.mark_panel()
+
+    # --- TRAJECTORY PLAYBACK ---
+    def load_trajectory(self):
+        file_path = filedialog.askopenfilename(filetypes=[("Trajectory log", "*.traj"), ("All files", "*")])
+        if file_path: self.open_trajectory(file_path)
+
+    def open_trajectory(self, file_path):
+        self.close_playback()
+        try:
+            log = TrajectoryLog(file_path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Playback", f"{os.path.basename(file_path)}: {e}")
+            return
+        self.end_gesture()
+        self.playback = Playback(self, log)
+        t0, t1 = self.playback.t0, self.playback.t1
+        self.playback_scale.config(from_=t0, to=t1, resolution=(t1 - t0) / 1000 or 1)
+        self.playback_frame.pack(fill=tk.X)
+        self.playback.draw_traces()
+        self.playback.seek(t0)
+        self.show_playback_time(self.playback.time)
+
+    def close_playback(self):
+        if not self.playback: return
+        self.playback.close()
+        self.playback = None
+        self.playback_frame.pack_forget()
+
+    def toggle_playback(self):
+        if not self.playback: return
+        if self.playback.playing:
+            self.playback.pause()
+        else:
+            self.playback.play()
+        self.btn_play.config(text="Pause" if self.playback.playing else "Play")
+
+    def change_playback_speed(self, step):
+        if not self.playback: return
+        speeds = PLAYBACK_SPEEDS
+        i = min(range(len(speeds)), key=lambda k: abs(speeds[k] - self.playback.speed))
+        self.playback.set_speed(speeds[min(max(i + step, 0), len(speeds) - 1)])
+        self.show_playback_time(self.playback.time)
+
+    def on_scrub(self, value):
+        # The scale also reports the positions playback sets; only real drags seek
+        if not self.playback: return
+        if abs(float(value) - self.playback.time) > float(self.playback_scale.cget("resolution")):
+            self.playback.seek(float(value))
 
-        with open(file_path, "r") as f:
-            content = f.read()
-
-        objs, base_file = parse_g_file(content)
-        self.base_file = base_file
-
-        loaded_objects = []
-        for data in objs:
-            new_obj = self.add_obj(data['name'], data['w'], data['h'], data['type'], data['color'], data['x'],
-                                   data['y'], name_override=data['full_name'])
-            loaded_objects.append(new_obj)
-
-        goals = [o for o in loaded_objects if o.obj_type == "goal_location"]
-        objs_g = [o for o in loaded_objects if o.obj_type == "goal_object"]
-        for g in goals:
-            for o in objs_g:
-                if g.color == o.color and not g.linked_obj and not o.linked_obj:
-                    g.linked_obj = o
-                    o.linked_obj = g
-                    break
\ No newline at end of file
+    def show_playback_time(self, t):
+        p = self.playback
+        self.playback_scale.set(t)
+        self.lbl_playback.config(text=f"{t - p.t0:.2f} / {p.t1 - p.t0:.2f} s   x{p.speed:g}")
+        if not p.playing: self.btn_play.config(text="Play")
@@ -0,0 +1,195 @@
+from collections import deque
+
+from .constants import HISTORY_DEPTH, HISTORY_LIMIT
+
+
+def geometry(obj):
+    return obj.x, obj.y, obj.width, obj.height
+
+
+def dangling_links(doomed):
+    # LinkOp clearing the links survivors hold into doomed (a goal object whose
+    # goal location goes): the scene drops them on delete, the journal restores them
+    gone = set(doomed)
+    changes = []
+    for obj in doomed:
+        partner = obj.linked_obj
+        if partner is not None and partner not in gone and partner.linked_obj is obj:
+            changes.append((partner, obj, None))
+    return LinkOp(changes)
+
+
+# --- OPERATIONS ---
+# Each operation stores just enough to invert itself. Objects are referenced by
+# their LevelObject, which survives deletion (its row is dropped, the view is
+# kept), so later entries stay valid when an earlier delete is undone.
+
+class GeometryOp:
+    # Move or resize: (x, y, w, h) per object before and after
+    def __init__(self, objs, before, after):
+        self.objs = objs
+        self.before = before
+        self.after = after
+
+    @property
+    def size(self):
+        return len(self.objs)
+
+    def undo(self, app):
+        app.set_geometry(self.objs, self.before)
+
+    def redo(self, app):
+        app.set_geometry(self.objs, self.after)
+
+    def merge(self, other):
+        # A later step of the same gesture: keep our before, take its after
+        if not isinstance(other, GeometryOp) or other.objs != self.objs: return False
+        self.after = other.after
+        return True
+
+
+class AddOp:
+    def __init__(self, objs):
+        self.objs = objs
+        self.snapshots = None  # filled when undo takes the objects out
+
+    @property
+    def size(self):
+        return len(self.objs)
+
+    def undo(self, app):
+        self.snapshots = app.delete_objects(self.objs)
+
+    def redo(self, app):
+        app.restore_objects(self.objs, self.snapshots)
+
+
+class DeleteOp(AddOp):
+    def __init__(self, objs, snapshots):
+        super().__init__(objs)
+        self.snapshots = snapshots
+
+    def undo(self, app):
+        AddOp.redo(self, app)
+
+    def redo(self, app):
+        AddOp.undo(self, app)
+
+
+class RenameOp:
+    size = 1
+
+    def __init__(self, obj, old, new):
+        self.obj = obj
+        self.old = old
+        self.new = new
+
+    def undo(self, app):
+        app.set_name(self.obj, self.old)
+
+    def redo(self, app):
+        app.set_name(self.obj, self.new)
+
+
+class RecolorOp:
+    def __init__(self, objs, old, new):
+        self.objs = objs
+        self.old = old  # one color per object
+        self.new = new
+
+    @property
+    def size(self):
+        return len(self.objs)
+
+    def undo(self, app):
+        app.set_colors(self.objs, self.old)
+
+    def redo(self, app):
+        app.set_colors(self.objs, [self.new] * len(self.objs))
+
+
+class LinkOp:
+    # (obj, old partner, new partner) per changed link
+    def __init__(self, changes):
+        self.changes = changes
+
+    @property
+    def size(self):
+        return len(self.changes)
+
+    def undo(self, app):
+        for obj, old, _ in self.changes:
+            obj.linked_obj = old
+        app.renderer.mark_links()
+
+    def redo(self, app):
+        for obj, _, new in self.changes:
+            obj.linked_obj = new
+        app.renderer.mark_links()
+
+
+class Entry:
+    __slots__ = ("ops", "merge_key", "size")
+
+    def __init__(self, ops, merge_key):
+        self.ops = ops
+        self.merge_key = merge_key
+        self.size = sum(op.size for op in ops)
+
+
+class History:
+    # Undo/redo journal of inverse operations. One user action is one entry
+    # (possibly several ops, undone in reverse). Entries recorded with the same
+    # merge_key back to back fold into one, so a drag or a run of nudges is a
+    # single undo step. Memory is bounded by the number of object records kept
+    # across all entries (limit) and by the number of entries (depth).
+
+    def __init__(self, app, limit=HISTORY_LIMIT, depth=HISTORY_DEPTH):
+        self.app = app
+        self.limit = limit
+        self.depth = depth
+        self.undo_stack = deque()
+        self.redo_stack = []
+        self.size = 0
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack = []
+        self.size = 0
+
+    def record(self, *ops, merge_key=None):
+        ops = [op for op in ops if op.size]
+        if not ops: return
+        self.redo_stack = []
+        top = self.undo_stack[-1] if self.undo_stack else None
+        if (merge_key is not None and top is not None and top.merge_key == merge_key
+                and len(ops) == len(top.ops) == 1 and top.ops[0].merge(ops[0])):
+            return
+        entry = Entry(ops, merge_key)
+        self.undo_stack.append(entry)
+        self.size += entry.size
+        # Always keep the newest entry, even if it alone exceeds the limit
+        while len(self.undo_stack) > 1 and (self.size > self.limit or len(self.undo_stack) > self.depth):
+            self.size -= self.undo_stack.popleft().size
+
+    def break_merge(self):
+        # The next record starts a new entry even if its merge_key matches
+        if self.undo_stack: self.undo_stack[-1].merge_key = None
+
+    def undo(self):
+        if not self.undo_stack: return False
+        entry = self.undo_stack.pop()
+        self.size -= entry.size
+        for op in reversed(entry.ops):
+            op.undo(self.app)
+        self.redo_stack.append(entry)
+        return True
+
+    def redo(self):
+        if not self.redo_stack: return False
+        entry = self.redo_stack.pop()
+        for op in entry.ops:
+            op.redo(self.app)
+        self.undo_stack.append(entry)
+        self.size += entry.size
+        return True
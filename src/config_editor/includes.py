@@ -0,0 +1,89 @@
+import os
+import threading
+from collections import OrderedDict
+
+from .constants import INCLUDE_CACHE_SIZE
+from .io_utils import build_object, scan_nodes
+
+
+def include_path(spec, base_dir):
+    # "<../base-walls-min.g>" relative to the including file's directory
+    return os.path.normpath(os.path.join(base_dir, spec.strip().strip("<>")))
+
+
+def parse_include(path):
+    # Every shape in the file, walls and floor included, plus its own includes.
+    # Read as UTF-8 like the level itself; stray bytes only garble a name.
+    with open(path, encoding="utf-8", errors="replace") as f:
+        content = f.read()
+    objs, includes = [], []
+    for name, props, _ in scan_nodes(content):
+        if name is None:
+            includes.append(props)
+            continue
+        obj = build_object(name, props, skipped=())
+        if obj: objs.append(obj)
+    return objs, includes
+
+
+class IncludeCache:
+    # LRU of parsed include files keyed by (path, mtime, size): a base file
+    # shared by many levels is parsed once, and re-parsed only after it changes.
+
+    def __init__(self, maxsize=INCLUDE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        st = os.stat(path)
+        key = (os.path.realpath(path), st.st_mtime_ns, st.st_size)
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+        result = parse_include(path)
+        with self._lock:
+            self.misses += 1
+            self.entries[key] = result
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+
+INCLUDE_CACHE = IncludeCache()
+
+
+def resolve_includes(specs, path, cache=INCLUDE_CACHE, _stack=None):
+    # Objects of every file reachable through specs, included before including
+    # (the order they should be drawn in), and a list of problems: missing
+    # files, and includes that would close a cycle, are skipped and reported.
+    stack = _stack or [os.path.realpath(path)]
+    base_dir = os.path.dirname(path)
+    objs, problems = [], []
+    for spec in specs:
+        target = include_path(spec, base_dir)
+        real = os.path.realpath(target)
+        if real in stack:
+            chain = " -> ".join(os.path.basename(p) for p in stack[stack.index(real):] + [real])
+            problems.append(f"{spec}: include cycle {chain}")
+            continue
+        try:
+            sub_objs, sub_specs = cache.get(target)
+        except OSError as e:
+            problems.append(f"{spec}: {e.strerror or e}")
+            continue
+        stack.append(real)
+        nested, nested_problems = resolve_includes(sub_specs, target, cache, stack)
+        stack.pop()
+        objs.extend(nested)
+        objs.extend(sub_objs)
+        problems.extend(nested_problems)
+    return objs, problems
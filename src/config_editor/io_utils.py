@@ -1,5 +1,37 @@
+import io
+import math
+import mmap
+import os
+import random
 import re
-from .constants import DEFAULT_BASE_FILE
+
+from .constants import AGENT_LIMITS, DEFAULT_BASE_FILE
+from .scene import SceneModel
+
+NUMBER_RE = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+# Master pattern: each match consumes a whole node (two levels of braces, which
+# covers logical:{...}), so the file is walked once without per-char Python loops.
+NODE_RE = re.compile(r'''
+    (?P<name>\w+)\s*\([^)]+\)\s*\{(?P<body>[^{}]*(?:\{[^{}]*\}[^{}]*)*)\}
+  | (?P<deep>\w+)\s*\([^)]+\)\s*\{
+  | Include:\s*(?P<include><[^>]+>)
+''', re.VERBOSE)
+VALUE_RE = re.compile(r'(Q|size|color)\s*[:=]\s*(?:\[([^\]]*)\]|"?t\(([^)]*)\))')
+BRACE_RE = re.compile(r'(\{)|\}')
+INCLUDE_RE = re.compile(r'Include:\s*(<[^>]+>)')
+
+# Same patterns for scanning memory-mapped files in place. In bytes patterns \w
+# is ASCII only, so names also take every non-ASCII byte; decode_name then
+# trims the decoded name to the \w run the str pattern would have matched.
+NODE_RE_BYTES = re.compile(NODE_RE.pattern.replace(r'\w+', r'[\w\x80-\xff]+').encode(), re.VERBOSE)
+WORD_TAIL_RE = re.compile(r'\w+$')
+BRACE_RE_BYTES = re.compile(BRACE_RE.pattern.encode())
+INCLUDE_RE_BYTES = re.compile(INCLUDE_RE.pattern.encode())
+
+WRITE_BATCH_SIZE = 1024
+
+SKIPPED_NODES = {"floor", "wall_north", "wall_south", "wall_east", "wall_west"}
 
 
 def rgb_to_str(hex_color):
@@ -25,126 +57,251 @@ def parse_color(c_str):
         return "gray"
 
 
+def random_color(rng=random):
+    # Mid-range RGB, so labels stay readable on it
+    r = lambda: rng.randint(50, 200)
+    return '#%02X%02X%02X' % (r(), r(), r())
+
+
+def parse_floats(text):
+    # float() on whitespace tokens is the fast path, but it also takes inf, nan
+    # and 1_000, which NUMBER_RE does not: anything else goes through the regex,
+    # and values that overflow to inf (1e999) are dropped
+    try:
+        nums = [float(n) for n in text.replace(',', ' ').split()]
+        if "_" not in text and all(map(math.isfinite, nums)): return nums
+    except ValueError:
+        pass
+    return [v for v in map(float, NUMBER_RE.findall(text)) if math.isfinite(v)]
+
+
 def extract_floats(text_block, key):
     # Matches key:[ ... ] or key:"t(...)" robustly across lines
     match = re.search(key + r'\s*[:=]\s*\[(.*?)\]', text_block, re.DOTALL)
     if match:
         inner = match.group(1)
-        nums = re.findall(r'-?\d*\.?\d+', inner)
-        return [float(n) for n in nums]
+        return parse_floats(inner)
 
     if key == "Q":
         match = re.search(r'Q\s*[:=]\s*"?t\((.*?)\)', text_block, re.DOTALL)
         if match:
-            nums = re.findall(r'-?\d*\.?\d+', match.group(1))
-            return [float(n) for n in nums]
+            return parse_floats(match.group(1))
 
     return []
 
 
-def generate_g_string(objects, base_file=DEFAULT_BASE_FILE):
-    output = f"Include: {base_file}\n\n"
+def format_g_object(obj):
+    x, y = round(obj.x, 3), round(obj.y, 3)
+    w, h = round(obj.width, 3), round(obj.height, 3)
+    c_str = rgb_to_str(obj.color)
 
+    if obj.obj_type == "wall":
+        return f'{obj.name} (world){{ shape:ssBox, Q:"t({x} {y} 0.3)", size:[{w} {h} 0.6 .02], color:[0.69 0.51 0.45], contact: 1 }}\n\n'
+    elif obj.obj_type == "movable":
+        return f'{obj.name}Joint(world){{ Q:[0.0 0.0 0.1] }}\n{obj.name}({obj.name}Joint) {{ shape:ssBox, Q:"t({x} {y} .0)", size:[{w} {h} .2 .02], logical:{{ movable_o }}, color:[{c_str}], joint:rigid, contact: 1 }}\n\n'
+    elif obj.obj_type == "goal_object":
+        return f'{obj.name}Joint(world){{ Q:[0.0 0.0 0.1] }}\n{obj.name}({obj.name}Joint) {{ shape:ssBox, Q:"t({x} {y} .0)", size:[{w} {h} .2 .02], logical:{{ movable_go }}, color:[{c_str}], joint:rigid, contact: 1 }}\n\n'
+    elif obj.obj_type == "goal_location":
+        return f'{obj.name} (floor){{ shape:ssBox, Q:"t({x} {y} .1)", size:[{w} {h} .2 .02], color:[{c_str} .3], contact:0, joint:rigid, logical:{{goal}} }}\n\n'
+    elif obj.obj_type == "agent":
+        rad = round(w / 2, 3)
+        limits = " ".join(str(v) for v in AGENT_LIMITS)
+        # FIX: Write position to the BODY (ego), not the JOINT (egoJoint)
+        # egoJoint stays at origin. ego moves relative to it.
+        return f'egoJoint(world){{ Q:[0 0 0.1] }}\nego(egoJoint) {{\n    shape:ssCylinder, Q:[{x} {y} 0], size:[{rad} {rad} .02], color:[0.96 0.74 0.30], logical:{{agent}}, limits: [{limits}],\n    joint:transXY, contact: 1\n}}\n\n'
+    return "\n"
+
+
+def write_g_file(stream, objects, base_file=DEFAULT_BASE_FILE, batch_size=WRITE_BATCH_SIZE):
+    # Fragments go out in fixed-size batches, so memory does not grow with the scene
+    stream.write(f"Include: {base_file}\n\n")
+    batch = []
     for obj in objects:
-        x, y = round(obj.x, 3), round(obj.y, 3)
-        w, h = round(obj.width, 3), round(obj.height, 3)
-        c_str = rgb_to_str(obj.color)
+        batch.append(format_g_object(obj))
+        if len(batch) >= batch_size:
+            stream.writelines(batch)
+            batch.clear()
+    stream.writelines(batch)
+
 
-        if obj.obj_type == "wall":
-            output += f'{obj.name} (world){{ shape:ssBox, Q:"t({x} {y} 0.3)", size:[{w} {h} 0.6 .02], color:[0.69 0.51 0.45], contact: 1 }}\n'
-        elif obj.obj_type == "movable":
-            output += f'{obj.name}Joint(world){{ Q:[0.0 0.0 0.1] }}\n{obj.name}({obj.name}Joint) {{ shape:ssBox, Q:"t({x} {y} .0)", size:[{w} {h} .2 .02], logical:{{ movable_o }}, color:[{c_str}], joint:rigid, contact: 1 }}\n'
-        elif obj.obj_type == "goal_object":
-            output += f'{obj.name}Joint(world){{ Q:[0.0 0.0 0.1] }}\n{obj.name}({obj.name}Joint) {{ shape:ssBox, Q:"t({x} {y} .0)", size:[{w} {h} .2 .02], logical:{{ movable_go }}, color:[{c_str}], joint:rigid, contact: 1 }}\n'
-        elif obj.obj_type == "goal_location":
-            output += f'{obj.name} (floor){{ shape:ssBox, Q:"t({x} {y} .1)", size:[{w} {h} .2 .02], color:[{c_str} .3], contact:0, joint:rigid, logical:{{goal}} }}\n'
-        elif obj.obj_type == "agent":
-            rad = round(w / 2, 3)
-            # FIX: Write position to the BODY (ego), not the JOINT (egoJoint)
-            # egoJoint stays at origin. ego moves relative to it.
-            output += f'egoJoint(world){{ Q:[0 0 0.1] }}\nego(egoJoint) {{\n    shape:ssCylinder, Q:[{x} {y} 0], size:[{rad} {rad} .02], color:[0.96 0.74 0.30], logical:{{agent}}, limits: [-4 4 -4 4],\n    joint:transXY, contact: 1\n}}\n'
+def write_atomic(path, write, mode="w"):
+    # write(stream) fills a temp file next to path, which then replaces path in
+    # one step, so readers and crashes never see a half-written file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, mode) as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
 
-        output += "\n"
 
-    return output
+def generate_g_string(objects, base_file=DEFAULT_BASE_FILE):
+    # One join over the fragments, no StringIO buffer copied out by getvalue
+    fragments = [f"Include: {base_file}\n\n"]
+    fragments.extend(map(format_g_object, objects))
+    return "".join(fragments)
 
 
-def parse_g_file(content):
+def build_object(name, props, skipped=SKIPPED_NODES):
+    if name in skipped: return None
+    if "shape" not in props and "type" not in props: return None
+    if "camera" in props or "_vis" in name: return None
+
+    # First Q:[..] wins over Q:"t(..)", first size/color wins, as before
+    q_list = q_t = s_list = c_list = None
+    for key, inner, t_inner in VALUE_RE.findall(props):
+        if key == "Q":
+            if t_inner and q_t is None: q_t = t_inner
+            elif not t_inner and q_list is None: q_list = inner
+        elif t_inner:
+            continue
+        elif key == "size":
+            if s_list is None: s_list = inner
+        elif c_list is None:
+            c_list = inner
+
+    x, y = 0.0, 0.0
+    w, h = 0.1, 0.1
+
+    q_nums = parse_floats(q_list if q_list is not None else q_t or "")
+    if len(q_nums) >= 2:
+        x, y = q_nums[0], q_nums[1]
+
+    s_nums = parse_floats(s_list or "")
+    if len(s_nums) >= 2:
+        w, h = s_nums[0], s_nums[1]
+
+    otype = "wall"
+    color = "brown"
+
+    if "agent" in props:
+        otype = "agent"
+        color = "yellow"
+        w = w * 2
+        h = h * 2
+    elif "movable_go" in props:
+        otype = "goal_object"
+        color = parse_color(c_list) if c_list else "blue"
+    elif "movable_o" in props:
+        otype = "movable"
+        color = parse_color(c_list) if c_list else "#ffffff"
+    elif "goal" in props and "contact:0" in props:
+        otype = "goal_location"
+        color = parse_color(c_list) if c_list else "red"
+
+    return {
+        'name': name.split('_')[0], 'full_name': name,
+        'w': w, 'h': h, 'x': x, 'y': y,
+        'type': otype, 'color': color
+    }
+
+
+def as_records(parsed_objects):
+    # Attribute view of parsed dicts, in the shape format_g_object expects
+    return SceneModel.from_parsed(parsed_objects).records()
+
+
+def load_scene(content):
+    objs, base_file = parse_g_file(content)
+    return SceneModel.from_parsed(objs), base_file
+
+
+def find_block_end(content, start, brace_re=BRACE_RE):
+    # Fallback for nodes nested deeper than NODE_RE handles
+    depth = 1
+    for m in brace_re.finditer(content, start):
+        depth += 1 if m.group(1) else -1
+        if depth == 0:
+            return m.start()
+    return len(content)
+
+
+def decode_name(raw):
+    # Node name bytes from NODE_RE_BYTES -> str, None when no word is left
+    match = WORD_TAIL_RE.search(raw.decode("utf-8", "replace"))
+    return match.group() if match else None
+
+
+def scan_nodes(content, node_re=NODE_RE, brace_re=BRACE_RE):
+    # Yields (name, props, end) per node and (None, include, end) per Include line
     pos = 0
-    length = len(content)
-    header_regex = re.compile(r'([\w\d_]+)\s*\([^\)]+\)\s*\{')
+    while True:
+        match = node_re.search(content, pos)
+        if not match: return
+        pos = match.end()
+
+        name = match.group("name")
+        if name:
+            yield name, match.group("body"), pos
+        elif match.group("deep"):
+            end = find_block_end(content, pos, brace_re)
+            pos = end + 1
+            yield match.group("deep"), content[match.end():end], pos
+        else:
+            yield None, match.group("include"), pos
+
 
+def parse_g_file(content):
     parsed_objects = []
+    base_file = None
 
-    inc_match = re.search(r'Include:\s*(<[^>]+>)', content)
-    base_file = inc_match.group(1) if inc_match else DEFAULT_BASE_FILE
+    for name, props, _ in scan_nodes(content):
+        if name is None:
+            if base_file is None: base_file = props
+            continue
+        obj = build_object(name, props)
+        if obj: parsed_objects.append(obj)
 
-    while pos < length:
-        match = header_regex.search(content, pos)
-        if not match: break
+    return parsed_objects, base_file or DEFAULT_BASE_FILE
 
-        name = match.group(1)
-        start_idx = match.end()
-        brace_count = 1
-        curr = start_idx
 
-        while curr < length and brace_count > 0:
-            if content[curr] == '{':
-                brace_count += 1
-            elif content[curr] == '}':
-                brace_count -= 1
-            curr += 1
+# Streams the same dicts as parse_g_file out of a memory-mapped file, one at a
+# time, so memory stays flat regardless of file size. base_file and the full
+# list of includes are known on open.
+class GFileReader:
 
-        props = content[start_idx: curr - 1]
-        pos = curr
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = None
+        self.base_file = DEFAULT_BASE_FILE
+        self.includes = []
+        st = os.fstat(self._file.fileno())
+        self.stat = st.st_mtime_ns, st.st_size  # like watch.file_stat, taken before mapping
+        self.size = st.st_size
+        self.position = 0
+        if self.size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.includes = [m.decode() for m in INCLUDE_RE_BYTES.findall(self._map)]
+            if self.includes: self.base_file = self.includes[0]
+
+    def __iter__(self):
+        if self._map is None: return
+        for name, props, end in scan_nodes(self._map, NODE_RE_BYTES, BRACE_RE_BYTES):
+            self.position = end
+            if name is None: continue
+            name = decode_name(name)
+            if name is None: continue
+            obj = build_object(name, props.decode("utf-8", "replace"))
+            if obj: yield obj
+
+    @property
+    def progress(self):
+        return min(1.0, self.position / self.size) if self.size else 1.0
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
-        if name in ["floor", "wall_north", "wall_south", "wall_east", "wall_west"]:
-            continue
 
-        has_shape = "shape" in props or "type" in props
-        if not has_shape: continue
-        if "camera" in props or "_vis" in name: continue
-
-        x, y = 0.0, 0.0
-        w, h = 0.1, 0.1
-
-        q_nums = extract_floats(props, "Q")
-        if len(q_nums) >= 2:
-            x, y = q_nums[0], q_nums[1]
-
-        s_nums = extract_floats(props, "size")
-        if len(s_nums) >= 2:
-            w, h = s_nums[0], s_nums[1]
-
-        otype = "wall"
-        color = "brown"
-
-        if "agent" in props:
-            otype = "agent"
-            color = "yellow"
-            w = w * 2
-            h = h * 2
-        elif "movable_go" in props:
-            otype = "goal_object"
-            c_match = re.search(r'color\s*[:=]\s*(\[[^\]]+\])', props)
-            color = parse_color(c_match.group(1)) if c_match else "blue"
-        elif "movable_o" in props:
-            otype = "movable"
-            c_match = re.search(r'color\s*[:=]\s*(\[[^\]]+\])', props)
-            color = parse_color(c_match.group(1)) if c_match else "#ffffff"
-        elif "goal" in props and "contact:0" in props:
-            otype = "goal_location"
-            color = "red"
-            c_match = re.search(r'color\s*[:=]\s*(\[[^\]]+\])', props)
-            if c_match: color = parse_color(c_match.group(1))
-        elif "color" in props:
-            otype = "wall"
-            color = "brown"
-
-        parsed_objects.append({
-            'name': name.split('_')[0], 'full_name': name,
-            'w': w, 'h': h, 'x': x, 'y': y,
-            'type': otype, 'color': color
-        })
-
-    return parsed_objects, base_file
\ No newline at end of file
+def iter_g_objects(path):
+    with GFileReader(path) as reader:
+        yield from reader
@@ -0,0 +1,128 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+from .constants import LOAD_BATCH_SIZE, LOAD_DRAW_CHUNK, LOAD_FRAME_BUDGET, LOAD_POLL_MS, PARSE_CACHE_IN_EDITOR
+from .document import DocumentReader
+from .includes import resolve_includes
+from .parse_cache import load_cached, store_cached
+
+
+def read_in_batches(path, out, cancel, include_root=None, use_cache=False):
+    # Reader thread: parses and hands over batches, never touches Tk.
+    # Includes resolve relative to include_root (empty skips them).
+    try:
+        stat = os.stat(path)
+        with DocumentReader(path) as reader:
+            out.put(("base", reader.base_file, 0.0))
+            if include_root:
+                out.put(("includes", resolve_includes(reader.includes, include_root), 0.0))
+            # A parse cache hit replaces tokenising; a miss fills the cache
+            cached = load_cached(path) if use_cache else None
+            source = cached[0] if cached is not None else reader
+            parsed = [] if use_cache and cached is None else None
+            batch, count = [], 0
+            for obj in source:
+                if cancel.is_set(): return
+                batch.append(obj)
+                if len(batch) >= LOAD_BATCH_SIZE:
+                    count += len(batch)
+                    out.put(("objects", batch, count / len(source) if cached is not None else reader.progress))
+                    if parsed is not None: parsed.extend(batch)
+                    batch = []
+            out.put(("objects", batch, 1.0))
+            if parsed is not None:
+                try:
+                    store_cached(path, parsed + batch, reader.includes, stat)
+                except OSError:
+                    pass  # a read-only cache only costs speed
+            # Spans for lossless saving, recorded while the objects were read
+            if not cancel.is_set(): out.put(("document", reader.document(), 1.0))
+        out.put(("done", None, 1.0))
+    except Exception as e:
+        out.put(("error", e, 1.0))
+
+
+class BackgroundLoader:
+    # Parses on a worker thread and feeds the canvas in time-sliced chunks from
+    # root.after, so the window stays responsive and drawn objects are live.
+    # on_finish(loaded, cancelled, error) runs once, on the Tk thread.
+
+    def __init__(self, app, path, on_finish, include_root=None, use_cache=PARSE_CACHE_IN_EDITOR):
+        self.app = app
+        self.path = path
+        self.on_finish = on_finish
+        self.queue = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=read_in_batches,
+                                       args=(path, self.queue, self.cancel_event, include_root, use_cache),
+                                       daemon=True)
+        self.pending = deque()
+        self.loaded = []
+        self.received = 0
+        self.read_fraction = 0.0
+        self.reader_done = False
+        self.finished = False
+        self._after_id = None
+
+    def start(self):
+        self.thread.start()
+        self._after_id = self.app.root.after(LOAD_POLL_MS, self.pump)
+
+    @property
+    def progress(self):
+        if not self.received: return 0.0
+        return self.read_fraction * len(self.loaded) / self.received
+
+    def pump(self):
+        self._after_id = None
+        deadline = time.perf_counter() + LOAD_FRAME_BUDGET
+        while time.perf_counter() < deadline:
+            if self.pending:
+                n = min(LOAD_DRAW_CHUNK, len(self.pending))
+                chunk = [self.pending.popleft() for _ in range(n)]
+                self.loaded.extend(self.app.add_parsed_objects(chunk, link=False))
+                continue
+            try:
+                kind, payload, fraction = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "base":
+                self.app.base_file = payload
+            elif kind == "includes":
+                self.app.set_include_layer(*payload)
+            elif kind == "objects":
+                self.pending.extend(payload)
+                self.received += len(payload)
+                self.read_fraction = fraction
+            elif kind == "document":
+                self.app.document = payload
+            elif kind == "done":
+                self.reader_done = True
+            else:
+                self.finish(error=payload)
+                return
+
+        if self.reader_done and not self.pending:
+            self.finish()
+            return
+        self.app.show_load_progress(len(self.loaded), self.progress)
+        self._after_id = self.app.root.after(LOAD_POLL_MS, self.pump)
+
+    def cancel(self):
+        if self.finished: return
+        self.cancel_event.set()
+        self.finish(cancelled=True)
+
+    def finish(self, cancelled=False, error=None):
+        # Whatever got drawn stays: pair it up so the scene is consistent
+        self.finished = True
+        if self._after_id:
+            self.app.root.after_cancel(self._after_id)
+            self._after_id = None
+        self.pending.clear()
+        live = [o for o in self.loaded if o in self.app.spatial]
+        self.app.link_goal_pairs(live)
+        self.on_finish(live, cancelled, error)
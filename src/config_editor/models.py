@@ -1,50 +1,55 @@
-import tkinter as tk
 from .constants import *
+from .scene import SceneRow
 
-class LevelObject:
-    def __init__(self, canvas, name, x, y, width, height, obj_type, color, app, linked_obj=None):
-        self.canvas = canvas
-        self.name = name
-        self.x = x
-        self.y = y
-        self.width = width
-        self.height = height
-        self.obj_type = obj_type
-        self.color = color
+class LevelObject(SceneRow):
+    # The canvas view of one SceneModel row: geometry, name, type, color and link
+    # are read from and written to app.scene, this only adds the Tk items.
+    # Slotted: big levels hold tens of thousands of these. The canvas is reached
+    # through app, and drag state lives on the app since only one drag runs at a time.
+    __slots__ = ("app", "rect_id", "text_id")
+
+    def __init__(self, name, x, y, width, height, obj_type, color, app, linked_obj=None, draw=True):
+        super().__init__(app.scene, app.scene.append(name, x, y, width, height, obj_type, color, owner=self))
         self.app = app
-        self.linked_obj = linked_obj 
-        
-        self.handles = {}
-        
+        if linked_obj is not None: self.linked_obj = linked_obj
+
+        self.rect_id = None
+        self.text_id = None
+        if draw: self.draw()
+
+    @classmethod
+    def from_row(cls, app, row, draw=True):
+        # View for a row that is already in app.scene, e.g. after SceneModel.extend
+        obj = cls.__new__(cls)
+        SceneRow.__init__(obj, app.scene, row)
+        app.scene.owners[row] = obj
+        obj.app = app
+        obj.rect_id = None
+        obj.text_id = None
+        if draw: obj.draw()
+        return obj
+
+    @property
+    def canvas(self):
+        return self.app.canvas
+
+    def draw(self):
+        # Items are created at their final coords, so no update_visuals pass is needed
+        canvas = self.canvas
         tags = (self.name, "selectable")
+        x1, y1, x2, y2 = self.pixel_bounds()
         
         # --- DRAW ---
         if self.obj_type == "goal_location":
 
-            self.rect_id = canvas.create_rectangle(0, 0, 0, 0, fill=COLOR_FLOOR, outline=self.color, width=3, dash=(6, 4), tags=tags)
+            self.rect_id = canvas.create_rectangle(x1, y1, x2, y2, fill=COLOR_FLOOR, outline=self.color, width=3, dash=(6, 4), tags=tags)
         elif self.obj_type == "agent":
-            self.rect_id = canvas.create_oval(0, 0, 0, 0, fill=color, outline="black", width=2, tags=tags)
+            self.rect_id = canvas.create_oval(x1, y1, x2, y2, fill=self.color, outline="black", width=2, tags=tags)
         else:
-            self.rect_id = canvas.create_rectangle(0, 0, 0, 0, fill=color, outline="black", width=2, tags=tags)
+            self.rect_id = canvas.create_rectangle(x1, y1, x2, y2, fill=self.color, outline="black", width=2, tags=tags)
             
-        self.text_id = canvas.create_text(0, 0, text=name, fill="black", tags=tags)
-        
-
-        for loc in ["nw", "n", "ne", "w", "e", "sw", "s", "se"]:
-            hid = canvas.create_rectangle(0, 0, 0, 0, fill="#00ffff", outline="black", tags=(f"{self.name}_handle", "handle"))
-            self.canvas.tag_bind(hid, "<Button-1>", lambda e, l=loc: self.on_handle_click(e, l))
-            self.canvas.tag_bind(hid, "<B1-Motion>", lambda e, l=loc: self.on_handle_drag(e, l))
-            self.handles[loc] = hid
-            self.canvas.itemconfigure(hid, state='hidden')
-
-        self.update_visuals()
-        
-
-        for item in [self.rect_id, self.text_id]:
-            self.canvas.tag_bind(item, "<Button-1>", self.on_body_click)
-            self.canvas.tag_bind(item, "<B1-Motion>", self.on_body_drag)
-            self.canvas.tag_bind(item, "<Button-2>", self.on_right_click)
-            self.canvas.tag_bind(item, "<Button-3>", self.on_right_click)
+        self.text_id = canvas.create_text((x1 + x2) / 2, (y1 + y2) / 2, text=self.name, fill="black", tags=tags)
+        # Resize handles live in the app's shared HandleSet; body clicks are resolved by EditorApp through its spatial index
 
     def world_to_pixel(self, wx, wy):
         px = (wx * self.app.ppm) + self.app.offset_x
@@ -57,81 +62,88 @@ class LevelObject:
         return wx, wy
 
     def update_visuals(self):
-        half_w = (self.width / 2) * self.app.ppm
-        half_h = (self.height / 2) * self.app.ppm
-        cx, cy = self.world_to_pixel(self.x, self.y)
-        
-        x1, y1 = cx - half_w, cy - half_h
-        x2, y2 = cx + half_w, cy + half_h
-        
+        self.update_coords()
+        self.update_style()
+
+    def update_coords(self):
+        x1, y1, x2, y2 = self.pixel_bounds()
         self.canvas.coords(self.rect_id, x1, y1, x2, y2)
-        self.canvas.coords(self.text_id, cx, cy)
+        self.canvas.coords(self.text_id, (x1 + x2) / 2, (y1 + y2) / 2)
         
+        if self.app.handles.target is self:
+            self.app.handles.update()
+
+    def update_style(self):
         if self.obj_type == "goal_location":
              self.canvas.itemconfig(self.rect_id, outline=self.color, fill=COLOR_FLOOR)
         else:
              self.canvas.itemconfig(self.rect_id, fill=self.color)
         
         self.canvas.itemconfig(self.text_id, text=self.name)
-        
-        hs = 4
-        coords = {
+
+    def set_hidden(self, hidden):
+        state = "hidden" if hidden else "normal"
+        self.canvas.itemconfig(self.rect_id, state=state)
+        self.canvas.itemconfig(self.text_id, state=state)
+
+    def pixel_bounds(self):
+        half_w = (self.width / 2) * self.app.ppm
+        half_h = (self.height / 2) * self.app.ppm
+        cx, cy = self.world_to_pixel(self.x, self.y)
+        return cx - half_w, cy - half_h, cx + half_w, cy + half_h
+
+    def handle_positions(self):
+        x1, y1, x2, y2 = self.pixel_bounds()
+        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+        return {
             "nw": (x1, y1), "n": (cx, y1), "ne": (x2, y1),
             "w":  (x1, cy),                "e":  (x2, cy),
             "sw": (x1, y2), "s": (cx, y2), "se": (x2, y2)
         }
-        for loc, (hx, hy) in coords.items():
-            self.canvas.coords(self.handles[loc], hx-hs, hy-hs, hx+hs, hy+hs)
 
-    def select(self):
+    def select(self, show_handles=True):
+        # The selection tag lets a group move be one canvas.move
+        self.canvas.addtag_withtag(SELECTION_TAG, self.rect_id)
+        self.canvas.addtag_withtag(SELECTION_TAG, self.text_id)
         if self.obj_type == "goal_location":
             self.canvas.itemconfig(self.rect_id, width=4, dash="") 
         else:
             self.canvas.itemconfig(self.rect_id, width=3, outline="cyan")
         
-        for hid in self.handles.values():
-            self.canvas.itemconfigure(hid, state='normal')
-        self.canvas.tag_raise(f"{self.name}_handle")
+        if show_handles:
+            self.app.handles.attach(self)
+        elif self.app.handles.target is self:
+            self.app.handles.detach()
 
     def deselect(self):
+        self.canvas.dtag(self.rect_id, SELECTION_TAG)
+        self.canvas.dtag(self.text_id, SELECTION_TAG)
         if self.obj_type == "goal_location":
             self.canvas.itemconfig(self.rect_id, width=3, dash=(6, 4))
         else:
             self.canvas.itemconfig(self.rect_id, width=2, outline="black")
         
-        for hid in self.handles.values():
-            self.canvas.itemconfigure(hid, state='hidden')
+        if self.app.handles.target is self:
+            self.app.handles.detach()
 
     def on_body_click(self, event):
-        self._drag_data = {"x": event.x, "y": event.y}
-        self.app.select_object(self)
-        return "break"
-
-    def on_right_click(self, event):
-        self.app.select_object(self)
-        self.app.show_context_menu(event)
+        # EditorApp has already settled the selection this drag will carry
+        self.app.drag_data = {"x": event.x, "y": event.y, "moved": False}
         return "break"
 
     def on_body_drag(self, event):
-        dx = event.x - self._drag_data["x"]
-        dy = event.y - self._drag_data["y"]
-        cx, cy = self.world_to_pixel(self.x, self.y)
-        cx += dx
-        cy += dy
-        self.x, self.y = self.pixel_to_world(cx, cy)
-        self.update_visuals()
-        self.app.update_properties_panel()
-        self.app.draw_links()
-        self._drag_data["x"] = event.x
-        self._drag_data["y"] = event.y
+        # The whole selection follows; the renderer applies the summed delta
+        # once per frame to the model (in bulk) and to the selection tag
+        drag_data = self.app.drag_data
+        self.app.renderer.move_group(event.x - drag_data["x"], event.y - drag_data["y"])
+        drag_data.update(x=event.x, y=event.y, moved=True)
 
     def on_handle_click(self, event, loc):
-        self._resize_data = {"x": event.x, "y": event.y, "loc": loc}
         return "break"
 
     def on_handle_drag(self, event, loc):
-        coords = self.canvas.coords(self.rect_id)
-        x1, y1, x2, y2 = coords[0], coords[1], coords[2], coords[3]
+        # Start from the model, not canvas.coords: the canvas may lag a frame behind
+        x1, y1, x2, y2 = self.pixel_bounds()
         mx, my = event.x, event.y
         
         if "w" in loc: x1 = mx
@@ -154,5 +166,75 @@ class LevelObject:
         self.x, self.y = self.pixel_to_world(new_cx_px, new_cy_px)
         self.width = new_w_px / self.app.ppm
         self.height = new_h_px / self.app.ppm
-        self.update_visuals()
-        self.app.update_properties_panel()
\ No newline at end of file
+        self.app.spatial.update(self)
+        self.app.renderer.mark(self)
+        self.app.renderer.mark_panel()
+        self.app.renderer.mark_links()
+
+
+class HandleSet:
+    # The eight resize handles, created on first use and shared by whichever
+    # object is the primary selection, instead of eight hidden items per object
+    LOCATIONS = ["nw", "n", "ne", "w", "e", "sw", "s", "se"]
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.ids = {}
+        self.locs = {}  # item id -> handle location
+        self.target = None
+        self.active_loc = None
+        # Bound once on the shared tag; the clicked item is looked up in self.locs
+        self.canvas.tag_bind("handle", "<Button-1>", self.on_click)
+        self.canvas.tag_bind("handle", "<B1-Motion>", self.on_drag)
+
+    def _create(self):
+        for loc in self.LOCATIONS:
+            hid = self.canvas.create_rectangle(0, 0, 0, 0, fill="#00ffff", outline="black", state='hidden', tags="handle")
+            self.ids[loc] = hid
+            self.locs[hid] = loc
+
+    def current_loc(self):
+        items = self.canvas.find_withtag("current")
+        return self.locs.get(items[0]) if items else None
+
+    def on_click(self, event):
+        self.active_loc = self.current_loc()
+        if self.target and self.active_loc: return self.target.on_handle_click(event, self.active_loc)
+
+    def on_drag(self, event):
+        if self.target and self.active_loc: return self.target.on_handle_drag(event, self.active_loc)
+
+    def attach(self, obj):
+        if not self.ids: self._create()
+        self.target = obj
+        self.update()
+        self.canvas.itemconfigure("handle", state='normal')
+        self.canvas.tag_raise("handle")
+
+    def detach(self):
+        if self.target is None: return
+        self.target = None
+        self.canvas.itemconfigure("handle", state='hidden')
+
+    def update(self):
+        if self.target is None: return
+        hs = HANDLE_SIZE / 2
+        for loc, (hx, hy) in self.target.handle_positions().items():
+            self.canvas.coords(self.ids[loc], hx-hs, hy-hs, hx+hs, hy+hs)
+
+    def raise_(self):
+        if self.ids: self.canvas.tag_raise("handle")
+
+    def loc_at(self, px, py):
+        if self.target is None: return None
+        hs = HANDLE_SIZE / 2 + 1
+        for loc, (hx, hy) in self.target.handle_positions().items():
+            if abs(px - hx) <= hs and abs(py - hy) <= hs:
+                return loc
+        return None
+
+    def reset(self):
+        # The canvas was cleared; items get recreated on the next attach
+        self.ids = {}
+        self.locs = {}
+        self.target = None
@@ -0,0 +1,98 @@
+import heapq
+from collections import defaultdict
+
+PAIR_PREFIXES = ("obj", "goal")
+
+
+def split_name(name):
+    # "wall12" -> ("wall", 12), "wall_3" -> ("wall", 3), "ego" -> ("ego", None)
+    stem = name.rstrip("0123456789")
+    if stem == name:
+        return name, None
+    num = int(name[len(stem):])
+    if stem.endswith("_"):
+        stem = stem[:-1]
+    return stem, num
+
+
+class NameRegistry:
+    # Tracks every object name and, per stem, the numeric suffixes in use, so
+    # picking the next free name is O(log n) instead of a scan over all objects.
+
+    def __init__(self):
+        self.counts = {}  # name -> number of objects carrying it
+        self.suffixes = defaultdict(dict)  # stem -> {number: count}
+        self.heaps = defaultdict(list)  # stem -> max-heap of numbers (negated), lazily pruned
+        self.pair_hint = 1  # no pair id below this is free
+
+    def __contains__(self, name):
+        return name in self.counts
+
+    def __len__(self):
+        return len(self.counts)
+
+    def clear(self):
+        self.counts.clear()
+        self.suffixes.clear()
+        self.heaps.clear()
+        self.pair_hint = 1
+
+    def add(self, name):
+        self.counts[name] = self.counts.get(name, 0) + 1
+        stem, num = split_name(name)
+        if num is None: return
+        nums = self.suffixes[stem]
+        if num not in nums:
+            heap = self.heaps[stem]
+            heapq.heappush(heap, -num)
+            if len(heap) > 2 * len(nums) + 8:
+                # Mostly stale entries: rebuild from the live numbers (amortized O(1))
+                heap[:] = [-n for n in nums]
+                heap.append(-num)
+                heapq.heapify(heap)
+        nums[num] = nums.get(num, 0) + 1
+
+    def remove(self, name):
+        count = self.counts.get(name)
+        if not count: return
+        stem, num = split_name(name)
+        if count > 1:
+            self.counts[name] = count - 1
+        else:
+            del self.counts[name]
+            if stem in PAIR_PREFIXES and name == f"{stem}{num}":
+                self.pair_hint = min(self.pair_hint, num)
+
+        if num is None: return
+        nums = self.suffixes[stem]
+        if nums[num] > 1:
+            nums[num] -= 1
+        elif len(nums) > 1:
+            del nums[num]
+        else:
+            # Last number of the stem: forget the stem, stale heap entries included
+            del self.suffixes[stem]
+            self.heaps.pop(stem, None)
+
+    def rename(self, old, new):
+        self.remove(old)
+        self.add(new)
+
+    def max_suffix(self, stem):
+        nums = self.suffixes.get(stem)
+        if not nums: return 0
+        heap = self.heaps[stem]
+        while -heap[0] not in nums:
+            heapq.heappop(heap)
+        return -heap[0]
+
+    def next_name(self, base_name):
+        return f"{base_name}{self.max_suffix(base_name) + 1}"
+
+    def next_pair_id(self):
+        # Lowest id with neither obj<id> nor goal<id> taken
+        base_id = self.pair_hint
+        while any(f"{p}{base_id}" in self.counts for p in PAIR_PREFIXES):
+            base_id += 1
+        self.pair_hint = base_id
+        return base_id
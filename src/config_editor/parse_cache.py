@@ -0,0 +1,147 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from .constants import DEFAULT_BASE_FILE, PARSE_CACHE_DIR
+from .io_utils import INCLUDE_RE, parse_g_file, write_atomic
+
+# On-disk layout of one cached parse, all in native byte order (recorded in
+# the magic, so a cache from another machine is simply stale):
+#
+#   header   magic, source mtime_ns, source size, content digest (zeros unless
+#            keyed by hash), object count, include count, string count
+#   float64  x, y, w, h                  one column each, n entries
+#   uint32   full_name, color            string table indices, n entries each
+#   uint32   includes                    string table indices
+#   uint32   string offsets              m + 1 byte offsets into the blob
+#   uint8    type                        index into TYPES, n entries
+#   bytes    string blob                 utf-8
+#
+# Sections start on 8-byte boundaries so they can be cast in place from the map.
+MAGIC = b"RAIPC1" + (b"<" if sys.byteorder == "little" else b">") + b"\0"
+HEADER = struct.Struct("=8sqq32sIII4x")
+TYPES = ["wall", "movable", "goal_object", "goal_location", "agent"]
+NO_DIGEST = bytes(32)
+
+
+def _pad(n):
+    return -n % 8
+
+
+def cache_path(path, cache_dir=PARSE_CACHE_DIR):
+    key = hashlib.sha1(os.path.realpath(path).encode()).hexdigest()
+    return os.path.join(cache_dir, key + ".rpc")
+
+
+def content_digest(path):
+    h = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.digest()
+
+
+def pack(objs, includes, mtime_ns, size, digest=NO_DIGEST):
+    strings, index = [], {}
+
+    def intern(s):
+        i = index.get(s)
+        if i is None:
+            i = index[s] = len(strings)
+            strings.append(s)
+        return i
+
+    names = array("I", (intern(d['full_name']) for d in objs))
+    colors = array("I", (intern(d['color']) for d in objs))
+    incs = array("I", (intern(s) for s in includes))
+    types = array("B", (TYPES.index(d['type']) for d in objs))
+    blobs = [s.encode() for s in strings]
+    offsets = array("I", [0])
+    for b in blobs:
+        offsets.append(offsets[-1] + len(b))
+
+    out = [HEADER.pack(MAGIC, mtime_ns, size, digest, len(objs), len(includes), len(strings))]
+    for key in ("x", "y", "w", "h"):
+        out.append(array("d", (d[key] for d in objs)).tobytes())
+    for column in (names, colors, incs, offsets, types):
+        data = column.tobytes()
+        out.append(data + bytes(_pad(len(data))))
+    out.extend(blobs)
+    return out
+
+
+def unpack(buf, mtime_ns=None, size=None, digest=None):
+    # (objects, includes) from a packed buffer, or None when it does not
+    # belong to the given source (mtime_ns and size, or digest when given)
+    if len(buf) < HEADER.size: return None
+    magic, c_mtime, c_size, c_digest, n, n_inc, m = HEADER.unpack_from(buf)
+    if magic != MAGIC: return None
+    if digest is not None:
+        if c_digest != digest: return None
+    elif (c_mtime, c_size) != (mtime_ns, size):
+        return None
+
+    # Views are released even on a truncated buffer, or the caller's map could not close
+    pos = HEADER.size
+    columns = []
+    with memoryview(buf) as view:
+        for fmt, count in (("d", n), ("d", n), ("d", n), ("d", n), ("I", n), ("I", n), ("I", n_inc),
+                           ("I", m + 1), ("B", n)):
+            nbytes = count * struct.calcsize(fmt)
+            if pos + nbytes > len(buf): return None
+            with view[pos:pos + nbytes] as raw, raw.cast(fmt) as section:
+                columns.append(section.tolist())
+            pos += nbytes + _pad(nbytes)
+        xs, ys, ws, hs, names, colors, incs, offsets, types = columns
+        if pos + offsets[-1] > len(buf): return None
+        blob = bytes(view[pos:pos + offsets[-1]])
+
+    strings = [blob[a:b].decode() for a, b in zip(offsets, offsets[1:])]
+    objs = [{'name': full_name.split('_')[0], 'full_name': full_name,
+             'w': w, 'h': h, 'x': x, 'y': y, 'type': TYPES[t], 'color': strings[c]}
+            for full_name, x, y, w, h, t, c in zip((strings[i] for i in names), xs, ys, ws, hs, types, colors)]
+    return objs, [strings[i] for i in incs]
+
+
+def load_cached(path, cache_dir=PARSE_CACHE_DIR, digest=None):
+    # (objects, includes) from the cache, or None on a miss or a stale entry.
+    # Entries match on mtime and size, or on the content digest when given.
+    try:
+        st = os.stat(path)
+        with open(cache_path(path, cache_dir), "rb") as f:
+            if not os.fstat(f.fileno()).st_size: return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return unpack(mm, st.st_mtime_ns, st.st_size, digest)
+    except (OSError, ValueError, struct.error, IndexError, UnicodeDecodeError):
+        return None
+
+
+def store_cached(path, objs, includes, stat, cache_dir=PARSE_CACHE_DIR, digest=None):
+    # stat is taken before the source was read, so a file that changes while
+    # being parsed leaves a cache entry that is already stale
+    chunks = pack(objs, includes, stat.st_mtime_ns, stat.st_size, digest or NO_DIGEST)
+    os.makedirs(cache_dir, exist_ok=True)
+    write_atomic(cache_path(path, cache_dir), lambda f: f.writelines(chunks), mode="wb")
+
+
+def parse_g_file_cached(path, cache_dir=PARSE_CACHE_DIR, by_hash=False):
+    # parse_g_file on the file's content, served from the cache when the file
+    # is unchanged (same mtime and size, or same content digest with by_hash)
+    digest = content_digest(path) if by_hash else None
+    cached = load_cached(path, cache_dir, digest)
+    if cached is not None:
+        objs, includes = cached
+        return objs, includes[0] if includes else DEFAULT_BASE_FILE
+
+    st = os.stat(path)
+    with open(path, "r") as f:
+        content = f.read()
+    objs, base_file = parse_g_file(content)
+    try:
+        store_cached(path, objs, INCLUDE_RE.findall(content), st, cache_dir, digest)
+    except OSError:
+        pass  # a read-only cache only costs speed
+    return objs, base_file
@@ -0,0 +1,113 @@
+import time
+
+from .constants import COLOR_TRACE, PLAYBACK_FRAME_MS
+
+
+class Playback:
+    # Replays a TrajectoryLog over the level. A fixed-rate timer samples the
+    # log at wall-clock time * speed (frames are dropped, never queued, when
+    # Tk falls behind) and moves the LevelObjects named like its bodies.
+    # Poses are borrowed: they bypass the renderer's change tracking, so
+    # nothing is autosaved, journaled or spliced into the document, and close
+    # puts every driven object back where it was, unless the user has moved
+    # it since playback last placed it: that move is the user's, kept as made.
+
+    def __init__(self, app, log):
+        self.app = app
+        self.log = log
+        self.t0, self.t1 = log.time_range()
+        self.time = self.t0
+        self.speed = 1.0
+        self.playing = False
+        by_name = dict(zip(app.scene.names, app.scene.owners))
+        self.driven = [(track, by_name[track.name]) for track in log.tracks if track.name in by_name]
+        self.home = {obj: (obj.x, obj.y) for _, obj in self.driven}
+        self.placed = dict(self.home)  # obj -> the pose playback last gave it
+        self.trace_items = []
+        self._clock = None  # (perf_counter, log time) the current run started from
+        self._deadline = 0.0
+        self._after_id = None
+
+    # --- TRANSPORT ---
+
+    def play(self):
+        if self.playing: return
+        if self.time >= self.t1: self.time = self.t0
+        self.playing = True
+        self._clock = (time.perf_counter(), self.time)
+        self._deadline = self._clock[0]
+        self._tick()
+
+    def pause(self):
+        self.playing = False
+        if self._after_id is not None:
+            self.app.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def set_speed(self, speed):
+        self.speed = speed
+        if self.playing: self._clock = (time.perf_counter(), self.time)
+
+    def seek(self, t):
+        self.time = min(max(t, self.t0), self.t1)
+        if self.playing: self._clock = (time.perf_counter(), self.time)
+        self._apply()
+
+    def close(self):
+        self.pause()
+        if self.trace_items: self.app.canvas.delete(*self.trace_items)
+        self.trace_items = []
+        self._place([(obj, home) for obj, home in self.home.items()
+                     if obj.row is not None and (obj.x, obj.y) == self.placed[obj]])
+        self.driven = []
+        self.log.close()
+
+    def _tick(self):
+        self._after_id = None
+        now = time.perf_counter()
+        started, t_start = self._clock
+        self.time = min(t_start + (now - started) * self.speed, self.t1)
+        self._apply()
+        if self.time >= self.t1:
+            self.playing = False
+            return
+        frame = PLAYBACK_FRAME_MS / 1000
+        self._deadline += frame
+        if self._deadline < now: self._deadline = now + frame  # behind: drop frames
+        self._after_id = self.app.root.after(max(1, round((self._deadline - now) * 1000)), self._tick)
+
+    # --- DRAWING ---
+
+    def _apply(self):
+        self._place([(obj, track.pose_at(self.time)) for track, obj in self.driven])
+        self.app.show_playback_time(self.time)
+
+    def _place(self, poses):
+        # Straight to the scene and the canvas; skips objects deleted meanwhile.
+        # Bodies crossing the window edge are culled or shown like any object.
+        app = self.app
+        moved = []
+        for obj, (x, y) in poses:
+            if obj.row is None: continue
+            obj.x, obj.y = x, y
+            self.placed[obj] = (obj.x, obj.y)  # as stored, for close to compare
+            app.spatial.update(obj)
+            moved.append(obj)
+        app.update_culling(moved)
+        app.sync_coords([o for o in moved if o not in app.culled])
+        app.renderer.mark_links()
+
+    def draw_traces(self):
+        # One polyline per body, decimated for the current view; the canvas
+        # carries them through pans and zooms until the next redraw_all
+        app = self.app
+        canvas = app.canvas
+        if self.trace_items: canvas.delete(*self.trace_items)
+        colors = {track: obj.color for track, obj in self.driven if obj.row is not None}
+        self.trace_items = []
+        for track in self.log.tracks:
+            coords = track.trace(app.ppm, app.offset_x, app.offset_y)
+            if len(coords) < 4: continue
+            self.trace_items.append(canvas.create_line(*coords, fill=colors.get(track, COLOR_TRACE),
+                                                       width=1, tags="trace"))
+        if app.objects: canvas.tag_lower("trace", "selectable")
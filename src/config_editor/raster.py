@@ -0,0 +1,74 @@
+import os
+
+from .constants import DEFAULT_WORLD_SIZE, RASTER_RESOLUTION
+from .scene import SceneModel, np
+
+CHANNELS = ("walls", "movables", "goals", "agent")
+CHANNEL_OF_TYPE = {"wall": 0, "movable": 1, "goal_object": 1, "goal_location": 2, "agent": 3}
+EPS = 1e-9  # box edges within EPS of a cell border do not spill into the next cell
+
+
+def grid_shape(resolution, world_w, world_h):
+    # (channels, rows, cols); row 0 is the top (+y) edge of the world
+    return len(CHANNELS), int(round(world_h * resolution)), int(round(world_w * resolution))
+
+
+def rasterize(scene, resolution=RASTER_RESOLUTION, world_w=DEFAULT_WORLD_SIZE, world_h=DEFAULT_WORLD_SIZE, out=None):
+    # Occupancy grid of a SceneModel (or parse_g_file dicts): a cell is set
+    # when a box covers part of it. Every box is written at once into a 2D
+    # difference array (+1/-1 at its four corners, summed with bincount),
+    # and two cumsums turn that into per-cell coverage counts.
+    if np is None:
+        raise RuntimeError("rasterizing needs NumPy")
+    if not isinstance(scene, SceneModel):
+        scene = SceneModel.from_parsed(scene)
+    shape = grid_shape(resolution, world_w, world_h)
+    n_ch, rows, cols = shape
+    if out is None:
+        out = np.zeros(shape, dtype=np.uint8)
+    n = len(scene)
+    if not n:
+        out[...] = 0
+        return out
+
+    x, y = scene.x[:n], scene.y[:n]
+    hw, hh = scene.w[:n] / 2, scene.h[:n] / 2
+    c1 = np.clip(np.floor((x - hw + world_w / 2) * resolution + EPS), 0, cols).astype(np.int64)
+    c2 = np.clip(np.ceil((x + hw + world_w / 2) * resolution - EPS), 0, cols).astype(np.int64)
+    r1 = np.clip(np.floor((world_h / 2 - (y + hh)) * resolution + EPS), 0, rows).astype(np.int64)
+    r2 = np.clip(np.ceil((world_h / 2 - (y - hh)) * resolution - EPS), 0, rows).astype(np.int64)
+    ch = np.array([CHANNEL_OF_TYPE.get(t, 0) for t in scene.types], dtype=np.int64)
+    live = (c2 > c1) & (r2 > r1)
+    c1, c2, r1, r2, ch = c1[live], c2[live], r1[live], r2[live], ch[live]
+
+    stride = (rows + 1) * (cols + 1)
+    base = ch * stride
+    corners = np.concatenate((base + r1 * (cols + 1) + c1, base + r1 * (cols + 1) + c2,
+                              base + r2 * (cols + 1) + c1, base + r2 * (cols + 1) + c2))
+    weights = np.repeat(np.array([1, -1, -1, 1], dtype=np.int64), len(ch))
+    diff = np.bincount(corners, weights, minlength=n_ch * stride).reshape(n_ch, rows + 1, cols + 1)
+    coverage = diff.cumsum(axis=1).cumsum(axis=2)
+    np.greater(coverage[:, :rows, :cols], 0.5, out=out)
+    return out
+
+
+def rasterize_to_npy(path, scene, resolution=RASTER_RESOLUTION, world_w=DEFAULT_WORLD_SIZE, world_h=DEFAULT_WORLD_SIZE):
+    # Rasterizes straight into a memory-mapped .npy (uint8, CHANNELS x rows x
+    # cols), written next to path and swapped in like write_atomic
+    if np is None:
+        raise RuntimeError("rasterizing needs NumPy")
+    tmp_path = path + ".tmp"
+    grid = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.uint8,
+                                     shape=grid_shape(resolution, world_w, world_h))
+    try:
+        rasterize(scene, resolution, world_w, world_h, out=grid)
+        grid.flush()
+    finally:
+        del grid
+    os.replace(tmp_path, path)
+
+
+def load_grid(path):
+    # Read-only memory map of a rasterized level
+    return np.load(path, mmap_mode="r")
+
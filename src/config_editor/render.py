@@ -0,0 +1,90 @@
+import time
+
+from .constants import FRAME_MS
+
+DIRTY_COORDS = 1
+DIRTY_STYLE = 2
+
+
+class RenderScheduler:
+    # Collects what interactive edits invalidated and redraws it at most once
+    # per frame. Motion events between frames only touch the model; the flush
+    # then issues coords (and itemconfig only for style changes) per object.
+    # Dragging the selection is summed into one pixel delta, applied per frame
+    # as a bulk model move and a single canvas.move on the selection tag.
+
+    def __init__(self, app):
+        self.app = app
+        self.dirty = {}  # obj -> DIRTY_* flags
+        self.links = False
+        self.panel = False
+        self.group_dx = self.group_dy = 0
+        self._after_id = None
+        self._last_flush = 0.0
+
+    def mark(self, obj, flags=DIRTY_COORDS):
+        # Every model edit passes through here, so it also records the unsaved change
+        self.dirty[obj] = self.dirty.get(obj, 0) | flags
+        self.app.note_change(obj)
+        self._schedule()
+
+    def mark_links(self):
+        self.links = True
+        self._schedule()
+
+    def mark_panel(self):
+        self.panel = True
+        self._schedule()
+
+    def move_group(self, dx, dy):
+        self.group_dx += dx
+        self.group_dy += dy
+        self.links = self.panel = True
+        self._schedule()
+
+    def flush_group(self):
+        # Also called directly when a drag ends, so the model is final before indexing
+        dx, dy = self.group_dx, self.group_dy
+        self.group_dx = self.group_dy = 0
+        if dx or dy: self.app.move_selection_px(dx, dy)
+
+    def discard(self, obj):
+        self.dirty.pop(obj, None)
+
+    def _schedule(self):
+        if self._after_id is not None: return
+        wait = FRAME_MS - (time.perf_counter() - self._last_flush) * 1000
+        if wait <= 0:
+            self._after_id = self.app.root.after_idle(self.flush)
+        else:
+            self._after_id = self.app.root.after(int(wait) + 1, self.flush)
+
+    def cancel(self):
+        if self._after_id is not None:
+            self.app.root.after_cancel(self._after_id)
+            self._after_id = None
+        self.dirty = {}
+        self.links = self.panel = False
+        self.group_dx = self.group_dy = 0
+
+    def flush(self):
+        self._after_id = None
+        self._last_flush = time.perf_counter()
+        self.flush_group()
+        dirty, self.dirty = self.dirty, {}
+        moved = []
+        for obj, flags in dirty.items():
+            if obj.rect_id is None: continue
+            if flags & DIRTY_STYLE: obj.update_style()
+            if flags & DIRTY_COORDS: moved.append(obj)
+        if moved:
+            # Moves can carry objects across the window edge: re-cull just those
+            app = self.app
+            app.update_culling(moved)
+            app.sync_coords([o for o in moved if o not in app.culled])
+        if self.links:
+            self.links = False
+            self.app.draw_links()
+        if self.panel:
+            self.panel = False
+            self.app.update_properties_panel()
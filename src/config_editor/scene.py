@@ -0,0 +1,280 @@
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # pure-Python columns: same API, per-element loops
+    np = None
+
+NO_LINK = -1
+
+
+def _floats(values=()):
+    return np.array(values, dtype=np.float64) if np is not None else array("d", values)
+
+
+def _ints(values=()):
+    return np.array(values, dtype=np.int64) if np is not None else array("q", values)
+
+
+def to_pixel(xs, ys, ppm, offset_x, offset_y):
+    # Vectorized EditorApp.world_to_pixel
+    if np is not None:
+        xs, ys = np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64)
+        return xs * ppm + offset_x, -ys * ppm + offset_y
+    return [x * ppm + offset_x for x in xs], [-y * ppm + offset_y for y in ys]
+
+
+def to_world(pxs, pys, ppm, offset_x, offset_y):
+    # Vectorized EditorApp.pixel_to_world
+    if np is not None:
+        pxs, pys = np.asarray(pxs, dtype=np.float64), np.asarray(pys, dtype=np.float64)
+        return (pxs - offset_x) / ppm, -(pys - offset_y) / ppm
+    return [(px - offset_x) / ppm for px in pxs], [-(py - offset_y) / ppm for py in pys]
+
+
+class SceneModel:
+    # Column store for every object in a level, independent of Tk. Geometry and
+    # links are numeric columns (NumPy when available, else array), names, types
+    # and colors are lists. Rows are dense and keep insertion order; removing
+    # rows compacts the columns and renumbers the owners that sit on them.
+    #
+    # owners[row] is whatever object represents the row (a LevelObject in the
+    # editor, None for headless use); its .row is kept up to date.
+
+    def __init__(self):
+        self.clear()
+
+    def __len__(self):
+        return len(self.names)
+
+    def clear(self):
+        for owner in getattr(self, "owners", ()):
+            if owner is not None: owner.row = None
+        self.x = _floats()
+        self.y = _floats()
+        self.w = _floats()
+        self.h = _floats()
+        self.link = _ints()
+        self.names = []
+        self.types = []
+        self.colors = []
+        self.owners = []
+
+    @classmethod
+    def from_parsed(cls, parsed_objects):
+        scene = cls()
+        scene.extend(parsed_objects)
+        return scene
+
+    # --- ROWS ---
+
+    def _reserve(self, extra):
+        # NumPy columns grow by doubling; only the first len(self) entries are live
+        need = len(self.names) + extra
+        if np is None or need <= len(self.x): return
+        cap = max(need, 2 * len(self.x), 64)
+        n = len(self.names)
+        for key in ("x", "y", "w", "h", "link"):
+            old = getattr(self, key)
+            new = np.full(cap, NO_LINK, dtype=old.dtype)
+            new[:n] = old[:n]
+            setattr(self, key, new)
+
+    def append(self, name, x, y, w, h, obj_type, color, owner=None):
+        row = len(self.names)
+        if np is not None:
+            self._reserve(1)
+            self.x[row], self.y[row], self.w[row], self.h[row] = x, y, w, h
+            self.link[row] = NO_LINK
+        else:
+            self.x.append(x)
+            self.y.append(y)
+            self.w.append(w)
+            self.h.append(h)
+            self.link.append(NO_LINK)
+        self.names.append(name)
+        self.types.append(obj_type)
+        self.colors.append(color)
+        self.owners.append(owner)
+        return row
+
+    def extend(self, parsed_objects):
+        # Bulk append of parse_g_file dicts; returns the new rows
+        parsed_objects = list(parsed_objects)
+        start, count = len(self.names), len(parsed_objects)
+        for key in ("x", "y", "w", "h"):
+            values = [d[key] for d in parsed_objects]
+            if np is not None:
+                self._reserve(count)
+                getattr(self, key)[start:start + count] = values
+            else:
+                getattr(self, key).extend(values)
+        if np is not None:
+            self.link[start:start + count] = NO_LINK
+        else:
+            self.link.extend([NO_LINK] * count)
+        self.names.extend(d['full_name'] for d in parsed_objects)
+        self.types.extend(d['type'] for d in parsed_objects)
+        self.colors.extend(d['color'] for d in parsed_objects)
+        self.owners.extend([None] * count)
+        return range(start, start + count)
+
+    def remove(self, rows):
+        # Drop rows in one compaction pass; links to removed rows are cleared
+        doomed = set(rows)
+        if not doomed: return
+        n = len(self.names)
+        # Rows before the first removed one stay where they are
+        first = min(doomed)
+        tail = [r for r in range(first, n) if r not in doomed]
+        keep = list(range(first)) + tail
+        remap = list(range(first)) + [NO_LINK] * (n - first)
+        for new_row, old_row in enumerate(tail, first):
+            remap[old_row] = new_row
+
+        if np is not None:
+            idx = np.asarray(keep, dtype=np.int64)
+            self.x, self.y, self.w, self.h = self.x[idx], self.y[idx], self.w[idx], self.h[idx]
+            # NO_LINK (-1) picks the trailing NO_LINK entry of the lookup table
+            self.link = np.asarray(remap + [NO_LINK], dtype=np.int64)[self.link[idx]]
+        else:
+            self.x = array("d", (self.x[r] for r in keep))
+            self.y = array("d", (self.y[r] for r in keep))
+            self.w = array("d", (self.w[r] for r in keep))
+            self.h = array("d", (self.h[r] for r in keep))
+            self.link = array("q", (NO_LINK if self.link[r] == NO_LINK else remap[self.link[r]] for r in keep))
+
+        for r in doomed:
+            owner = self.owners[r]
+            if owner is not None: owner.row = None
+        self.names = self.names[:first] + [self.names[r] for r in tail]
+        self.types = self.types[:first] + [self.types[r] for r in tail]
+        self.colors = self.colors[:first] + [self.colors[r] for r in tail]
+        self.owners = self.owners[:first] + [self.owners[r] for r in tail]
+        for new_row in range(first, len(self.owners)):
+            owner = self.owners[new_row]
+            if owner is not None: owner.row = new_row
+
+    def set_link(self, row, other):
+        self.link[row] = NO_LINK if other is None else other
+
+    def records(self):
+        # Attribute views in the shape format_g_object expects
+        return [SceneRow(self, row) for row in range(len(self.names))]
+
+    # --- VECTORIZED GEOMETRY ---
+
+    def _select(self, column, rows):
+        if rows is None: return column[:len(self.names)]
+        if np is not None: return column[np.asarray(rows, dtype=np.int64)]
+        return [column[r] for r in rows]
+
+    def pixel_bounds(self, ppm, offset_x, offset_y, rows=None):
+        # (x1, y1, x2, y2) columns in canvas pixels for the given rows (default all)
+        x, y = self._select(self.x, rows), self._select(self.y, rows)
+        w, h = self._select(self.w, rows), self._select(self.h, rows)
+        cx, cy = to_pixel(x, y, ppm, offset_x, offset_y)
+        if np is not None:
+            hw, hh = w * (ppm / 2), h * (ppm / 2)
+            return cx - hw, cy - hh, cx + hw, cy + hh
+        hw = [v * (ppm / 2) for v in w]
+        hh = [v * (ppm / 2) for v in h]
+        return ([a - b for a, b in zip(cx, hw)], [a - b for a, b in zip(cy, hh)],
+                [a + b for a, b in zip(cx, hw)], [a + b for a, b in zip(cy, hh)])
+
+    def world_bounds(self, rows=None):
+        # World AABB (x1, y1, x2, y2) around the given rows, or None when empty
+        x, y = self._select(self.x, rows), self._select(self.y, rows)
+        w, h = self._select(self.w, rows), self._select(self.h, rows)
+        if not len(x): return None
+        if np is not None:
+            return (float((x - w / 2).min()), float((y - h / 2).min()),
+                    float((x + w / 2).max()), float((y + h / 2).max()))
+        return (min(a - b / 2 for a, b in zip(x, w)), min(a - b / 2 for a, b in zip(y, h)),
+                max(a + b / 2 for a, b in zip(x, w)), max(a + b / 2 for a, b in zip(y, h)))
+
+    def move(self, rows, dx, dy):
+        if np is not None:
+            idx = np.asarray(rows, dtype=np.int64)
+            self.x[idx] += dx
+            self.y[idx] += dy
+            return
+        for r in rows:
+            self.x[r] += dx
+            self.y[r] += dy
+
+    def scale(self, rows, factor, cx, cy):
+        # Scale positions about (cx, cy) and sizes by factor
+        if np is not None:
+            idx = np.asarray(rows, dtype=np.int64)
+            self.x[idx] = cx + (self.x[idx] - cx) * factor
+            self.y[idx] = cy + (self.y[idx] - cy) * factor
+            self.w[idx] *= factor
+            self.h[idx] *= factor
+            return
+        for r in rows:
+            self.x[r] = cx + (self.x[r] - cx) * factor
+            self.y[r] = cy + (self.y[r] - cy) * factor
+            self.w[r] *= factor
+            self.h[r] *= factor
+
+
+class SceneRow:
+    # Object-style access to one row. LevelObject extends this with canvas
+    # items; on its own it is what the writer and other headless code iterate.
+    __slots__ = ("scene", "row")
+
+    def __init__(self, scene, row):
+        self.scene = scene
+        self.row = row
+
+    @property
+    def name(self): return self.scene.names[self.row]
+
+    @name.setter
+    def name(self, value): self.scene.names[self.row] = value
+
+    @property
+    def obj_type(self): return self.scene.types[self.row]
+
+    @obj_type.setter
+    def obj_type(self, value): self.scene.types[self.row] = value
+
+    @property
+    def color(self): return self.scene.colors[self.row]
+
+    @color.setter
+    def color(self, value): self.scene.colors[self.row] = value
+
+    @property
+    def x(self): return float(self.scene.x[self.row])
+
+    @x.setter
+    def x(self, value): self.scene.x[self.row] = value
+
+    @property
+    def y(self): return float(self.scene.y[self.row])
+
+    @y.setter
+    def y(self, value): self.scene.y[self.row] = value
+
+    @property
+    def width(self): return float(self.scene.w[self.row])
+
+    @width.setter
+    def width(self, value): self.scene.w[self.row] = value
+
+    @property
+    def height(self): return float(self.scene.h[self.row])
+
+    @height.setter
+    def height(self, value): self.scene.h[self.row] = value
+
+    @property
+    def linked_obj(self):
+        other = int(self.scene.link[self.row])
+        return None if other == NO_LINK else self.scene.owners[other]
+
+    @linked_obj.setter
+    def linked_obj(self, obj):
+        self.scene.set_link(self.row, None if obj is None else obj.row)
@@ -0,0 +1,145 @@
+import itertools
+import math
+from collections import defaultdict
+
+from .constants import SPATIAL_CELL_SIZE
+
+
+def object_bounds(obj):
+    hw, hh = obj.width / 2, obj.height / 2
+    return obj.x - hw, obj.y - hh, obj.x + hw, obj.y + hh
+
+
+class SpatialIndex:
+    # Uniform grid over world coordinates. Each object is registered in every
+    # cell its AABB touches; queries only look at the cells they cover.
+
+    def __init__(self, cell_size=SPATIAL_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = defaultdict(set)
+        self.entries = {}  # obj -> (bounds, cell range)
+        self.order = {}  # obj -> insertion sequence, later means drawn on top
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, obj):
+        return obj in self.entries
+
+    def clear(self):
+        self.cells.clear()
+        self.entries.clear()
+        self.order.clear()
+
+    def _cell_range(self, x1, y1, x2, y2):
+        cs = self.cell_size
+        return math.floor(x1 / cs), math.floor(y1 / cs), math.floor(x2 / cs), math.floor(y2 / cs)
+
+    def _add_cells(self, obj, crange):
+        cx1, cy1, cx2, cy2 = crange
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                self.cells[(cx, cy)].add(obj)
+
+    def _remove_cells(self, obj, crange):
+        cx1, cy1, cx2, cy2 = crange
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                cell = self.cells.get((cx, cy))
+                if cell is None: continue
+                cell.discard(obj)
+                if not cell: del self.cells[(cx, cy)]
+
+    def insert(self, obj):
+        if obj in self.entries:
+            return self.update(obj)
+        bounds = object_bounds(obj)
+        crange = self._cell_range(*bounds)
+        self.entries[obj] = (bounds, crange)
+        self.order[obj] = next(self._seq)
+        self._add_cells(obj, crange)
+
+    def remove(self, obj):
+        entry = self.entries.pop(obj, None)
+        if entry is None: return
+        self.order.pop(obj, None)
+        self._remove_cells(obj, entry[1])
+
+    def update(self, obj):
+        entry = self.entries.get(obj)
+        if entry is None:
+            return self.insert(obj)
+        bounds = object_bounds(obj)
+        crange = self._cell_range(*bounds)
+        if crange != entry[1]:
+            self._remove_cells(obj, entry[1])
+            self._add_cells(obj, crange)
+        self.entries[obj] = (bounds, crange)
+
+    def _candidates(self, crange):
+        cx1, cy1, cx2, cy2 = crange
+        if (cx2 - cx1 + 1) * (cy2 - cy1 + 1) > len(self.cells):
+            # Query covers more cells than are occupied, walk the occupied ones
+            found = set()
+            for (cx, cy), objs in self.cells.items():
+                if cx1 <= cx <= cx2 and cy1 <= cy <= cy2:
+                    found.update(objs)
+            return found
+        found = set()
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                cell = self.cells.get((cx, cy))
+                if cell: found.update(cell)
+        return found
+
+    def _sorted(self, objs):
+        return sorted(objs, key=self.order.__getitem__)
+
+    def query_rect(self, x1, y1, x2, y2, contained=False):
+        # Objects whose AABB intersects (or lies inside, if contained) the rectangle, bottom to top
+        x1, x2 = min(x1, x2), max(x1, x2)
+        y1, y2 = min(y1, y2), max(y1, y2)
+        hits = []
+        for obj in self._candidates(self._cell_range(x1, y1, x2, y2)):
+            ox1, oy1, ox2, oy2 = self.entries[obj][0]
+            if contained:
+                if ox1 >= x1 and oy1 >= y1 and ox2 <= x2 and oy2 <= y2: hits.append(obj)
+            elif ox1 <= x2 and ox2 >= x1 and oy1 <= y2 and oy2 >= y1:
+                hits.append(obj)
+        return self._sorted(hits)
+
+    def query_point(self, x, y, tolerance=0.0):
+        return self.query_rect(x - tolerance, y - tolerance, x + tolerance, y + tolerance)
+
+    def nearest(self, x, y, max_dist=None):
+        # Ring search outwards from the query cell; stops once no unvisited
+        # ring can hold anything closer than the best hit so far.
+        if not self.entries: return None
+        cs = self.cell_size
+        qx, qy = math.floor(x / cs), math.floor(y / cs)
+        if max_dist is None:
+            xs = [k[0] for k in self.cells]
+            ys = [k[1] for k in self.cells]
+            max_ring = max(abs(qx - min(xs)), abs(qx - max(xs)), abs(qy - min(ys)), abs(qy - max(ys)))
+        else:
+            max_ring = math.ceil(max_dist / cs) + 1
+
+        best, best_d = None, math.inf
+        seen = set()
+        for ring in range(max_ring + 1):
+            for cx in range(qx - ring, qx + ring + 1):
+                for cy in range(qy - ring, qy + ring + 1):
+                    if ring and qx - ring < cx < qx + ring and qy - ring < cy < qy + ring: continue
+                    for obj in self.cells.get((cx, cy), ()):
+                        if obj in seen: continue
+                        seen.add(obj)
+                        x1, y1, x2, y2 = self.entries[obj][0]
+                        d = math.hypot(max(x1 - x, 0, x - x2), max(y1 - y, 0, y - y2))
+                        if d < best_d or (d == best_d and self.order[obj] > self.order[best]):
+                            best, best_d = obj, d
+            if best is not None and best_d <= ring * cs:
+                break
+
+        if max_dist is not None and best_d > max_dist: return None
+        return best
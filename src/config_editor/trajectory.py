@@ -0,0 +1,195 @@
+import bisect
+import csv
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from .constants import TRACE_MAX_POINTS
+from .io_utils import write_atomic
+from .scene import np
+
+# On-disk layout of a trajectory log, native byte order (recorded in the
+# magic, like the parse cache):
+#
+#   header   magic, body count
+#   per body name (utf-8, zero padded), sample count, byte offset of its data
+#   float64  t, x, y                     one column each, count entries, t ascending
+#
+# Data starts on 8-byte boundaries, so columns are read straight from the map:
+# opening a log costs the same for a thousand samples as for millions.
+MAGIC = b"RAITRJ1" + (b"<" if sys.byteorder == "little" else b">")
+HEADER = struct.Struct("=8sI4x")
+NAME_BYTES = 48
+ENTRY = struct.Struct(f"={NAME_BYTES}sQQ")
+
+
+class Track:
+    # Samples of one body, as float64 columns viewing the map (ndarrays with
+    # NumPy, memoryviews without)
+    __slots__ = ("name", "t", "x", "y")
+
+    def __init__(self, name, t, x, y):
+        self.name = name
+        self.t = t
+        self.x = x
+        self.y = y
+
+    def __len__(self):
+        return len(self.t)
+
+    def pose_at(self, time):
+        # Linear interpolation between the samples around time, clamped to the ends
+        t = self.t
+        i = int(np.searchsorted(t, time, side="right")) if np is not None else bisect.bisect_right(t, time)
+        if i == 0: return float(self.x[0]), float(self.y[0])
+        if i == len(t): return float(self.x[-1]), float(self.y[-1])
+        t0, t1 = float(t[i - 1]), float(t[i])
+        a = (time - t0) / (t1 - t0) if t1 > t0 else 0.0
+        x0, y0 = float(self.x[i - 1]), float(self.y[i - 1])
+        return x0 + (float(self.x[i]) - x0) * a, y0 + (float(self.y[i]) - y0) * a
+
+    def trace(self, ppm, offset_x, offset_y, max_points=TRACE_MAX_POINTS):
+        # Flat pixel coords for canvas.create_line, decimated to screen
+        # resolution: consecutive samples on the same pixel collapse into one
+        n = len(self)
+        if np is not None:
+            px = np.rint(np.asarray(self.x) * ppm + offset_x)
+            py = np.rint(np.asarray(self.y) * -ppm + offset_y)
+            keep = np.ones(n, dtype=bool)
+            keep[1:] = (px[1:] != px[:-1]) | (py[1:] != py[:-1])
+            px, py = px[keep], py[keep]
+            if len(px) > max_points:
+                idx = np.linspace(0, len(px) - 1, max_points).astype(np.int64)
+                px, py = px[idx], py[idx]
+            return np.column_stack((px, py)).ravel().tolist()
+
+        # Pure Python cannot afford a pass over millions of samples: stride first
+        step = max(1, -(-n // max_points))
+        coords, last = [], None
+        for i in list(range(0, n - 1, step)) + [n - 1]:
+            p = (round(self.x[i] * ppm + offset_x), round(-self.y[i] * ppm + offset_y))
+            if p != last:
+                coords.extend(p)
+                last = p
+        return coords
+
+
+class TrajectoryLog:
+    def __init__(self, path):
+        self.path = path
+        self.tracks = []
+        self._views = []  # every memoryview over the map, released by close
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                raise ValueError(f"{path}: not a trajectory log")
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._read()
+        except BaseException:
+            self.close()
+            raise
+
+    def _read(self):
+        path, size = self.path, len(self.map)
+        magic, count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a trajectory log (or written on another byte order)")
+        if HEADER.size + count * ENTRY.size > size:
+            raise ValueError(f"{path}: truncated")
+        # Every entry is checked before any view exists, so a bad file fails
+        # with nothing but the map to close
+        entries = []
+        for k in range(count):
+            name, n, offset = ENTRY.unpack_from(self.map, HEADER.size + k * ENTRY.size)
+            if offset + 24 * n > size:
+                raise ValueError(f"{path}: truncated")
+            if n: entries.append((name.rstrip(b"\0").decode(), n, offset))
+        view = memoryview(self.map)
+        self._views.append(view)
+        for name, n, offset in entries:
+            cols = [view[offset + 8 * n * c:offset + 8 * n * (c + 1)].cast("d") for c in range(3)]
+            self._views.extend(cols)
+            if np is not None: cols = [np.frombuffer(c, dtype=np.float64) for c in cols]
+            self.tracks.append(Track(name, *cols))
+
+    def close(self):
+        # Tracks view the map: their columns go first, then the views, then the map
+        for track in self.tracks:
+            track.t = track.x = track.y = None
+        self.tracks = []
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def time_range(self):
+        if not self.tracks: return 0.0, 0.0
+        return (min(float(tr.t[0]) for tr in self.tracks),
+                max(float(tr.t[-1]) for tr in self.tracks))
+
+    @property
+    def samples(self):
+        return sum(len(tr) for tr in self.tracks)
+
+
+def write_log(path, tracks):
+    # tracks: {name: (t, x, y)} with t ascending; any sequences of floats
+    columns = []
+    for name, (t, x, y) in tracks.items():
+        encoded = name.encode()
+        if len(encoded) > NAME_BYTES:
+            raise ValueError(f"body name too long: {name}")
+        cols = [np.ascontiguousarray(c, dtype=np.float64) if np is not None else array("d", c) for c in (t, x, y)]
+        if not len(cols[0]) == len(cols[1]) == len(cols[2]):
+            raise ValueError(f"{name}: t, x and y differ in length")
+        columns.append((encoded, cols))
+
+    def write(f):
+        offset = HEADER.size + len(columns) * ENTRY.size
+        offset += -offset % 8
+        f.write(HEADER.pack(MAGIC, len(columns)))
+        for encoded, cols in columns:
+            f.write(ENTRY.pack(encoded, len(cols[0]), offset))
+            offset += 24 * len(cols[0])
+        f.write(bytes(-f.tell() % 8))
+        for _, cols in columns:
+            for col in cols:
+                col.tofile(f)
+
+    write_atomic(path, write, mode="wb")
+
+
+def pack_csv(csv_path, out_path):
+    # body,t,x,y rows (an optional header row is skipped) -> trajectory log.
+    # Returns (bodies, samples).
+    columns = {}
+    unsorted = set()
+    with open(csv_path, newline="") as f:
+        for line, row in enumerate(csv.reader(f), 1):
+            if not row or row[0].startswith("#"): continue
+            try:
+                t, x, y = float(row[1]), float(row[2]), float(row[3])
+            except (ValueError, IndexError):
+                if line == 1: continue  # header
+                raise ValueError(f"{csv_path}:{line}: expected body,t,x,y")
+            cols = columns.get(row[0])
+            if cols is None:
+                cols = columns[row[0]] = (array("d"), array("d"), array("d"))
+            elif t < cols[0][-1]:
+                unsorted.add(row[0])
+            cols[0].append(t)
+            cols[1].append(x)
+            cols[2].append(y)
+    for name in unsorted:
+        order = sorted(range(len(columns[name][0])), key=columns[name][0].__getitem__)
+        columns[name] = tuple(array("d", (c[i] for i in order)) for c in columns[name])
+    write_log(out_path, columns)
+    return len(columns), sum(len(c[0]) for c in columns.values())
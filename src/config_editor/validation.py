@@ -0,0 +1,332 @@
+from collections import namedtuple
+
+from .constants import AGENT_LIMITS, COLOR_ISSUE, VALIDATE_MS, VALIDATE_PAIR_CHUNK
+from .scene import np
+
+# rows holds one scene row, or two for an overlap
+Issue = namedtuple("Issue", "kind rows")
+
+TYPES = ["wall", "movable", "goal_object", "goal_location", "agent"]
+SOLID = {"wall", "movable", "goal_object", "agent"}
+EPS = 1e-9
+
+
+def conflicts(type_a, type_b):
+    # Which overlaps are problems: solids in each other (walls may meet walls),
+    # and goal locations inside walls. Goals under objects are expected.
+    if type_a == type_b == "wall": return False
+    if type_a in SOLID and type_b in SOLID: return True
+    return {type_a, type_b} == {"wall", "goal_location"}
+
+
+def overlap_kind(type_a, type_b):
+    return "goal_in_wall" if "goal_location" in (type_a, type_b) else "overlap"
+
+
+CONFLICTS = [[conflicts(a, b) for b in TYPES] for a in TYPES]
+
+
+def aabbs(scene, rows=None):
+    x, y = scene._select(scene.x, rows), scene._select(scene.y, rows)
+    w, h = scene._select(scene.w, rows), scene._select(scene.h, rows)
+    if np is not None:
+        return x - w / 2, y - h / 2, x + w / 2, y + h / 2
+    return ([a - b / 2 for a, b in zip(x, w)], [a - b / 2 for a, b in zip(y, h)],
+            [a + b / 2 for a, b in zip(x, w)], [a + b / 2 for a, b in zip(y, h)])
+
+
+# --- SWEEP AND PRUNE ---
+# Boxes are cut into horizontal strips and swept along x within each strip, so
+# a column of boxes sharing an x range does not turn into a quadratic run of
+# candidates. A box spanning several strips is swept in each; a pair is only
+# reported from the strip holding the bottom of their common y range.
+
+def _strips(y1, y2, n):
+    # Strip origin and height: about sqrt(n) strips, never thinner than twice
+    # the typical box, so most boxes sit in one or two strips
+    if np is not None:
+        lo, hi, heights = float(y1.min()), float(y2.max()), np.sort(y2 - y1)
+    else:
+        lo, hi, heights = min(y1), max(y2), sorted(b - a for a, b in zip(y1, y2))
+    height = max((hi - lo) / max(1, int(n ** 0.5)), 2 * float(heights[len(heights) // 2]), EPS)
+    return lo, height
+
+
+def _sweep_numpy(x1, y1, x2, y2, chunk):
+    n = len(x1)
+    y0, height = _strips(y1, y2, n)
+    first_strip = ((y1 - y0) // height).astype(np.int64)
+    last_strip = ((y2 - y0) // height).astype(np.int64)
+
+    # One entry per (box, strip) it covers
+    spans = last_strip - first_strip + 1
+    box = np.repeat(np.arange(n), spans)
+    strip = first_strip[box] + (np.arange(len(box)) - np.repeat(np.cumsum(spans) - spans, spans))
+
+    # Exact integer sort keys: strip, then rank of x among all box edges.
+    # Entry j is a candidate for i when it starts before i ends (less EPS).
+    edges = np.unique(np.concatenate((x1, x2 - EPS)))
+    m = len(edges) + 1
+    lo_key = strip * m + np.searchsorted(edges, x1[box])
+    hi_key = strip * m + np.searchsorted(edges, x2[box] - EPS)
+    order = np.argsort(lo_key, kind="stable")
+    lo_sorted = lo_key[order]
+    counts = np.maximum(np.searchsorted(lo_sorted, hi_key[order]) - np.arange(1, len(order) + 1), 0)
+
+    firsts, seconds = [], []
+    ends = np.cumsum(counts)
+    start, total = 0, len(order)
+    while start < total:
+        # As many sorted entries as keep this batch's candidates near the limit
+        base = ends[start - 1] if start else 0
+        stop = max(start + 1, int(np.searchsorted(ends, base + chunk, side="right")))
+        c = counts[start:stop]
+        i = np.repeat(np.arange(start, stop), c)
+        if len(i):
+            j = i + 1 + (np.arange(len(i)) - np.repeat(np.cumsum(c) - c, c))
+            a, b = box[order[i]], box[order[j]]
+            s = strip[order[i]]
+            hit = ((y1[a] < y2[b] - EPS) & (y1[b] < y2[a] - EPS)
+                   & (((np.maximum(y1[a], y1[b]) - y0) // height).astype(np.int64) == s))
+            firsts.append(a[hit])
+            seconds.append(b[hit])
+        start = stop
+    if not firsts: return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(firsts), np.concatenate(seconds)
+
+
+def _sweep_python(x1, y1, x2, y2):
+    y0, height = _strips(y1, y2, len(x1))
+    strips = {}
+    for i in range(len(x1)):
+        for s in range(int((y1[i] - y0) // height), int((y2[i] - y0) // height) + 1):
+            strips.setdefault(s, []).append(i)
+
+    firsts, seconds = [], []
+    for s, boxes in strips.items():
+        boxes.sort(key=x1.__getitem__)
+        active = []
+        for i in boxes:
+            start = x1[i]
+            active = [j for j in active if x2[j] - EPS > start]
+            for j in active:
+                if (y1[i] < y2[j] - EPS and y1[j] < y2[i] - EPS
+                        and int((max(y1[i], y1[j]) - y0) // height) == s):
+                    firsts.append(j)
+                    seconds.append(i)
+            active.append(i)
+    return firsts, seconds
+
+
+def has_area(x1, y1, x2, y2):
+    return x2 - x1 > EPS and y2 - y1 > EPS
+
+
+def overlapping_pairs(x1, y1, x2, y2, chunk=VALIDATE_PAIR_CHUNK):
+    # All index pairs (i, j) whose boxes overlap with positive area, as two
+    # parallel sequences; touching edges do not count. Zero-width or
+    # zero-height boxes overlap nothing, and the sweeps rely on them being
+    # left out (each only tests the x side its sort order leaves open).
+    if not len(x1): return [], []
+    if np is not None:
+        x1, y1, x2, y2 = (np.asarray(v, dtype=np.float64) for v in (x1, y1, x2, y2))
+        keep = np.flatnonzero((x2 - x1 > EPS) & (y2 - y1 > EPS))
+        if len(keep) == len(x1): return _sweep_numpy(x1, y1, x2, y2, chunk)
+        if not len(keep): return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        first, second = _sweep_numpy(x1[keep], y1[keep], x2[keep], y2[keep], chunk)
+        return keep[first], keep[second]
+    keep = [i for i in range(len(x1)) if has_area(x1[i], y1[i], x2[i], y2[i])]
+    if len(keep) == len(x1): return _sweep_python(x1, y1, x2, y2)
+    first, second = _sweep_python(*([v[i] for i in keep] for v in (x1, y1, x2, y2)))
+    return [keep[i] for i in first], [keep[i] for i in second]
+
+
+# --- RULES ---
+
+def agent_outside_limits(x, y, limits=AGENT_LIMITS):
+    return not (limits[0] <= x <= limits[1] and limits[2] <= y <= limits[3])
+
+
+def outside_world(x1, y1, x2, y2, world_w, world_h):
+    return x1 < -world_w / 2 - EPS or x2 > world_w / 2 + EPS or y1 < -world_h / 2 - EPS or y2 > world_h / 2 + EPS
+
+
+def validate_scene(scene, world_w, world_h):
+    # Every problem in a SceneModel, as Issues over its rows
+    issues = []
+    n = len(scene)
+    if not n: return issues
+    x1, y1, x2, y2 = aabbs(scene)
+    type_ids = [TYPES.index(t) if t in TYPES else 0 for t in scene.types]
+
+    first, second = overlapping_pairs(x1, y1, x2, y2)
+    if np is not None:
+        t = np.asarray(type_ids, dtype=np.int64)
+        keep = np.asarray(CONFLICTS, dtype=bool)[t[first], t[second]]
+        first, second = first[keep].tolist(), second[keep].tolist()
+    else:
+        pairs = [(a, b) for a, b in zip(first, second) if CONFLICTS[type_ids[a]][type_ids[b]]]
+        first, second = [a for a, _ in pairs], [b for _, b in pairs]
+    types = scene.types
+    for a, b in zip(first, second):
+        issues.append(Issue(overlap_kind(types[a], types[b]), (a, b) if a < b else (b, a)))
+
+    if np is not None:
+        hw, hh = world_w / 2 + EPS, world_h / 2 + EPS
+        out = np.flatnonzero((x1 < -hw) | (x2 > hw) | (y1 < -hh) | (y2 > hh)).tolist()
+    else:
+        out = [r for r in range(n) if outside_world(x1[r], y1[r], x2[r], y2[r], world_w, world_h)]
+    issues.extend(Issue("outside_world", (r,)) for r in out)
+
+    for r in range(n):
+        if types[r] == "agent" and agent_outside_limits(float(scene.x[r]), float(scene.y[r])):
+            issues.append(Issue("agent_limits", (r,)))
+    return issues
+
+
+# What each rule reports, in the CLI and in the properties panel
+RULE_TEXT = {
+    "overlap": "solid objects overlap",
+    "goal_in_wall": "goal location inside a wall",
+    "agent_limits": f"agent starts outside its limits {list(AGENT_LIMITS)}",
+    "outside_world": "outside the world",
+}
+
+
+def describe(issue, names):
+    # One line per issue, naming the rule that fired; names is the scene's name column
+    return f"{' and '.join(names[r] for r in issue.rows)}: {RULE_TEXT[issue.kind]}"
+
+
+class LiveValidator:
+    # Keeps the editor's problem set current. A full sweep runs after loads;
+    # between them only objects reported through touch() are rechecked, against
+    # the neighbours the spatial index returns. Checks run from root.after at
+    # most every VALIDATE_MS, and only objects whose state flips are restyled.
+
+    def __init__(self, app, interval_ms=VALIDATE_MS):
+        self.app = app
+        self.interval_ms = interval_ms
+        self.partners = {}  # obj -> objects it conflicts with
+        self.rules = {}  # obj -> rule kinds it breaks
+        self.flagged = set()
+        self.pending = set()
+        self.full = False
+        self._after_id = None
+
+    def reset(self):
+        self.cancel()
+        self.partners.clear()
+        self.rules.clear()
+        self.flagged.clear()
+        self.pending.clear()
+        self.full = False
+
+    def cancel(self):
+        if self._after_id is not None:
+            self.app.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def touch(self, obj):
+        self.pending.add(obj)
+        self._schedule()
+
+    def revalidate(self):
+        self.full = True
+        self._schedule()
+
+    def discard(self, objs):
+        # Removed objects take their conflicts with them
+        changed = set()
+        for obj in objs:
+            self.pending.discard(obj)
+            self.rules.pop(obj, None)
+            for other in self.partners.pop(obj, ()):
+                self.partners[other].discard(obj)
+                changed.add(other)
+            self.flagged.discard(obj)
+        self._restyle(changed - set(objs))
+
+    def issues_for(self, obj):
+        out = [RULE_TEXT[kind] for kind in sorted(self.rules.get(obj, ()))]
+        out.extend(f"{RULE_TEXT[overlap_kind(obj.obj_type, o.obj_type)]}: {o.name}"
+                   for o in sorted(self.partners.get(obj, ()), key=lambda o: o.name))
+        return out
+
+    def _schedule(self):
+        if self._after_id is None:
+            self._after_id = self.app.root.after(self.interval_ms, self.run)
+
+    def run(self):
+        self._after_id = None
+        if self.app.loader:  # the sweep after loading covers everything
+            self.pending.clear()
+            return
+        if self.full:
+            self._run_full()
+        elif self.pending:
+            self._run_incremental()
+        self.app.renderer.mark_panel()
+
+    def _run_full(self):
+        app = self.app
+        self.full = False
+        self.pending.clear()
+        owners = app.scene.owners
+        partners, rules = {}, {}
+        for issue in validate_scene(app.scene, app.world_w, app.world_h):
+            if len(issue.rows) == 2:
+                a, b = owners[issue.rows[0]], owners[issue.rows[1]]
+                partners.setdefault(a, set()).add(b)
+                partners.setdefault(b, set()).add(a)
+            else:
+                rules.setdefault(owners[issue.rows[0]], set()).add(issue.kind)
+        self.partners, self.rules = partners, rules
+        self._restyle(set(self.flagged) | set(partners) | set(rules))
+
+    def _run_incremental(self):
+        app = self.app
+        pending, self.pending = self.pending, set()
+        changed = set()
+        for obj in pending:
+            if obj.row is None: continue
+            changed.add(obj)
+            for other in self.partners.pop(obj, ()):
+                self.partners[other].discard(obj)
+                changed.add(other)
+
+            x1, y1, x2, y2 = obj.x - obj.width / 2, obj.y - obj.height / 2, obj.x + obj.width / 2, obj.y + obj.height / 2
+            found = set()
+            # Same rule as overlapping_pairs: a box without area overlaps nothing
+            for other in app.spatial.query_rect(x1, y1, x2, y2) if has_area(x1, y1, x2, y2) else ():
+                if other is obj or not conflicts(obj.obj_type, other.obj_type): continue
+                ox1, oy1 = other.x - other.width / 2, other.y - other.height / 2
+                ox2, oy2 = other.x + other.width / 2, other.y + other.height / 2
+                if (x1 < ox2 - EPS and ox1 < x2 - EPS and y1 < oy2 - EPS and oy1 < y2 - EPS
+                        and has_area(ox1, oy1, ox2, oy2)):
+                    found.add(other)
+                    self.partners.setdefault(other, set()).add(obj)
+                    changed.add(other)
+            if found: self.partners[obj] = found
+
+            kinds = set()
+            if outside_world(x1, y1, x2, y2, app.world_w, app.world_h): kinds.add("outside_world")
+            if obj.obj_type == "agent" and agent_outside_limits(obj.x, obj.y): kinds.add("agent_limits")
+            if kinds:
+                self.rules[obj] = kinds
+            else:
+                self.rules.pop(obj, None)
+        self._restyle(changed)
+
+    def _restyle(self, objs):
+        itemconfig = self.app.canvas.itemconfig
+        for obj in objs:
+            bad = bool(self.partners.get(obj)) or obj in self.rules
+            if not self.partners.get(obj): self.partners.pop(obj, None)
+            if bad == (obj in self.flagged): continue
+            if bad:
+                self.flagged.add(obj)
+            else:
+                self.flagged.discard(obj)
+            if obj.text_id is not None:
+                itemconfig(obj.text_id, fill=COLOR_ISSUE if bad else "black")
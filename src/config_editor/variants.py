@@ -0,0 +1,159 @@
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from .constants import DEFAULT_WORLD_SIZE, GOAL_TYPES
+from .io_utils import as_records, generate_g_string, parse_g_file, random_color, write_atomic
+from .validation import EPS, agent_outside_limits, conflicts
+
+# Variation spec, loaded from JSON over these defaults. Per-type maps use the
+# object types build_object produces.
+DEFAULT_SPEC = {
+    "jitter": {"movable": 0.2, "goal_object": 0.2, "goal_location": 0.2, "agent": 0.2},  # +- world units
+    "scale": {},  # +- fraction of the template size, e.g. {"movable": 0.1}
+    "recolor": ["movable"],  # types that get a random color (goal pairs only when resampled)
+    "goal_pairs": None,  # None jitters the template's pairs; n or [min, max] resamples them
+    "goal_size": [0.3, 0.3],  # size of resampled goal objects and locations, as add_goal_pair
+    "world": [DEFAULT_WORLD_SIZE, DEFAULT_WORLD_SIZE],
+    "attempts": 100,  # placements tried per object before the sample is rejected
+    "retries": 20,  # rejected samples per variant before it fails
+}
+
+
+class VariantError(ValueError):
+    pass
+
+
+def load_spec(path=None):
+    spec = dict(DEFAULT_SPEC)
+    if path:
+        with open(path) as f:
+            user = json.load(f)
+        unknown = set(user) - set(DEFAULT_SPEC)
+        if unknown:
+            raise ValueError(f"unknown spec keys: {', '.join(sorted(unknown))}")
+        spec.update(user)
+    return spec
+
+
+def _box(d):
+    hw, hh = d['w'] / 2, d['h'] / 2
+    return d['x'] - hw, d['y'] - hh, d['x'] + hw, d['y'] + hh
+
+
+def _fits(obj, placed, world):
+    # Inside the world (and the agent inside its limits), clear of every placed
+    # object it may not overlap under the validation rules
+    x1, y1, x2, y2 = _box(obj)
+    hw, hh = world[0] / 2 + EPS, world[1] / 2 + EPS
+    if x1 < -hw or x2 > hw or y1 < -hh or y2 > hh: return False
+    if obj['type'] == "agent" and agent_outside_limits(obj['x'], obj['y']): return False
+    for other in placed:
+        if not conflicts(obj['type'], other['type']): continue
+        ox1, oy1, ox2, oy2 = _box(other)
+        if x1 < ox2 - EPS and ox1 < x2 - EPS and y1 < oy2 - EPS and oy1 < y2 - EPS:
+            return False
+    return True
+
+
+def _place(sample, placed, spec):
+    for _ in range(spec['attempts']):
+        obj = sample()
+        if _fits(obj, placed, spec['world']):
+            placed.append(obj)
+            return obj
+    return None
+
+
+def sample_variant(template, spec, rng):
+    # One candidate level as parsed dicts, or None when an object found no free spot.
+    # Objects that neither move nor scale are kept as they are and placed first.
+    resample = spec['goal_pairs'] is not None
+    keep = [d for d in template if not (resample and d['type'] in GOAL_TYPES)]
+    jitter, scale, recolor = spec['jitter'], spec['scale'], set(spec['recolor']) - set(GOAL_TYPES)
+
+    placed = []
+    out = [None] * len(keep)
+    for i, d in enumerate(keep):
+        if not jitter.get(d['type']) and not scale.get(d['type']):
+            out[i] = dict(d, color=random_color(rng) if d['type'] in recolor else d['color'])
+            placed.append(out[i])
+
+    for i, d in enumerate(keep):
+        if out[i] is not None: continue
+        j, s = jitter.get(d['type'], 0), scale.get(d['type'], 0)
+        color = random_color(rng) if d['type'] in recolor else d['color']
+
+        def sample(d=d, j=j, s=s, color=color):
+            k = 1 + rng.uniform(-s, s) if s else 1
+            return dict(d, x=d['x'] + rng.uniform(-j, j), y=d['y'] + rng.uniform(-j, j),
+                        w=d['w'] * k, h=d['h'] * k, color=color)
+
+        out[i] = _place(sample, placed, spec)
+        if out[i] is None: return None
+
+    if resample:
+        pairs = spec['goal_pairs']
+        count = rng.randint(*pairs) if isinstance(pairs, (list, tuple)) else pairs
+        gw, gh = spec['goal_size']
+        hw, hh = spec['world'][0] / 2, spec['world'][1] / 2
+        taken = {d['full_name'] for d in keep}
+        pair_id = 0
+        for _ in range(count):
+            pair_id += 1
+            while f"obj{pair_id}" in taken or f"goal{pair_id}" in taken:
+                pair_id += 1
+            color = random_color(rng)
+            for name, otype in ((f"obj{pair_id}", "goal_object"), (f"goal{pair_id}", "goal_location")):
+                def sample(name=name, otype=otype):
+                    return {'name': name, 'full_name': name, 'w': gw, 'h': gh,
+                            'x': rng.uniform(gw / 2 - hw, hw - gw / 2), 'y': rng.uniform(gh / 2 - hh, hh - gh / 2),
+                            'type': otype, 'color': color}
+
+                obj = _place(sample, placed, spec)
+                if obj is None: return None
+                out.append(obj)
+    return out
+
+
+def make_variant(template, spec, seed, index):
+    # Deterministic in (seed, index) alone, so any worker can produce any variant
+    rng = random.Random(f"{seed}:{index}")
+    for _ in range(spec['retries']):
+        objs = sample_variant(template, spec, rng)
+        if objs is not None: return objs
+    raise VariantError(f"no collision-free sample in {spec['retries']} tries")
+
+
+def write_variant(template, base_file, spec, seed, out_pattern, index):
+    try:
+        objs = make_variant(template, spec, seed, index)
+        path = out_pattern.format(index=index)
+        content = generate_g_string(as_records(objs), base_file)
+        write_atomic(path, lambda f: f.write(content))
+        return index, path, None
+    except Exception as e:
+        return index, None, f"{type(e).__name__}: {e}"
+
+
+def generate_variants(template_path, count, out_dir, spec=None, seed=0, jobs=None, start=0):
+    # Writes variants start..start+count-1 of the template into out_dir and
+    # yields (index, path, error) per variant, in index order
+    with open(template_path) as f:
+        template, base_file = parse_g_file(f.read())
+    spec = spec or load_spec()
+    os.makedirs(out_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(template_path))[0]
+    width = max(5, len(str(start + count - 1)))
+    out_pattern = os.path.join(out_dir, f"{stem}_{{index:0{width}d}}.g")
+
+    worker = partial(write_variant, template, base_file, spec, seed, out_pattern)
+    indices = range(start, start + count)
+    if jobs == 1:
+        yield from map(worker, indices)
+        return
+    chunksize = max(1, count // ((jobs or os.cpu_count() or 1) * 8))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(worker, indices, chunksize=chunksize)
@@ -0,0 +1,130 @@
+import os
+import queue
+import threading
+
+from .constants import WATCH_POLL_MS
+from .document import GDocument
+
+FIELDS = ('x', 'y', 'w', 'h', 'type', 'color')
+
+
+def file_stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def document_records(document):
+    return {node.name: node.record for node in document.nodes}
+
+
+def read_records(path):
+    # (GDocument, {full name: record}) of one version of the file
+    with open(path, "rb") as f:
+        document = GDocument(f.read())
+    return document, document_records(document)
+
+
+def diff_records(old, new):
+    # Name-level delta between two versions of a file: records of added and
+    # changed objects, names of removed ones
+    added = [rec for name, rec in new.items() if name not in old]
+    removed = [name for name in old if name not in new]
+    changed = [rec for name, rec in new.items()
+               if name in old and any(rec[k] != old[name][k] for k in FIELDS)]
+    return added, removed, changed
+
+
+class FileWatcher:
+    # Polls one file's (mtime, size) from a worker thread. A change is parsed
+    # on the worker, once the stat has stayed put for a whole poll (so a file
+    # caught mid-write is not read), and diffed by name against the previous
+    # version. on_change(document, added, removed, changed) runs on the Tk
+    # thread with only the delta, so applying it costs what changed, not the
+    # size of the file.
+    #
+    # document, the GDocument the scene was loaded from, is the first baseline
+    # when it carries a stat: a write landing between the load and start is
+    # then reported, where re-reading the file would swallow it.
+
+    def __init__(self, app, path, on_change, interval_ms=WATCH_POLL_MS, document=None):
+        self.app = app
+        self.path = path
+        self.on_change = on_change
+        self.document = document
+        self.interval = interval_ms / 1000
+        self.interval_ms = interval_ms
+        self.results = queue.Queue()
+        self.stop_event = threading.Event()
+        self.resync_event = threading.Event()
+        self.thread = threading.Thread(target=self._work, daemon=True)
+        self._poll_id = None
+
+    def start(self):
+        self.thread.start()
+        self._poll_id = self.app.root.after(self.interval_ms, self._poll)
+
+    def resync(self):
+        # The editor wrote the file itself: take it as the new baseline, without a reload
+        self.resync_event.set()
+
+    def stop(self):
+        self.stop_event.set()
+        if self._poll_id is not None:
+            self.app.root.after_cancel(self._poll_id)
+            self._poll_id = None
+
+    # --- TK THREAD ---
+
+    def _poll(self):
+        self._poll_id = None
+        while True:
+            try:
+                change = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if not self.stop_event.is_set(): self.on_change(*change)
+        if not self.stop_event.is_set():
+            self._poll_id = self.app.root.after(self.interval_ms, self._poll)
+
+    # --- WORKER THREAD ---
+
+    def _work(self):
+        document, self.document = self.document, None
+        if document is not None and document.stat is not None:
+            stat, records = document.stat, document_records(document)
+        else:
+            stat, records = self._baseline()
+        pending = None
+        while not self.stop_event.wait(self.interval):
+            if self.resync_event.is_set():
+                self.resync_event.clear()
+                stat, records = self._baseline()
+                pending = None
+                continue
+            current = file_stat(self.path)
+            if current is None or current == stat:
+                pending = None
+                continue
+            if current != pending:
+                pending = current
+                continue
+            try:
+                document, new = read_records(self.path)
+            except (OSError, UnicodeDecodeError):
+                continue
+            if file_stat(self.path) != current: continue  # rewritten while we read it
+            stat, pending = current, None
+            added, removed, changed = diff_records(records, new)
+            records = new
+            # Sent even when no object changed: the document's bytes still moved on
+            self.results.put((document, added, removed, changed))
+
+    def _baseline(self):
+        stat = file_stat(self.path)
+        try:
+            return stat, read_records(self.path)[1]
+        except (OSError, UnicodeDecodeError):
+            return stat, {}
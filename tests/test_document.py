@@ -0,0 +1,164 @@
+import random
+
+import pytest
+
+from common import make_scene
+from config_editor.document import DocumentReader, GDocument
+from config_editor.io_utils import generate_g_string, parse_g_file
+from config_editor.scene import SceneModel, SceneRow
+
+NON_ASCII = '''Include: <../base-walls-min.g>
+
+// hand written
+wänd1 (world){ shape:ssBox, Q:"t(0.5 -1 0.3)", size:[0.1 1.5 0.6 .02], color:[0.69 0.51 0.45], contact: 1 }
+
+障碍Joint(world){ Q:[0.0 0.0 0.1] }
+障碍(障碍Joint) { shape:ssBox, Q:"t(1 1 .0)", size:[0.3 1.2 .2 .02], logical:{ movable_o }, color:[1 1 1], joint:rigid, contact: 1 }
+
+a—b (world){ shape:ssBox, Q:[2 2], size:[1 1] }
+'''
+
+
+class Obj(SceneRow):
+    __slots__ = ()
+
+
+def load(data):
+    # What the editor holds after loading: one object per record, bound to the document
+    document = GDocument(data)
+    scene = SceneModel.from_parsed(parse_g_file(data.decode())[0])
+    objs = [Obj(scene, row) for row in range(len(scene))]
+    scene.owners[:] = objs
+    document.bind(objs)
+    return document, scene, objs
+
+
+def save(document):
+    return b"".join(document.pieces())
+
+
+def summary(records):
+    return [(r['full_name'], r['type'], round(r['x'], 3), round(r['y'], 3), round(r['w'], 3), round(r['h'], 3))
+            for r in records]
+
+
+def same_colors(a, b):
+    # Writing goes through 4-decimal floats, so a channel may come back one off
+    def channels(c): return [int(c[i:i + 2], 16) for i in (1, 3, 5)] if c.startswith("#") else c
+    return all(x['color'] == y['color'] or (
+        x['color'].startswith("#") and all(abs(p - q) <= 1 for p, q in zip(channels(x['color']), channels(y['color']))))
+        for x, y in zip(a, b))
+
+
+@pytest.mark.parametrize("data", [make_scene(300, seed=1).encode(), NON_ASCII.encode(), b""])
+def test_untouched_document_round_trips(data):
+    document, _, objs = load(data)
+    assert [node.name for node in document.nodes] == [o.name for o in objs]
+    assert save(document) == data
+
+
+def test_reader_records_and_spans_come_from_one_pass(tmp_path):
+    path = tmp_path / "level.g"
+    data = (make_scene(200, seed=2) + NON_ASCII).encode()
+    path.write_bytes(data)
+    with DocumentReader(str(path)) as reader:
+        records = list(reader)
+        document = reader.document()
+    assert records == parse_g_file(data.decode())[0]
+    assert document.data == data
+    scanned = GDocument(data)
+    assert [(n.name, n.start, n.end, n.name_span, n.values) for n in document.nodes] == \
+           [(n.name, n.start, n.end, n.name_span, n.values) for n in scanned.nodes]
+
+
+def test_reader_without_a_pass_scans_on_demand(tmp_path):
+    path = tmp_path / "level.g"
+    path.write_bytes(NON_ASCII.encode())
+    with DocumentReader(str(path)) as reader:
+        document = reader.document()
+    assert [n.name for n in document.nodes] == ["wänd1", "障碍", "b"]
+    assert document.nodes[1].joint is document.others["障碍Joint"]
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_splice_matches_regenerated_file(seed):
+    # Random edits, spliced: the saved file parses to what writing the scene
+    # from scratch gives, and nodes nobody touched keep their bytes
+    data = make_scene(120, seed=seed).encode()
+    document, scene, objs = load(data)
+    rng = random.Random(seed)
+    touched = set()
+    for obj in rng.sample(objs, 30):
+        edit = rng.choice(["move", "size", "color", "rename", "delete"])
+        if edit == "move":
+            obj.x, obj.y = rng.uniform(-4, 4), rng.uniform(-4, 4)
+        elif edit == "size":
+            obj.width, obj.height = rng.uniform(0.1, 2), rng.uniform(0.1, 2)
+        elif edit == "color" and obj.obj_type != "agent":
+            obj.color = "#%06x" % rng.randrange(1 << 24)
+        elif edit == "rename" and obj.obj_type != "agent":
+            obj.name = obj.name + "x"
+        elif edit == "delete":
+            scene.remove([obj.row])
+        document.touch(obj)
+        touched.add(obj)
+    new = Obj(scene, None)
+    new.row = scene.append("wall900", 1.0, 2.0, 0.5, 0.5, "wall", "brown", new)
+    document.touch(new)
+
+    saved = save(document)
+    expected = parse_g_file(generate_g_string(scene.records()))[0]
+    got = parse_g_file(saved.decode())[0]
+    assert summary(got) == summary(expected)
+    assert same_colors(got, expected)
+    for obj in objs:
+        if obj not in touched:
+            node = document.bound[obj]
+            assert data[node.start:node.end] in saved
+
+
+def test_rename_keeps_non_ascii_neighbours():
+    document, scene, objs = load(NON_ASCII.encode())
+    objs[1].name = "hindernis"
+    document.touch(objs[1])
+    saved = save(document).decode()
+    assert "hindernisJoint(world)" in saved and "hindernis(hindernisJoint)" in saved
+    assert "wänd1 (world)" in saved and "a—b (world)" in saved and "// hand written" in saved
+    assert [o['full_name'] for o in parse_g_file(saved)[0]] == ["wänd1", "hindernis", "b"]
+
+
+def test_delete_takes_the_joint_along():
+    document, scene, objs = load(NON_ASCII.encode())
+    scene.remove([objs[1].row])
+    document.touch(objs[1])
+    saved = save(document).decode()
+    assert "障碍" not in saved
+    assert [o['full_name'] for o in parse_g_file(saved)[0]] == ["wänd1", "b"]
+
+
+def test_shared_parent_is_not_a_joint():
+    # A goal hung under floor: deleting or renaming it leaves floor alone
+    data = NON_ASCII.encode() + (
+        b'floor (world){ shape:ssBox, Q:[0 0 0], size:[6 6 .1], color:[0.9 0.9 0.9] }\n'
+        b'goal1 (floor){ shape:ssBox, Q:"t(-1 -1 0)", size:[0.3 0.3 .2 .02], color:[1 0 0], logical:{goal}, contact:0 }\n')
+    document, scene, objs = load(data)
+    goal = objs[-1]
+    assert goal.name == "goal1" and document.bound[goal].joint is None
+    goal.name = "goal7"
+    document.touch(goal)
+    saved = save(document)
+    assert b"floor (world){" in saved and b"goal7 (floor){" in saved
+
+    scene.remove([goal.row])
+    document.touch(goal)
+    saved = save(document)
+    assert b"floor (world){" in saved and b"goal" not in saved
+    assert saved == data[:data.index(b"goal1 (floor)")]
+
+
+def test_objects_gone_before_bind_keep_shared_parents():
+    data = b'floor (world){ shape:ssBox, Q:[0 0 0], size:[6 6 .1] }\n' \
+           b'goal1 (floor){ shape:ssBox, Q:[1 1 0], size:[0.3 0.3], color:[1 0 0], logical:{goal}, contact:0 }\n'
+    document = GDocument(data)
+    document.bind([])  # the goal was deleted while loading
+    assert save(document) == data[:data.index(b"goal1")]
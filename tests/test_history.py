@@ -0,0 +1,124 @@
+from config_editor.history import (AddOp, DeleteOp, GeometryOp, History, LinkOp, RecolorOp, RenameOp,
+                                   dangling_links, geometry)
+from config_editor.scene import SceneModel, SceneRow
+
+
+class Obj(SceneRow):
+    __slots__ = ()
+
+
+class Renderer:
+    def mark_links(self): pass
+
+
+class App:
+    # The slice of EditorApp the operations call back into, over a bare SceneModel
+    def __init__(self):
+        self.scene = SceneModel()
+        self.renderer = Renderer()
+
+    def add(self, name, x=0.0, y=0.0, obj_type="wall", color="red"):
+        obj = Obj(self.scene, None)
+        obj.row = self.scene.append(name, x, y, 1.0, 1.0, obj_type, color, obj)
+        return obj
+
+    def set_geometry(self, objs, values):
+        for obj, (x, y, w, h) in zip(objs, values):
+            obj.x, obj.y, obj.width, obj.height = x, y, w, h
+
+    def set_name(self, obj, name):
+        obj.name = name
+
+    def set_colors(self, objs, colors):
+        for obj, color in zip(objs, colors):
+            obj.color = color
+
+    def delete_objects(self, objs):
+        snapshots = [(o.name, *geometry(o), o.obj_type, o.color, o.linked_obj) for o in objs]
+        self.scene.remove([o.row for o in objs])
+        return snapshots
+
+    def restore_objects(self, objs, snapshots):
+        for obj, (name, x, y, w, h, obj_type, color, _) in zip(objs, snapshots):
+            obj.row = self.scene.append(name, x, y, w, h, obj_type, color, obj)
+        for obj, snap in zip(objs, snapshots):
+            obj.linked_obj = snap[-1]
+
+    def state(self):
+        return [(o.name, geometry(o), o.color, o.linked_obj and o.linked_obj.name) for o in self.scene.owners]
+
+
+def test_undo_redo_restores_every_state():
+    app = App()
+    history = History(app)
+    a, b = app.add("wall1"), app.add("wall2", 2.0)
+    states = [app.state()]
+
+    def step(*ops):
+        history.record(*ops)
+        states.append(app.state())
+
+    app.set_geometry([a], [(5.0, 5.0, 2.0, 2.0)])
+    step(GeometryOp([a], [(0.0, 0.0, 1.0, 1.0)], [(5.0, 5.0, 2.0, 2.0)]))
+    app.set_name(b, "wall9")
+    step(RenameOp(b, "wall2", "wall9"))
+    app.set_colors([a, b], ["blue", "blue"])
+    step(RecolorOp([a, b], ["red", "red"], "blue"))
+    c = app.add("wall3")
+    step(AddOp([c]))
+    step(DeleteOp([a], app.delete_objects([a])))
+
+    for expected in reversed(states[:-1]):
+        assert history.undo()
+        assert sorted(app.state()) == sorted(expected)
+    assert not history.undo()
+    for expected in states[1:]:
+        assert history.redo()
+        assert sorted(app.state()) == sorted(expected)
+    assert not history.redo()
+
+
+def test_merge_key_folds_a_gesture():
+    app = App()
+    history = History(app)
+    a = app.add("wall1")
+    for i in range(1, 4):
+        before = geometry(a)
+        app.set_geometry([a], [(float(i), 0.0, 1.0, 1.0)])
+        history.record(GeometryOp([a], [before], [geometry(a)]), merge_key="drag")
+    assert len(history.undo_stack) == 1
+    history.undo()
+    assert geometry(a) == (0.0, 0.0, 1.0, 1.0)
+
+
+def test_limit_and_depth_drop_the_oldest_entries():
+    app = App()
+    objs = [app.add(f"wall{i}") for i in range(10)]
+    history = History(app, limit=5, depth=3)
+    for obj in objs:
+        history.record(RenameOp(obj, obj.name, obj.name))
+    assert len(history.undo_stack) == 3 and history.size == 3
+    history.record(RecolorOp(objs, ["red"] * 10, "red"))
+    assert len(history.undo_stack) == 1 and history.size == 10
+
+
+def test_empty_ops_are_not_recorded():
+    history = History(App())
+    history.record(LinkOp([]), GeometryOp([], [], []))
+    assert not history.undo_stack
+
+
+def test_dangling_links_restore_the_survivors_link():
+    app = App()
+    history = History(app)
+    goal = app.add("goal1", obj_type="goal")
+    obj = app.add("obj1", obj_type="goal_object")
+    obj.linked_obj, goal.linked_obj = goal, obj
+
+    unlinks = dangling_links([goal])
+    assert unlinks.changes == [(obj, goal, None)]
+    history.record(unlinks, DeleteOp([goal], app.delete_objects([goal])))
+    assert obj.linked_obj is None
+    history.undo()
+    assert obj.linked_obj is goal and goal.linked_obj is obj
+    assert dangling_links([goal, obj]).changes == []
@@ -0,0 +1,83 @@
+import os
+
+from config_editor.includes import IncludeCache, parse_include, resolve_includes
+
+
+def box(name, x):
+    return f"{name} (world){{ shape:ssBox, Q:[{x} 0 0.3], size:[1 1 0.6 .02], color:[0.69 0.51 0.45], contact: 1 }}\n"
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return str(path)
+
+
+def names(objs):
+    return [o['full_name'] for o in objs]
+
+
+def test_nested_includes_come_before_their_includer(tmp_path):
+    write(tmp_path / "base" / "floor.g", box("floor", 0) + box("wall_north", 1))
+    write(tmp_path / "base" / "walls.g", "Include: <floor.g>\n" + box("pillar", 2))
+    level = write(tmp_path / "levels" / "level.g", "Include: <../base/walls.g>\n" + box("wall1", 3))
+    objs, problems = resolve_includes(["<../base/walls.g>"], level, IncludeCache())
+    assert names(objs) == ["floor", "wall_north", "pillar"]
+    assert problems == []
+
+
+def test_missing_files_are_reported_and_skipped(tmp_path):
+    write(tmp_path / "a.g", box("a", 0))
+    level = write(tmp_path / "level.g", "")
+    objs, problems = resolve_includes(["<gone.g>", "<a.g>"], level, IncludeCache())
+    assert names(objs) == ["a"]
+    assert len(problems) == 1 and problems[0].startswith("<gone.g>")
+
+
+def test_cycle_skips_only_the_closing_edge(tmp_path):
+    write(tmp_path / "a.g", "Include: <b.g>\n" + box("a", 0))
+    write(tmp_path / "b.g", "Include: <a.g>\n" + box("b", 1))
+    level = write(tmp_path / "level.g", "Include: <a.g>\n")
+    objs, problems = resolve_includes(["<a.g>"], level, IncludeCache())
+    assert names(objs) == ["b", "a"]
+    assert problems == ["<a.g>: include cycle a.g -> b.g -> a.g"]
+
+
+def test_non_utf8_include_is_read(tmp_path):
+    path = tmp_path / "latin1.g"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(box("wand", 0).encode() + "// Wände\n".encode("latin-1") + box("pillar", 1).encode())
+    level = write(tmp_path / "level.g", "")
+    objs, problems = resolve_includes(["<latin1.g>"], level, IncludeCache())
+    assert names(objs) == ["wand", "pillar"] and problems == []
+
+
+def test_diamond_is_not_a_cycle(tmp_path):
+    write(tmp_path / "shared.g", box("shared", 0))
+    write(tmp_path / "a.g", "Include: <shared.g>\n")
+    write(tmp_path / "b.g", "Include: <shared.g>\n")
+    level = write(tmp_path / "level.g", "")
+    cache = IncludeCache()
+    objs, _ = resolve_includes(["<a.g>", "<b.g>"], level, cache)
+    assert names(objs) == ["shared", "shared"]
+    assert cache.misses == 3 and cache.hits == 1
+
+
+def test_cache_reparses_changed_files_and_evicts_lru(tmp_path):
+    paths = [write(tmp_path / f"{i}.g", box(f"b{i}", i)) for i in range(3)]
+    cache = IncludeCache(maxsize=2)
+    assert cache.get(paths[0]) == parse_include(paths[0])
+    cache.get(paths[0])
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    write(tmp_path / "0.g", box("changed", 0))
+    st = os.stat(paths[0])
+    os.utime(paths[0], ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert names(cache.get(paths[0])[0]) == ["changed"]
+    assert cache.misses == 2
+
+    cache.get(paths[1])
+    cache.get(paths[2])
+    assert len(cache.entries) == 2
+    cache.get(paths[0])
+    assert cache.misses == 5
@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from config_editor.names import NameRegistry, split_name
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("wall12", ("wall", 12)), ("wall_3", ("wall", 3)), ("ego", ("ego", None)), ("7", ("", 7)),
+])
+def test_split_name(name, expected):
+    assert split_name(name) == expected
+
+
+def scan_max_suffix(names, stem):
+    # What the editor did before the registry: a pass over every name
+    return max((num for s, num in map(split_name, names) if s == stem and num is not None), default=0)
+
+
+def test_max_suffix_matches_scan():
+    rng = random.Random(1)
+    registry, live = NameRegistry(), []
+    for _ in range(3000):
+        if live and rng.random() < 0.45:
+            registry.remove(live.pop(rng.randrange(len(live))))
+        else:
+            name = f"{rng.choice(['wall', 'obj', 'goal', 'mov_'])}{rng.randint(1, 40)}"
+            registry.add(name)
+            live.append(name)
+        for stem in ("wall", "obj", "goal", "mov"):
+            assert registry.max_suffix(stem) == scan_max_suffix(live, stem)
+    assert len(registry) == len(set(live))
+
+
+def test_stems_are_dropped_when_empty():
+    registry = NameRegistry()
+    for i in range(1, 100):
+        registry.add(f"wall{i}")
+    for i in range(1, 100):
+        registry.remove(f"wall{i}")
+    assert not registry.suffixes and not registry.heaps and not registry.counts
+    assert registry.next_name("wall") == "wall1"
+
+
+def test_heap_stays_bounded_under_churn():
+    registry = NameRegistry()
+    registry.add("wall1")
+    for _ in range(1000):
+        registry.add("wall5")
+        registry.remove("wall5")
+    assert len(registry.heaps["wall"]) <= 2 * len(registry.suffixes["wall"]) + 9
+    assert registry.max_suffix("wall") == 1
+
+
+def test_duplicates_are_counted():
+    registry = NameRegistry()
+    registry.add("wall3")
+    registry.add("wall3")
+    registry.remove("wall3")
+    assert "wall3" in registry and registry.next_name("wall") == "wall4"
+
+
+def test_next_pair_id_reuses_the_lowest_free_id():
+    registry = NameRegistry()
+    for name in ("obj1", "goal1", "obj2", "goal3"):
+        registry.add(name)
+    assert registry.next_pair_id() == 4
+    registry.remove("obj2")
+    assert registry.next_pair_id() == 2
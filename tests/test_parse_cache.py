@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from common import make_scene
+from config_editor import parse_cache
+from config_editor.io_utils import parse_g_file
+from config_editor.parse_cache import cache_path, load_cached, pack, parse_g_file_cached, unpack
+
+
+def write(tmp_path, text, name="level.g"):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("n", [0, 1, 400])
+def test_pack_round_trips(n):
+    objs, base_file = parse_g_file(make_scene(n, seed=n))
+    objs.append({'name': 'wänd', 'full_name': 'wänd_2', 'w': 1.0, 'h': 2.0, 'x': -0.5, 'y': 1e-9,
+                 'type': 'wall', 'color': 'brown'})
+    buf = b"".join(pack(objs, [base_file, "<x.g>"], 123, 456))
+    assert unpack(buf, 123, 456) == (objs, [base_file, "<x.g>"])
+    assert unpack(buf, 124, 456) is None
+    assert unpack(buf[:10], 123, 456) is None
+
+
+def test_second_parse_is_served_from_the_cache(tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    text = make_scene(300, seed=1)
+    path = write(tmp_path, text)
+    first = parse_g_file_cached(path, cache_dir)
+    assert first == parse_g_file(text)
+    assert os.path.exists(cache_path(path, cache_dir))
+
+    def no_parse(content): raise AssertionError("parsed again")
+    monkeypatch.setattr(parse_cache, "parse_g_file", no_parse)
+    assert parse_g_file_cached(path, cache_dir) == first
+
+
+def test_changed_source_is_reparsed(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    path = write(tmp_path, make_scene(50, seed=2))
+    parse_g_file_cached(path, cache_dir)
+    text = make_scene(60, seed=3)
+    write(tmp_path, text)
+    assert parse_g_file_cached(path, cache_dir) == parse_g_file(text)
+
+
+def test_by_hash_survives_a_touch(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    path = write(tmp_path, make_scene(50, seed=4))
+    parse_g_file_cached(path, cache_dir, by_hash=True)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert load_cached(path, cache_dir) is None
+    assert load_cached(path, cache_dir, parse_cache.content_digest(path)) is not None
+
+
+@pytest.mark.parametrize("keep", [0, 20, 100])
+def test_damaged_cache_is_a_miss(tmp_path, keep):
+    cache_dir = str(tmp_path / "cache")
+    text = make_scene(50, seed=5)
+    path = write(tmp_path, text)
+    parse_g_file_cached(path, cache_dir)
+    entry = cache_path(path, cache_dir)
+    with open(entry, "rb") as f:
+        data = f.read()
+    with open(entry, "wb") as f:
+        f.write(data[:keep])
+    assert load_cached(path, cache_dir) is None
+    assert parse_g_file_cached(path, cache_dir) == parse_g_file(text)
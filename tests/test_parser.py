@@ -0,0 +1,37 @@
+import math
+
+import pytest
+
+from bench_parse import legacy_parse_g_file
+from common import make_scene
+from config_editor.io_utils import parse_floats, parse_g_file
+
+
+@pytest.mark.parametrize("n", [0, 1, 50, 2000])
+def test_matches_legacy_parser(n):
+    content = make_scene(n, seed=n)
+    assert parse_g_file(content) == legacy_parse_g_file(content)
+
+
+def test_exponents():
+    assert parse_floats("1e-3 2.5E2 -4") == [0.001, 250.0, -4.0]
+
+
+@pytest.mark.parametrize("text", ["inf 0 0.3", "nan 0 0.3", "-inf 0 0.3", "infinity 0 0.3"])
+def test_non_finite_tokens_are_not_numbers(text):
+    assert parse_floats(text) == [0.0, 0.3]
+
+
+def test_overflow_is_dropped():
+    assert parse_floats("1e999 2") == [2.0]
+
+
+def test_underscores_are_not_digit_separators():
+    assert parse_floats("1_000 2") == [1.0, 0.0, 2.0]
+
+
+@pytest.mark.parametrize("value", ["inf", "nan"])
+def test_non_finite_position_parses_finite(value):
+    objs, _ = parse_g_file(f'box (world){{ shape:ssBox, Q:[{value} 0], size:[1 1] }}')
+    assert len(objs) == 1
+    assert all(math.isfinite(objs[0][k]) for k in "xywh")
@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from common import make_scene
+from config_editor.io_utils import parse_g_file
+from config_editor.raster import CHANNEL_OF_TYPE, EPS, grid_shape, load_grid, rasterize, rasterize_to_npy
+from config_editor.scene import SceneModel
+
+RES, WORLD = 10, 6.0
+
+
+def naive_rasterize(objs):
+    # A cell is set when its overlap with a box is wider and taller than EPS cells
+    grid = np.zeros(grid_shape(RES, WORLD, WORLD), dtype=np.uint8)
+    _, rows, cols = grid.shape
+    for d in objs:
+        bx1, bx2 = d['x'] - d['w'] / 2, d['x'] + d['w'] / 2
+        by1, by2 = d['y'] - d['h'] / 2, d['y'] + d['h'] / 2
+        for r in range(rows):
+            cy2 = WORLD / 2 - r / RES
+            cy1 = cy2 - 1 / RES
+            if (min(by2, cy2) - max(by1, cy1)) * RES <= EPS: continue
+            for c in range(cols):
+                cx1 = c / RES - WORLD / 2
+                if (min(bx2, cx1 + 1 / RES) - max(bx1, cx1)) * RES > EPS:
+                    grid[CHANNEL_OF_TYPE[d['type']], r, c] = 1
+    return grid
+
+
+def random_objs(n, seed, lattice):
+    # lattice: edges on cell borders, the case EPS is there for
+    rng = random.Random(seed)
+    objs = []
+    for _ in range(n):
+        if lattice:
+            x, y = rng.randint(-35, 35) / RES, rng.randint(-35, 35) / RES
+            w, h = rng.randint(0, 8) / RES * 2, rng.randint(0, 8) / RES * 2
+        else:
+            x, y = rng.uniform(-3.5, 3.5), rng.uniform(-3.5, 3.5)
+            w, h = rng.uniform(0, 1.5), rng.uniform(0, 1.5)
+        objs.append({'name': 'b', 'full_name': 'b', 'x': x, 'y': y, 'w': w, 'h': h,
+                     'type': rng.choice(list(CHANNEL_OF_TYPE)), 'color': 'red'})
+    return objs
+
+
+@pytest.mark.parametrize("lattice", [False, True])
+@pytest.mark.parametrize("seed", range(3))
+def test_matches_naive_rasterizer(seed, lattice):
+    objs = random_objs(60, seed, lattice)
+    assert (rasterize(objs, RES, WORLD, WORLD) == naive_rasterize(objs)).all()
+
+
+def test_scene_and_dicts_agree_and_out_is_overwritten():
+    objs = parse_g_file(make_scene(200, seed=1))[0]
+    expected = rasterize(objs, RES, WORLD, WORLD)
+    out = np.ones(grid_shape(RES, WORLD, WORLD), dtype=np.uint8)
+    assert rasterize(SceneModel.from_parsed(objs), RES, WORLD, WORLD, out=out) is out
+    assert (out == expected).all()
+    assert not rasterize([], RES, WORLD, WORLD, out=out).any()
+
+
+def test_npy_round_trip(tmp_path):
+    objs = parse_g_file(make_scene(50, seed=2))[0]
+    path = str(tmp_path / "level.npy")
+    rasterize_to_npy(path, SceneModel.from_parsed(objs), RES, WORLD, WORLD)
+    assert (load_grid(path) == rasterize(objs, RES, WORLD, WORLD)).all()
+    assert not (tmp_path / "level.npy.tmp").exists()
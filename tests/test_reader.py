@@ -0,0 +1,44 @@
+import pytest
+
+from common import make_scene
+from config_editor.io_utils import GFileReader, iter_g_objects, parse_g_file
+
+NON_ASCII = '''Include: <../base-walls-min.g>
+
+wänd1 (world){ shape:ssBox, Q:"t(0.5 -1 0.3)", size:[0.1 1.5 0.6 .02], color:[0.69 0.51 0.45], contact: 1 }
+
+障碍Joint(world){ Q:[0.0 0.0 0.1] }
+障碍(障碍Joint) { shape:ssBox, Q:"t(1 1 .0)", size:[0.3 1.2 .2 .02], logical:{ movable_o }, color:[1 1 1], joint:rigid, contact: 1 }
+
+a—b (world){ shape:ssBox, Q:[2 2], size:[1 1] }
+'''
+
+
+def write(tmp_path, text):
+    path = tmp_path / "level.g"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("n", [0, 1, 500])
+def test_matches_parse_g_file(tmp_path, n):
+    text = make_scene(n, seed=n)
+    assert list(iter_g_objects(write(tmp_path, text))) == parse_g_file(text)[0]
+
+
+def test_non_ascii_names(tmp_path):
+    objs = list(iter_g_objects(write(tmp_path, NON_ASCII)))
+    assert objs == parse_g_file(NON_ASCII)[0]
+    assert [o['full_name'] for o in objs] == ["wänd1", "障碍", "b"]
+
+
+def test_base_file_and_includes(tmp_path):
+    with GFileReader(write(tmp_path, NON_ASCII + "Include: <other.g>\n")) as reader:
+        assert reader.base_file == "<../base-walls-min.g>"
+        assert reader.includes == ["<../base-walls-min.g>", "<other.g>"]
+
+
+def test_empty_file(tmp_path):
+    with GFileReader(write(tmp_path, "")) as reader:
+        assert list(reader) == []
+        assert reader.progress == 1.0
@@ -0,0 +1,94 @@
+import random
+
+import pytest
+
+from common import make_objects, make_scene
+from config_editor.io_utils import generate_g_string, parse_g_file
+from config_editor.scene import NO_LINK, SceneModel, SceneRow
+
+
+class Owner(SceneRow):
+    __slots__ = ()
+
+
+def linked_scene(n, seed):
+    scene = SceneModel.from_parsed(parse_g_file(make_scene(n, seed=seed))[0])
+    for row in range(len(scene)): scene.owners[row] = Owner(scene, row)
+    rng = random.Random(seed)
+    for row in range(0, len(scene), 2):
+        scene.set_link(row, rng.randrange(len(scene)))
+    return scene
+
+
+def snapshot(scene):
+    # Plain-list picture of the rows, links as the linked row's name
+    link = [int(v) for v in scene.link[:len(scene)]]
+    return [(scene.names[r], float(scene.x[r]), float(scene.y[r]), float(scene.w[r]), float(scene.h[r]),
+             scene.types[r], scene.colors[r], None if link[r] == NO_LINK else scene.names[link[r]])
+            for r in range(len(scene))]
+
+
+def test_records_write_like_plain_objects():
+    objects = make_objects(200, seed=1)
+    scene = SceneModel()
+    for o in objects:
+        scene.append(o.name, o.x, o.y, o.width, o.height, o.obj_type, o.color)
+    assert generate_g_string(scene.records()) == generate_g_string(objects)
+
+
+def test_append_matches_extend():
+    parsed = parse_g_file(make_scene(100, seed=2))[0]
+    a = SceneModel.from_parsed(parsed)
+    b = SceneModel()
+    for d in parsed:
+        b.append(d["full_name"], d["x"], d["y"], d["w"], d["h"], d["type"], d["color"])
+    assert snapshot(a) == snapshot(b)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_remove_matches_list_filter(seed):
+    scene = linked_scene(150, seed)
+    before = snapshot(scene)
+    owners = list(scene.owners)
+    rng = random.Random(seed)
+    doomed = set(rng.sample(range(len(scene)), 40))
+    gone = {before[r][0] for r in doomed}
+    scene.remove(doomed)
+    expected = [row[:-1] + (None if row[-1] in gone else row[-1],)
+                for r, row in enumerate(before) if r not in doomed]
+    assert snapshot(scene) == expected
+    assert all(owners[r].row is None for r in doomed)
+    assert [o.row for o in scene.owners] == list(range(len(scene)))
+
+
+def test_geometry_matches_per_row_math():
+    scene = linked_scene(80, seed=7)
+    rows = list(range(0, 80, 3))
+    ppm, ox, oy = 37.5, 400.0, 300.0
+    x1, y1, x2, y2 = scene.pixel_bounds(ppm, ox, oy, rows)
+    for i, r in enumerate(rows):
+        o = scene.owners[r]
+        cx, cy = o.x * ppm + ox, -o.y * ppm + oy
+        assert float(x1[i]) == pytest.approx(cx - o.width * ppm / 2)
+        assert float(y2[i]) == pytest.approx(cy + o.height * ppm / 2)
+        assert float(x2[i]) - float(x1[i]) == pytest.approx(o.width * ppm)
+
+    owners = [scene.owners[r] for r in rows]
+    assert scene.world_bounds(rows) == pytest.approx((
+        min(o.x - o.width / 2 for o in owners), min(o.y - o.height / 2 for o in owners),
+        max(o.x + o.width / 2 for o in owners), max(o.y + o.height / 2 for o in owners)))
+    assert scene.world_bounds([]) is None
+
+    before = [(o.x, o.y, o.width, o.height) for o in owners]
+    scene.move(rows, 1.5, -2.0)
+    scene.scale(rows, 2.0, 1.0, 1.0)
+    for o, (x, y, w, h) in zip(owners, before):
+        assert (o.x, o.y) == pytest.approx((1.0 + (x + 1.5 - 1.0) * 2, 1.0 + (y - 2.0 - 1.0) * 2))
+        assert (o.width, o.height) == pytest.approx((w * 2, h * 2))
+
+
+def test_clear_detaches_owners():
+    scene = linked_scene(10, seed=8)
+    owners = list(scene.owners)
+    scene.clear()
+    assert len(scene) == 0 and all(o.row is None for o in owners)
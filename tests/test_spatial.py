@@ -0,0 +1,86 @@
+import math
+import random
+
+import pytest
+
+from config_editor.spatial import SpatialIndex, object_bounds
+
+
+class Box:
+    def __init__(self, x, y, width, height):
+        self.x, self.y, self.width, self.height = x, y, width, height
+
+
+def random_boxes(n, seed):
+    rng = random.Random(seed)
+    return [Box(rng.uniform(-10, 10), rng.uniform(-10, 10), rng.uniform(0, 3), rng.uniform(0, 3))
+            for _ in range(n)]
+
+
+def brute_rect(boxes, x1, y1, x2, y2, contained=False):
+    hits = []
+    for b in boxes:
+        bx1, by1, bx2, by2 = object_bounds(b)
+        if contained:
+            if bx1 >= x1 and by1 >= y1 and bx2 <= x2 and by2 <= y2: hits.append(b)
+        elif bx1 <= x2 and bx2 >= x1 and by1 <= y2 and by2 >= y1:
+            hits.append(b)
+    return hits
+
+
+def distance(b, x, y):
+    x1, y1, x2, y2 = object_bounds(b)
+    return math.hypot(max(x1 - x, 0, x - x2), max(y1 - y, 0, y - y2))
+
+
+def build(boxes, cell_size=1.0):
+    index = SpatialIndex(cell_size)
+    for b in boxes: index.insert(b)
+    return index
+
+
+@pytest.mark.parametrize("contained", [False, True])
+@pytest.mark.parametrize("cell_size", [0.5, 2.0, 50.0])
+def test_query_rect_matches_brute_force(contained, cell_size):
+    boxes = random_boxes(300, seed=1)
+    index = build(boxes, cell_size)
+    rng = random.Random(2)
+    for _ in range(100):
+        x1, y1 = rng.uniform(-12, 12), rng.uniform(-12, 12)
+        x2, y2 = x1 + rng.uniform(-8, 8), y1 + rng.uniform(-8, 8)
+        expected = brute_rect(boxes, min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2), contained)
+        assert index.query_rect(x1, y1, x2, y2, contained) == expected
+
+
+def test_nearest_matches_brute_force():
+    boxes = random_boxes(200, seed=3)
+    index = build(boxes)
+    rng = random.Random(4)
+    for _ in range(100):
+        x, y = rng.uniform(-30, 30), rng.uniform(-30, 30)
+        best = min(distance(b, x, y) for b in boxes)
+        assert distance(index.nearest(x, y), x, y) == best
+        within = index.nearest(x, y, max_dist=1.0)
+        assert (within is None) == (best > 1.0)
+
+
+def test_update_and_remove_follow_the_objects():
+    boxes = random_boxes(100, seed=5)
+    index = build(boxes)
+    rng = random.Random(6)
+    for b in boxes[:50]:
+        b.x, b.y = rng.uniform(-10, 10), rng.uniform(-10, 10)
+        index.update(b)
+    for b in boxes[50:70]: index.remove(b)
+    live = boxes[:50] + boxes[70:]
+    assert len(index) == len(live)
+    assert set(index.query_rect(-20, -20, 20, 20)) == set(live)
+    assert index.query_rect(-5, -5, 5, 5) == [b for b in index._sorted(live) if b in brute_rect(live, -5, -5, 5, 5)]
+    assert all(index.cells.values())
+
+
+def test_topmost_wins_ties():
+    a, b = Box(0, 0, 1, 1), Box(0, 0, 1, 1)
+    index = build([a, b])
+    assert index.query_point(0, 0) == [a, b]
+    assert index.nearest(0, 0) is b
@@ -0,0 +1,112 @@
+import math
+import random
+
+import pytest
+
+from config_editor.constants import TRACE_MAX_POINTS
+from config_editor.trajectory import HEADER, TrajectoryLog, pack_csv, write_log
+
+
+def sample_tracks(seed):
+    rng = random.Random(seed)
+    tracks = {}
+    for name in ("ego", "obj1", "障碍"):
+        n = rng.randint(2, 200)
+        t = sorted(rng.uniform(0, 10) for _ in range(n))
+        tracks[name] = (t, [rng.uniform(-3, 3) for _ in t], [rng.uniform(-3, 3) for _ in t])
+    return tracks
+
+
+def reference_pose(t, x, y, time):
+    # Linear interpolation written out, clamped to the ends
+    if time <= t[0]: return x[0], y[0]
+    if time >= t[-1]: return x[-1], y[-1]
+    i = max(k for k in range(len(t)) if t[k] <= time)
+    a = (time - t[i]) / (t[i + 1] - t[i]) if t[i + 1] > t[i] else 0.0
+    return x[i] + (x[i + 1] - x[i]) * a, y[i] + (y[i + 1] - y[i]) * a
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    path = str(tmp_path / "run.trj")
+    write_log(path, sample_tracks(1))
+    return path
+
+
+def test_round_trip(log_path):
+    tracks = sample_tracks(1)
+    with TrajectoryLog(log_path) as log:
+        assert [tr.name for tr in log.tracks] == list(tracks)
+        for tr in log.tracks:
+            t, x, y = tracks[tr.name]
+            assert (list(tr.t), list(tr.x), list(tr.y)) == (t, x, y)
+        assert log.samples == sum(len(c[0]) for c in tracks.values())
+        assert log.time_range() == (min(c[0][0] for c in tracks.values()), max(c[0][-1] for c in tracks.values()))
+
+
+def test_pose_at_matches_reference(log_path):
+    tracks = sample_tracks(1)
+    rng = random.Random(2)
+    with TrajectoryLog(log_path) as log:
+        for tr in log.tracks:
+            t, x, y = tracks[tr.name]
+            for time in [t[0] - 1, t[0], t[-1], t[-1] + 1] + [rng.uniform(0, 10) for _ in range(50)]:
+                assert tr.pose_at(time) == pytest.approx(reference_pose(t, x, y, time))
+
+
+def test_trace_is_bounded_and_keeps_the_ends(log_path):
+    with TrajectoryLog(log_path) as log:
+        tr = log.tracks[0]
+        coords = tr.trace(50.0, 300.0, 300.0, max_points=10)
+        assert len(coords) <= 2 * 11 and len(coords) % 2 == 0
+        assert coords[-2:] == [round(float(tr.x[-1]) * 50 + 300), round(-float(tr.y[-1]) * 50 + 300)]
+        assert len(tr.trace(50.0, 300.0, 300.0)) <= 2 * (TRACE_MAX_POINTS + 1)
+
+
+def test_every_truncation_is_a_value_error(tmp_path, log_path):
+    with open(log_path, "rb") as f:
+        data = f.read()
+    cut = str(tmp_path / "cut.trj")
+    for size in sorted({0, 1, HEADER.size - 1, HEADER.size, HEADER.size + 10, 100, len(data) // 2, len(data) - 8}):
+        with open(cut, "wb") as f:
+            f.write(data[:size])
+        with pytest.raises(ValueError):
+            TrajectoryLog(cut)
+
+
+def test_body_count_past_the_end_is_a_value_error(tmp_path, log_path):
+    with open(log_path, "rb") as f:
+        data = bytearray(f.read())
+    magic, _ = HEADER.unpack_from(data)
+    HEADER.pack_into(data, 0, magic, 10 ** 6)
+    bad = tmp_path / "bad.trj"
+    bad.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match="truncated"):
+        TrajectoryLog(str(bad))
+
+
+def test_close_releases_the_map(log_path):
+    log = TrajectoryLog(log_path)
+    track = log.tracks[0]
+    track.pose_at(1.0)
+    log.close()
+    assert log.map.closed and not log.tracks and track.t is None
+
+
+def test_pack_csv_sorts_each_body(tmp_path):
+    csv_path = tmp_path / "run.csv"
+    csv_path.write_text("body,t,x,y\nego,2,2,0\nego,0,0,0\nbox,0,1,1\nego,1,1,0\n# note\n")
+    out = str(tmp_path / "run.trj")
+    assert pack_csv(str(csv_path), out) == (2, 4)
+    with TrajectoryLog(out) as log:
+        ego = log.tracks[0]
+        assert (ego.name, list(ego.t), list(ego.x)) == ("ego", [0.0, 1.0, 2.0], [0.0, 1.0, 2.0])
+        assert ego.pose_at(0.5) == (0.5, 0.0)
+        assert not any(math.isnan(v) for v in log.tracks[1].pose_at(3.0))
+
+
+def test_bad_csv_row(tmp_path):
+    csv_path = tmp_path / "run.csv"
+    csv_path.write_text("ego,0,0,0\nego,x,0,0\n")
+    with pytest.raises(ValueError, match=":2:"):
+        pack_csv(str(csv_path), str(tmp_path / "run.trj"))
@@ -0,0 +1,102 @@
+import random
+
+import pytest
+
+from common import make_scene
+from config_editor.io_utils import parse_g_file
+from config_editor.scene import SceneModel
+from config_editor.validation import EPS, Issue, LiveValidator, aabbs, describe, overlapping_pairs, validate_scene
+
+
+def brute_pairs(x1, y1, x2, y2):
+    # Pairs whose intersection is wider and taller than EPS
+    n = len(x1)
+    return {(i, j) for i in range(n) for j in range(i + 1, n)
+            if min(x2[i], x2[j]) - max(x1[i], x1[j]) > EPS and min(y2[i], y2[j]) - max(y1[i], y1[j]) > EPS}
+
+
+def swept_pairs(x1, y1, x2, y2, chunk=1000):
+    first, second = overlapping_pairs(x1, y1, x2, y2, chunk)
+    pairs = [(int(a), int(b)) if a < b else (int(b), int(a)) for a, b in zip(first, second)]
+    assert len(pairs) == len(set(pairs))
+    return set(pairs)
+
+
+def random_boxes(n, seed, grid=False):
+    # grid: coordinates on a coarse lattice, so edges coincide and many boxes
+    # are zero-width or zero-height
+    rng = random.Random(seed)
+    x1, y1, x2, y2 = [], [], [], []
+    for _ in range(n):
+        if grid:
+            x, y = rng.randint(0, 10) / 2, rng.randint(0, 10) / 2
+            w, h = rng.randint(0, 4) / 2, rng.randint(0, 4) / 2
+        else:
+            x, y = rng.uniform(0, 20), rng.uniform(0, 20)
+            w, h = rng.expovariate(1.0), rng.expovariate(1.0)
+        x1.append(x)
+        y1.append(y)
+        x2.append(x + w)
+        y2.append(y + h)
+    return x1, y1, x2, y2
+
+
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("grid", [False, True])
+def test_sweep_matches_brute_force(seed, grid):
+    boxes = random_boxes(300, seed, grid)
+    assert swept_pairs(*boxes, chunk=97) == brute_pairs(*boxes)
+
+
+def test_zero_extent_boxes_overlap_nothing():
+    # A zero-width box sharing its x with a wide box, and a zero-height one
+    x1, y1, x2, y2 = [0.0, 0.0, 0.0], [0.0, 0.0, 0.5], [2.0, 0.0, 2.0], [2.0, 2.0, 0.5]
+    assert swept_pairs(x1, y1, x2, y2) == set()
+    assert swept_pairs(x1[::-1], y1[::-1], x2[::-1], y2[::-1]) == set()
+
+
+def test_touching_edges_do_not_count():
+    assert swept_pairs([0.0, 1.0], [0.0, 0.0], [1.0, 2.0], [1.0, 1.0]) == set()
+    assert swept_pairs([0.0, 0.9], [0.0, 0.0], [1.0, 2.0], [1.0, 1.0]) == {(0, 1)}
+
+
+def test_validate_scene_reports_conflicting_pairs_only():
+    scene = SceneModel.from_parsed(parse_g_file(make_scene(400, seed=3))[0])
+    x1, y1, x2, y2 = (list(map(float, c)) for c in aabbs(scene))
+    issues = validate_scene(scene, 8.0, 8.0)
+    reported = {issue.rows for issue in issues if len(issue.rows) == 2}
+    assert reported <= brute_pairs(x1, y1, x2, y2)
+    walls = {(a, b) for a, b in brute_pairs(x1, y1, x2, y2) if scene.types[a] == scene.types[b] == "wall"}
+    assert not reported & walls
+    assert all(isinstance(issue, Issue) for issue in issues)
+
+
+def scene_of(*objs):
+    return SceneModel.from_parsed([{'name': n, 'full_name': n, 'x': x, 'y': y, 'w': w, 'h': h, 'type': t, 'color': 'red'}
+                                   for n, t, x, y, w, h in objs])
+
+
+def test_messages_name_the_rule():
+    scene = scene_of(("wall1", "wall", 0, 0, 1, 1), ("goal1", "goal_location", 0, 0, 0.3, 0.3),
+                     ("mov1", "movable", 0.2, 0, 0.3, 0.3), ("ego", "agent", 9, 9, 0.2, 0.2))
+    lines = sorted(describe(issue, scene.names) for issue in validate_scene(scene, 8.0, 8.0))
+    assert lines == sorted([
+        "wall1 and goal1: goal location inside a wall",
+        "wall1 and mov1: solid objects overlap",
+        "ego: outside the world",
+        "ego: agent starts outside its limits [-4, 4, -4, 4]",
+    ])
+
+
+class Named:
+    def __init__(self, name, obj_type):
+        self.name, self.obj_type = name, obj_type
+
+
+def test_panel_lines_name_the_rule():
+    wall, goal, mov = Named("wall1", "wall"), Named("goal1", "goal_location"), Named("mov1", "movable")
+    validator = LiveValidator(app=None)
+    validator.partners = {wall: {goal, mov}}
+    validator.rules = {wall: {"outside_world"}}
+    assert validator.issues_for(wall) == ["outside the world", "goal location inside a wall: goal1",
+                                          "solid objects overlap: mov1"]
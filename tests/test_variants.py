@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+from common import make_scene
+from config_editor.io_utils import parse_g_file
+from config_editor.scene import SceneModel
+from config_editor.validation import validate_scene
+from config_editor.variants import VariantError, generate_variants, load_spec, make_variant
+
+TEMPLATE = '''Include: <../base-walls-min.g>
+
+wall1 (world){ shape:ssBox, Q:"t(0 0 0.3)", size:[0.2 2.0 0.6 .02], color:[0.69 0.51 0.45], contact: 1 }
+
+egoJoint(world){ Q:[0 0 0.1] }
+ego(egoJoint) { shape:ssCylinder, Q:[-1.5 1.5 0], size:[0.2 0.2 .02], color:[0.96 0.74 0.30], logical:{agent}, joint:transXY, contact: 1 }
+
+mov1Joint(world){ Q:[0.0 0.0 0.1] }
+mov1(mov1Joint) { shape:ssBox, Q:"t(1 1 .0)", size:[0.3 0.3 .2 .02], logical:{ movable_o }, color:[1 1 1], joint:rigid, contact: 1 }
+
+obj1Joint(world){ Q:[0.0 0.0 0.1] }
+obj1(obj1Joint) { shape:ssBox, Q:"t(1 -1 .0)", size:[0.3 0.3 .2 .02], logical:{ movable_go }, color:[0 0 1], joint:rigid, contact: 1 }
+goal1 (world){ shape:ssBox, Q:"t(-1 -1 0)", size:[0.3 0.3 .2 .02], color:[1 0 0], logical:{goal}, contact:0 }
+'''
+
+
+@pytest.fixture
+def template(tmp_path):
+    path = tmp_path / "level.g"
+    path.write_text(TEMPLATE)
+    return str(path)
+
+
+def read_all(results):
+    out = {}
+    for index, path, error in results:
+        assert error is None
+        with open(path) as f:
+            out[index] = (os.path.basename(path), f.read())
+    return out
+
+
+def test_parallel_output_matches_serial(tmp_path, template):
+    spec = dict(load_spec(), goal_pairs=[1, 3])
+    serial = read_all(generate_variants(template, 12, str(tmp_path / "j1"), spec, seed=7, jobs=1))
+    parallel = read_all(generate_variants(template, 12, str(tmp_path / "j3"), spec, seed=7, jobs=3))
+    assert list(serial) == list(range(12))
+    assert serial == parallel
+
+
+def test_start_offset_reproduces_the_same_variants(tmp_path, template):
+    full = read_all(generate_variants(template, 6, str(tmp_path / "a"), seed=1, jobs=1))
+    tail = read_all(generate_variants(template, 3, str(tmp_path / "b"), seed=1, jobs=1, start=3))
+    assert {i: full[i][1] for i in (3, 4, 5)} == {i: text for i, (_, text) in tail.items()}
+
+
+def test_variants_are_valid_and_seeded():
+    template = parse_g_file(TEMPLATE)[0]
+    spec = dict(load_spec(), goal_pairs=3, scale={"movable": 0.2})
+    for index in range(10):
+        objs = make_variant(template, spec, seed=3, index=index)
+        assert objs == make_variant(template, spec, seed=3, index=index)
+        assert validate_scene(SceneModel.from_parsed(objs), *spec['world']) == []
+        assert sum(o['type'] == "goal_object" for o in objs) == 3
+        assert [o for o in objs if o['type'] == "wall"] == [o for o in template if o['type'] == "wall"]
+    assert make_variant(template, spec, 3, 0) != make_variant(template, spec, 4, 0)
+
+
+def test_impossible_spec_fails_cleanly():
+    template = parse_g_file(TEMPLATE)[0]
+    spec = dict(load_spec(), goal_pairs=50, goal_size=[1.5, 1.5], attempts=5, retries=2)
+    with pytest.raises(VariantError):
+        make_variant(template, spec, 0, 0)
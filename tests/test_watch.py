@@ -0,0 +1,112 @@
+import os
+import time
+
+from common import make_scene
+from config_editor.document import DocumentReader
+from config_editor.io_utils import parse_g_file
+from config_editor.watch import FileWatcher, diff_records, read_records
+
+
+def records(text):
+    return {d['full_name']: d for d in parse_g_file(text)[0]}
+
+
+def test_diff_records():
+    old = records(make_scene(40, seed=1))
+    new = {name: dict(rec) for name, rec in old.items()}
+    removed = sorted(new)[:3]
+    for name in removed: del new[name]
+    moved = sorted(new)[5]
+    new[moved]['x'] += 1
+    new['wall999'] = dict(new[moved], name='wall999', full_name='wall999')
+    added, gone, changed = diff_records(old, new)
+    assert [r['full_name'] for r in added] == ['wall999']
+    assert sorted(gone) == removed
+    assert [r['full_name'] for r in changed] == [moved]
+    assert diff_records(old, old) == ([], [], [])
+
+
+def test_read_records_matches_the_document(tmp_path):
+    path = tmp_path / "level.g"
+    text = make_scene(60, seed=2)
+    path.write_text(text)
+    document, recs = read_records(str(path))
+    assert recs == records(text)
+    assert document.data == text.encode()
+
+
+class Root:
+    # Just enough of Tk for the watcher: after() callbacks run when the test says
+    def __init__(self):
+        self.calls = {}
+        self.ids = 0
+
+    def after(self, ms, fn):
+        self.ids += 1
+        self.calls[self.ids] = fn
+        return self.ids
+
+    def after_cancel(self, after_id):
+        self.calls.pop(after_id, None)
+
+    def run(self):
+        calls, self.calls = self.calls, {}
+        for fn in calls.values(): fn()
+
+
+class App:
+    def __init__(self):
+        self.root = Root()
+
+
+def wait_for(changes, root, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not changes and time.monotonic() < deadline:
+        time.sleep(0.01)
+        root.run()
+    return changes
+
+
+def test_watcher_reports_the_delta_of_a_rewrite(tmp_path):
+    path = tmp_path / "level.g"
+    text = make_scene(30, seed=3)
+    path.write_text(text)
+    app, changes = App(), []
+    watcher = FileWatcher(app, str(path), lambda *change: changes.append(change), interval_ms=10)
+    watcher.start()
+    try:
+        time.sleep(0.2)  # the worker takes its baseline first
+        old = records(text)
+        name = next(n for n in sorted(old) if f"{n}({n}Joint)" in text)
+        new_text = text.replace(f"{name}({name}Joint)", f"{name}x({name}Joint)")
+        path.write_text(new_text)
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+        document, added, removed, changed = wait_for(changes, app.root)[0]
+        assert document.data == new_text.encode()
+        assert removed == [name] and [r['full_name'] for r in added] == [name + "x"]
+    finally:
+        watcher.stop()
+    assert watcher._poll_id is None
+
+
+def test_write_before_start_is_reported_against_the_loaded_document(tmp_path):
+    path = tmp_path / "level.g"
+    text = make_scene(30, seed=4)
+    path.write_text(text)
+    with DocumentReader(str(path)) as reader:
+        for _ in reader: pass
+        loaded = reader.document()
+    old = records(text)
+    name = next(n for n in sorted(old) if f"{n}({n}Joint)" in text)
+    path.write_text(text.replace(f"{name}({name}Joint)", f"{name}x({name}Joint)"))
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    app, changes = App(), []
+    watcher = FileWatcher(app, str(path), lambda *change: changes.append(change), interval_ms=10, document=loaded)
+    watcher.start()
+    try:
+        document, added, removed, changed = wait_for(changes, app.root)[0]
+        assert removed == [name] and [r['full_name'] for r in added] == [name + "x"]
+    finally:
+        watcher.stop()
@@ -0,0 +1,29 @@
+import io
+
+import pytest
+
+from bench_write import legacy_generate_g_string
+from common import make_objects
+from config_editor.io_utils import generate_g_string, parse_g_file, write_g_file
+
+
+@pytest.mark.parametrize("n", [0, 1, 300])
+def test_matches_legacy_writer(n):
+    objects = make_objects(n, seed=n)
+    assert generate_g_string(objects, "<base.g>") == legacy_generate_g_string(objects, "<base.g>")
+
+
+def test_stream_matches_string():
+    objects = make_objects(300, seed=3)
+    out = io.StringIO()
+    write_g_file(out, objects, "<base.g>", batch_size=7)
+    assert out.getvalue() == generate_g_string(objects, "<base.g>")
+
+
+def test_round_trip():
+    objects = make_objects(50, seed=5)
+    parsed, base_file = parse_g_file(generate_g_string(objects, "<world.g>"))
+    assert base_file == "<world.g>"
+    # the agent is always written as ego
+    assert [o["name"] for o in parsed][1:] == [o.name for o in objects][1:]
+    assert [o["type"] for o in parsed] == [o.obj_type for o in objects]